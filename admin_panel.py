@@ -0,0 +1,193 @@
+from datetime import datetime
+
+import ranking
+
+# --- АДМІН-ПАНЕЛЬ: ТАБЛИЦЯ КОРИСТУВАЧІВ ---
+#
+# Таблиця показується сторінками з keyset-курсором (як рейтинг), з фільтрами
+# за роллю, статусом і текстом. Для повного перегляду є потоковий режим:
+# рядки йдуть із курсора SQLite прямо в шаблон, не збираючись у список.
+
+USERS_PAGE_SIZE = 50
+
+USER_ROLES = ['STUDENT', 'COMPANY', 'ADMIN']
+USER_STATUSES = ['active', 'blocked']
+
+# Колонка сортування -> вираз; останнім ключем завжди йде u.id
+USER_SORTS = {
+    'id': 'u.id',
+    'email': "IFNULL(u.email, '')",
+    'role': 'u.role',
+    'status': 'u.status',
+}
+
+USERS_SELECT = """
+    SELECT u.id, u.username, u.email, u.role, u.status,
+           s.first_name, s.last_name, s.patronymic, s.course, s.specialty, s.skills, s.links,
+           c.company_name, c.description, c.position,
+           COALESCE(s.contact_info, c.contact_info) as contact_info
+    FROM users u
+    LEFT JOIN students s ON u.id = s.user_id
+    LEFT JOIN companies c ON u.id = c.user_id
+    WHERE 1 = 1"""
+
+
+def user_filters(args):
+    sort = args.get('sort') if args.get('sort') in USER_SORTS else 'id'
+    return {
+        'q': (args.get('q') or '').strip(),
+        'role': args.get('role') if args.get('role') in USER_ROLES else '',
+        'status': args.get('status') if args.get('status') in USER_STATUSES else '',
+        'sort': sort,
+        'dir': 'asc' if args.get('dir') == 'asc' else 'desc',
+    }
+
+
+def _users_query(filters):
+    sql, params = USERS_SELECT, []
+    if filters['role']:
+        sql += " AND u.role = ?"
+        params.append(filters['role'])
+    if filters['status']:
+        sql += " AND u.status = ?"
+        params.append(filters['status'])
+    if filters['q']:
+        like = f"%{filters['q']}%"
+        sql += """ AND (u.username LIKE ? OR u.email LIKE ? OR s.first_name LIKE ? OR s.last_name LIKE ?
+                        OR c.company_name LIKE ?)"""
+        params.extend([like] * 5)
+
+    direction = filters['dir'].upper()
+    keys = [(USER_SORTS[filters['sort']], direction)]
+    if filters['sort'] != 'id':
+        keys.append(('u.id', direction))
+    return sql, params, keys
+
+
+def _key_value(row, expr):
+    # Значення ключа сортування для курсора — так, як його порівнює SQL-вираз
+    if expr == USER_SORTS['email']:
+        return row['email'] or ''
+    return row[expr.split('.')[-1]]
+
+
+def _order_by(keys):
+    return " ORDER BY " + ', '.join(f"{expr} {direction}" for expr, direction in keys)
+
+
+def fetch_users_page(db, filters, cursor=None, limit=USERS_PAGE_SIZE):
+    """Повертає (users, next_cursor) для однієї сторінки таблиці користувачів."""
+    sql, params, keys = _users_query(filters)
+    if cursor:
+        condition, cursor_params = ranking.keyset_condition(keys, ranking.decode_cursor(cursor, len(keys)))
+        sql += " AND " + condition
+        params.extend(cursor_params)
+    sql += _order_by(keys) + " LIMIT ?"
+    params.append(limit + 1)
+
+    users = [dict(row) for row in db.execute(sql, params).fetchall()]
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        last = users[-1]
+        next_cursor = ranking.encode_cursor([_key_value(last, expr) for expr, _ in keys])
+    return users, next_cursor
+
+
+def fetch_user(db, user_id):
+    """Один рядок таблиці користувачів (ті самі колонки, що й у сторінки) або None."""
+    row = db.execute(USERS_SELECT + " AND u.id = ?", (user_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def iter_users(db, filters, batch_size=500):
+    """Генератор усіх користувачів за фільтром — рядки читаються з курсора порціями."""
+    sql, params, keys = _users_query(filters)
+    cur = db.execute(sql + _order_by(keys), params)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(row)
+
+
+# --- АДМІН-ПАНЕЛЬ: ЗАПРОШЕННЯ ---
+#
+# Історія запрошень теж іде сторінками від найновіших (created_at, id), з
+# фільтрами за статусом, позначкою, компанією й датами. Підсумки в шапці
+# читаються з invitation_totals (див. invites.status_totals), а не з COUNT(*).
+
+INVITES_PAGE_SIZE = 50
+
+INVITE_STATUSES = ['pending', 'accepted', 'rejected']
+INVITE_KEYS = [('i.created_at', 'DESC'), ('i.id', 'DESC')]
+
+INVITES_SELECT = """
+    SELECT i.*, s.first_name, s.last_name,
+           c.company_name, c.avatar as company_avatar
+    FROM invitations i
+    LEFT JOIN students s ON i.student_id = s.id
+    LEFT JOIN companies c ON i.company_id = c.id
+    WHERE 1 = 1"""
+
+
+def _date(value):
+    try:
+        return datetime.strptime((value or '').strip(), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return ''
+
+
+def invitation_filters(args):
+    company = (args.get('company') or '').strip()
+    return {
+        'status': args.get('status') if args.get('status') in INVITE_STATUSES else '',
+        'flagged': '1' if args.get('flagged') == '1' else '',
+        'company': company if company.isascii() and company.isdigit() else '',
+        'date_from': _date(args.get('date_from')),
+        'date_to': _date(args.get('date_to')),
+    }
+
+
+def fetch_invitations_page(db, filters, cursor=None, limit=INVITES_PAGE_SIZE):
+    """Повертає (invitations, next_cursor) для однієї сторінки панелі запрошень."""
+    sql, params = INVITES_SELECT, []
+    if filters['status']:
+        sql += " AND i.status = ?"
+        params.append(filters['status'])
+    if filters['flagged']:
+        # Літерал, а не параметр — інакше SQLite не візьме частковий індекс
+        sql += " AND i.flagged = 1"
+    if filters['company']:
+        sql += " AND i.company_id = ?"
+        params.append(int(filters['company']))
+    if filters['date_from']:
+        sql += " AND i.created_at >= ?"
+        params.append(filters['date_from'])
+    if filters['date_to']:
+        sql += " AND i.created_at < date(?, '+1 day')"
+        params.append(filters['date_to'])
+    if cursor:
+        # Ті самі перевірки, що й для рейтингу та користувачів; id запрошення — лише ціле число
+        values = ranking.decode_cursor(cursor, len(INVITE_KEYS))
+        if isinstance(values[0], (int, float)) or not isinstance(values[1], int):
+            raise ranking.InvalidCursor(cursor)
+        condition, cursor_params = ranking.keyset_condition(INVITE_KEYS, values)
+        sql += " AND " + condition
+        params.extend(cursor_params)
+    sql += _order_by(INVITE_KEYS) + " LIMIT ?"
+    params.append(limit + 1)
+
+    invitations = [dict(row) for row in db.execute(sql, params).fetchall()]
+    next_cursor = None
+    if len(invitations) > limit:
+        invitations = invitations[:limit]
+        last = invitations[-1]
+        next_cursor = ranking.encode_cursor([last['created_at'], last['id']])
+    return invitations, next_cursor
+
+
+def company_choices(db):
+    return [tuple(row) for row in db.execute(
+        "SELECT id, company_name FROM companies WHERE company_name IS NOT NULL AND company_name != '' ORDER BY company_name")]
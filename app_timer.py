@@ -1,988 +1,393 @@
 import sqlite3
+import hashlib
+import hmac
+import io
+import logging
 import os
-from flask import Flask, render_template_string, request, session, redirect, g, flash
+import time
+import click
+from flask import Blueprint, Flask, Response, current_app, make_response, render_template, stream_with_context, request, session, redirect, g, flash
 from datetime import datetime
-
-# Налаштування додатка
-app = Flask(__name__)
-app.secret_key = 'ukd_recruitment_secret_key_v5'
-DATABASE = 'ukd_database.db'
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.local import LocalProxy
+
+import admin_panel
+import bulk_import
+import cache
+import compression
+import db_pool
+import exports
+import invites
+import mail_service
+import matching
+import migrations
+import profiling
+import query_plans
+import ranking
+import ranking_snapshot
+import rating_engine
+import settings
+import skills
+import slow_queries
+import write_queue
+
+# Маршрути й CLI-команди живуть у blueprint, а додаток збирає create_app(config):
+# налаштування (БД, секрет, розміри пулу й кешів) — з UKD_* змінних оточення (settings.py)
+bp = Blueprint('ukd', __name__, cli_group=None)
+
+# Кожна вкладка — окремий шаблон у templates/tabs/, тож рендер вкладки
+# компілює й виконує лише її код (плюс спільний base.html)
+TAB_TEMPLATES = {
+    'home': 'tabs/home.html',
+    'ranking': 'tabs/ranking.html',
+    'invitations': 'tabs/invitations.html',
+    'users': 'tabs/users.html',
+    'profile': 'tabs/profile.html',
+    'slow_queries': 'tabs/slow_queries.html',
+}
+
+
+class Services:
+    """Стан одного екземпляра додатка (app.extensions['ukd']): пул, кеші, профайлер, фонові воркери."""
+
+    def __init__(self, app):
+        config = app.config
+        self.database = config['DATABASE']
+        self.pool_size = config['POOL_SIZE']
+        self.pragmas = {'cache_size': -config['SQLITE_CACHE_KB'], 'mmap_size': config['SQLITE_MMAP_MB'] * 1024 * 1024}
+
+        # Стиснення відповідей (br/gzip) від порогового розміру
+        self.compressor = compression.Compressor(app, cache_size=config['COMPRESSION_CACHE_SIZE'])
+        # Профілювання запитів: SQL, рендер і повний час маршруту -> Server-Timing і /metrics (UKD_PROFILING=0 вимикає)
+        self.profiling = config['PROFILING']
+        self.metrics_token = config['METRICS_TOKEN']
+        self.profiler = profiling.Profiler(app, tabs=TAB_TEMPLATES, enabled=self.profiling)
+        # Журнал повільних запитів (потребує профілювання): SQL довший за UKD_SLOW_QUERY_MS мс
+        # записується з планом у UKD_SLOW_QUERY_LOG (з ротацією; порожнє значення — лише в пам'ять)
+        self.slow_query_log = slow_queries.SlowQueryLog(self.database, config['SLOW_QUERY_MS'],
+                                                        config['SLOW_QUERY_LOG'] or None)
+        self.profiler.listeners.append(self.slow_query_log.on_request)
+
+        # Версія даних рейтингу: маршрути, що змінюють профілі студентів, викликають bump(),
+        # і кеш фасетів (курси/спеціальності з лічильниками) перераховується лише тоді
+        self.ranking_version = cache.DataVersion()
+        self.facet_cache = cache.VersionedCache(self.ranking_version, ttl=config['FACET_CACHE_TTL'])
+        # Необов'язковий знімок рейтингу в пам'яті (UKD_RANKING_SNAPSHOT=1): сторінки рейтингу,
+        # фасети й експорт без пошуку відповідаються без SQL. Перебудовується після bump() версії
+        # рейтингу в цьому процесі, а записи інших процесів помічає через PRAGMA data_version
+        # не частіше ніж раз на UKD_RANKING_SNAPSHOT_INTERVAL с; перебудова йде у фоні, запити
+        # тим часом отримують попередній знімок
+        self.ranking_snapshot = (ranking_snapshot.RankingSnapshot(self.database, self.ranking_version,
+                                                                  config['RANKING_SNAPSHOT_INTERVAL'])
+                                 if config['RANKING_SNAPSHOT'] else None)
+        # Рушій підбору кандидатів будується ліниво при першому запиті до /api/matches,
+        # а далі перебудовується у фоні на власному з'єднанні
+        self.matcher = matching.MatchingEngine(self.database)
+        # Записи маршрутів — через один потік-письменник процесу з груповою фіксацією
+        # (UKD_WRITE_QUEUE=0 — на з'єднанні самого запиту, як раніше)
+        self.write_queue = (write_queue.WriteQueue(self.database, self.pragmas, config['WRITE_BATCH'])
+                            if config['WRITE_QUEUE'] else None)
+
+        # Пошта: 'thread' — воркер outbox у фоновому потоці кожного процесу,
+        # 'off' — листи лише накопичуються (їх розвантажує окремий `flask mail-worker`)
+        self.mail_worker_mode = config['MAIL_WORKER']
+        self.mail_worker = None
+        # Повний перерахунок рейтингу раз на UKD_RATING_INTERVAL секунд (0 — вимкнено, напр. якщо є cron)
+        self.rating_interval = config['RATING_INTERVAL']
+        self.rating_scheduler = None
+        # Процес, у якому запущено фонові потоки: після fork їх треба запустити знову
+        self.workers_pid = None
+
+        # Головна сторінка для анонімних відвідувачів однакова для всіх — рендериться раз на версію
+        self.app_version = config['APP_VERSION'] or template_version(app)
+        self.landing_cache = {}
+        # Схема перевіряється (а шаблони компілюються) один раз, а не на кожен запит
+        self.schema_ready = False
+
+    def pool(self):
+        return db_pool.get_pool(self.database, self.pool_size, self.pragmas)
+
+    def start_workers(self):
+        """Фонові потоки пошти й рейтингу — у кожному процесі свої (потоки не переживають fork)."""
+        self.workers_pid = os.getpid()
+        if self.mail_worker_mode == 'thread':
+            sender = mail_service.sender_from_env()
+            if sender is None:
+                logging.getLogger(__name__).warning("UKD_MAIL_SENDER is not set: mail stays in the outbox")
+            else:
+                self.mail_worker = mail_service.OutboxWorker(self.pool(), sender)
+                self.mail_worker.start()
+        if self.rating_interval > 0:
+            self.rating_scheduler = rating_engine.PeriodicRecompute(self.pool(), self.rating_interval,
+                                                                    on_change=self.ranking_version.bump)
+            self.rating_scheduler.start()
+
+    def wake_mail_worker(self):
+        if self.mail_worker is not None:
+            self.mail_worker.wake()
+
+
+# Стан поточного додатка для маршрутів і команд
+services = LocalProxy(lambda: current_app.extensions['ukd'])
+
+
+def create_app(config=None):
+    """Фабрика додатка: налаштування з UKD_* змінних оточення, перекриті словником config."""
+    app = Flask(__name__)
+    app.config.update(settings.from_env())
+    if config:
+        app.config.update(config)
+    # Необов'язковий кеш скомпільованих шаблонів на диску: нові воркери стартують "теплими"
+    if app.config['TEMPLATE_CACHE_DIR']:
+        os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+        app.jinja_options = dict(app.jinja_options,
+                                 bytecode_cache=FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR']))
+    # Відступи й коментарі з HTML-шаблонів прибираються ще при компіляції
+    app.jinja_options = dict(app.jinja_options, extensions=[compression.HTMLMinifier])
+    app.extensions['ukd'] = Services(app)
+    app.teardown_appcontext(close_connection)
+    app.register_blueprint(bp)
+    return app
 
 # --- РОБОТА З БАЗОЮ ДАНИХ (SQLite) ---
 
+def ranking_page(filters, cursor=None, limit=ranking.PAGE_SIZE):
+    snapshot = services.ranking_snapshot
+    if snapshot is not None and snapshot.covers(filters):
+        students, next_cursor = snapshot.fetch_page(filters, cursor, limit)
+        return snapshot.add_avatars(get_db(), students), next_cursor
+    return ranking.fetch_page(get_db(), filters, cursor, limit)
+
+def ranking_facets():
+    if services.ranking_snapshot is not None:
+        return services.ranking_snapshot.facets()
+    return services.facet_cache.get('facets', lambda: ranking.facets(get_db()))
+
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row
-    return db
+        db = g._database = services.pool().acquire()
+    return services.profiler.wrap(db)
+
+def run_write(fn):
+    """Виконує fn(db) в одній транзакції запису й повертає її результат; fn не комітить сама."""
+    if services.write_queue is not None:
+        # SQL самої fn рахується в профіль запиту; write — усе очікування, разом із чергою й COMMIT
+        profile = g.get('_profile')
+        started = time.perf_counter()
+        try:
+            return services.write_queue.run(fn, profile)
+        finally:
+            if profile is not None:
+                profile.write_time += time.perf_counter() - started
+    db = get_db()
+    if not db.in_transaction:
+        db.execute("BEGIN IMMEDIATE")
+    try:
+        result = fn(db)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return result
 
-@app.teardown_appcontext
 def close_connection(exception):
-    db = getattr(g, '_database', None)
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        services.pool().release(db)
 
-def init_db():
+def init_db(app):
     with app.app_context():
-        db = get_db()
-        cursor = db.cursor()
-        
-        # 1. Users
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                email TEXT,
-                role TEXT NOT NULL DEFAULT 'STUDENT',
-                status TEXT DEFAULT 'active'
-            )
-        ''')
-
-        # 2. Students
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE,
-                first_name TEXT,
-                last_name TEXT,
-                patronymic TEXT,
-                course TEXT,
-                specialty TEXT,
-                skills TEXT,
-                links TEXT,
-                contact_info TEXT,
-                rating INTEGER DEFAULT 0,
-                avatar TEXT DEFAULT 'https://cdn-icons-png.flaticon.com/512/354/354637.png',
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Міграції для студентів (якщо БД вже існує)
-        for col in ['patronymic', 'course', 'contact_info']:
-            try: cursor.execute(f"ALTER TABLE students ADD COLUMN {col} TEXT")
-            except sqlite3.OperationalError: pass
-            
-        try: cursor.execute("ALTER TABLE students ADD COLUMN rating INTEGER DEFAULT 0")
-        except sqlite3.OperationalError: pass
-
-        # 3. Companies
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS companies (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE,
-                company_name TEXT,
-                description TEXT,
-                avatar TEXT DEFAULT 'https://cdn-icons-png.flaticon.com/512/3061/3061341.png',
-                position TEXT,
-                contact_info TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Міграції для компаній
-        for col in ['avatar', 'position', 'contact_info']:
-            try: cursor.execute(f"ALTER TABLE companies ADD COLUMN {col} TEXT")
-            except sqlite3.OperationalError: pass
-            
-        try: cursor.execute("ALTER TABLE companies ALTER COLUMN avatar SET DEFAULT 'https://cdn-icons-png.flaticon.com/512/3061/3061341.png'")
-        except sqlite3.OperationalError: pass
-
-        # 4. Admins
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS admins (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE,
-                admin_level INTEGER DEFAULT 1,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-
-        # 5. Invitations
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS invitations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER,
-                company_id INTEGER,
-                user_id INTEGER, 
-                message TEXT,
-                status TEXT DEFAULT 'pending',
-                flagged BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students (id),
-                FOREIGN KEY (company_id) REFERENCES companies (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        try: cursor.execute("ALTER TABLE invitations ADD COLUMN flagged BOOLEAN DEFAULT 0")
-        except sqlite3.OperationalError: pass
-        try: cursor.execute("ALTER TABLE users ADD COLUMN status TEXT DEFAULT 'active'")
-        except sqlite3.OperationalError: pass
-            
-        db.commit()
-        
-        # Admin Default
-        cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-        if not cursor.fetchone():
-            cursor.execute("INSERT INTO users (username, password, email, role) VALUES (?, ?, ?, ?)",
-                           ('admin', '123', 'admin@ukd.edu.ua', 'ADMIN'))
-            admin_user_id = cursor.lastrowid
-            cursor.execute("INSERT INTO admins (user_id, admin_level) VALUES (?, ?)", (admin_user_id, 10))
-            db.commit()
-
-# --- HTML ШАБЛОН ---
-
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="uk">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>УКД Recruitment</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        :root { --ukd-red: #4a0404; --ukd-bright: #8b0000; }
-        body { background-color: var(--ukd-red); color: white; font-family: 'Inter', sans-serif; }
-        .card { background: white; color: black; border-left: 8px solid black; transition: 0.3s; }
-        .card:hover { transform: translateY(-5px); box-shadow: 0 10px 20px rgba(0,0,0,0.5); }
-        .nav-btn.active { border-bottom: 2px solid white; font-weight: bold; color: white; }
-        .nav-btn { color: #ccc; transition: 0.3s; }
-        .nav-btn:hover { color: white; }
-        input, select, textarea { border: 2px solid #ddd; transition: 0.3s; color: black; }
-        input:focus, select:focus, textarea:focus { border-color: var(--ukd-bright); outline: none; }
-        .modal-bg { background: rgba(0,0,0,0.9); }
-        .landing-hero { background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)), url('https://yt3.googleusercontent.com/ytc/AIdro_k624OQvH_3vjA4H8U1fQvX5Q5x5x5x5x5x5x5x5=s900-c-k-c0x00ffffff-no-rj'); background-size: cover; background-position: center; }
-        .table-wrapper { width: 100%; overflow-x: auto; -webkit-overflow-scrolling: touch; }
-    </style>
-</head>
-<body class="min-h-screen flex flex-col">
-
-    <!-- Навігація -->
-    <nav class="bg-black p-4 sticky top-0 z-50 shadow-2xl border-b border-white/10">
-        <div class="container mx-auto flex flex-wrap justify-between items-center">
-            <div class="flex items-center space-x-3 cursor-pointer" onclick="window.location.href='/'">
-                <div class="bg-red-700 p-2 rounded-lg"><i class="fas fa-graduation-cap text-white"></i></div>
-                <span class="text-xl font-black uppercase tracking-tighter">УКД <span class="text-red-600">Talent</span></span>
-            </div>
-            
-            {% if session.get('user_id') %}
-            <div class="hidden md:flex space-x-6 items-center flex-grow justify-center">
-                <a href="/?tab=home" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'home' else '' }}">
-                    <i class="fas fa-home mr-1"></i> Головна
-                </a>
-                <a href="/?tab=ranking" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'ranking' else '' }}">
-                    <i class="fas fa-list-ol mr-1"></i> Рейтинг
-                </a>
-                
-                {% if session.get('role') == 'ADMIN' %}
-                    <a href="/?tab=invitations" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'invitations' else '' }} text-yellow-400">
-                        <i class="fas fa-shield-alt mr-1"></i> Адмін Панель
-                    </a>
-                    <a href="/?tab=users" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'users' else '' }} text-purple-400">
-                        <i class="fas fa-users mr-1"></i> Користувачі
-                    </a>
-                {% endif %}
-
-                {% if session.get('role') == 'COMPANY' %}
-                     <a href="/?tab=invitations" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'invitations' else '' }}">
-                        <i class="fas fa-paper-plane mr-1"></i> Мої Запити
-                    </a>
-                {% endif %}
-                
-                {% if session.get('role') == 'STUDENT' %}
-                     <a href="/?tab=invitations" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'invitations' else '' }}">
-                        <i class="fas fa-inbox mr-1"></i> Мої Запрошення 
-                        {% if pending_count > 0 %}
-                        <span class="bg-red-600 text-white text-xs px-2 py-0.5 rounded-full ml-1 animate-pulse">{{ pending_count }}</span>
-                        {% endif %}
-                    </a>
-                {% endif %}
-
-                <a href="/?tab=profile" class="nav-btn px-2 py-1 {{ 'active' if active_tab == 'profile' else '' }}">
-                    <i class="fas fa-user-circle mr-1"></i> Мій Профіль
-                </a>
-            </div>
-
-            <div class="flex items-center space-x-4">
-                <div class="text-right hidden sm:block">
-                    <div class="text-xs text-gray-400 uppercase font-bold">{{ session.get('role') }}</div>
-                    <div class="font-bold">{{ session.get('username') }}</div>
-                </div>
-                <a href="/logout" class="bg-white/10 hover:bg-red-600 p-2 rounded-full transition"><i class="fas fa-sign-out-alt"></i></a>
-            </div>
-            {% else %}
-            <div>
-                 <button onclick="toggleModal('login-modal')" class="bg-white text-black px-5 py-1.5 rounded-full font-bold hover:bg-gray-200">Вхід</button>
-                 <button onclick="toggleModal('register-modal')" class="border border-white text-white px-5 py-1.5 rounded-full font-bold hover:bg-white hover:text-black ml-2">Реєстрація</button>
-            </div>
-            {% endif %}
-        </div>
-        
-        <!-- Мобільне меню -->
-        {% if session.get('user_id') %}
-        <div class="md:hidden flex justify-around mt-4 border-t border-white/10 pt-2 overflow-x-auto gap-4">
-            <a href="/?tab=home" class="text-sm whitespace-nowrap"><i class="fas fa-home"></i> Головна</a>
-            <a href="/?tab=ranking" class="text-sm whitespace-nowrap"><i class="fas fa-list"></i> Рейтинг</a>
-            <a href="/?tab=invitations" class="text-sm whitespace-nowrap"><i class="fas fa-inbox"></i> Inbox</a>
-            {% if session.get('role') == 'ADMIN' %}<a href="/?tab=users" class="text-sm text-purple-400 whitespace-nowrap"><i class="fas fa-users"></i> Юзери</a>{% endif %}
-            <a href="/?tab=profile" class="text-sm whitespace-nowrap"><i class="fas fa-user"></i> Профіль</a>
-        </div>
-        {% endif %}
-    </nav>
-
-    <main class="flex-grow relative">
-        
-        {% with messages = get_flashed_messages() %}
-          {% if messages %}
-            <div class="container mx-auto px-4 mt-6">
-                <div class="bg-green-600 text-white p-4 rounded-xl text-center font-bold shadow-lg animate-bounce">
-                {{ messages[0] }}
-                </div>
-            </div>
-          {% endif %}
-        {% endwith %}
-
-        <!-- ЛЕНДІНГ ПЕЙДЖ -->
-        {% if not session.get('user_id') %}
-        <div class="landing-hero min-h-[80vh] flex items-center justify-center text-center px-4">
-            <div class="max-w-4xl">
-                <h1 class="text-5xl md:text-7xl font-black uppercase mb-6 drop-shadow-lg">
-                    Знайди Своє <span class="text-red-600">Майбутнє</span>
-                </h1>
-                <p class="text-xl md:text-2xl mb-8 font-light text-gray-200">
-                    Платформа працевлаштування для студентів Університету Короля Данила.
-                </p>
-                <div class="flex flex-col md:flex-row justify-center gap-4">
-                    <button onclick="toggleModal('register-modal')" class="bg-red-700 text-white px-8 py-4 rounded-full text-xl font-black uppercase hover:bg-red-800 transition shadow-xl transform hover:scale-105">
-                        <i class="fas fa-rocket mr-2"></i> Стати Студентом
-                    </button>
-                    <button onclick="toggleModal('register-modal')" class="bg-white text-black px-8 py-4 rounded-full text-xl font-black uppercase hover:bg-gray-200 transition shadow-xl transform hover:scale-105">
-                        <i class="fas fa-building mr-2"></i> Я Роботодавець
-                    </button>
-                </div>
-            </div>
-        </div>
-        {% else %}
-        
-        <!-- ВНУТРІШНЯ ЧАСТИНА САЙТУ -->
-        <div class="container mx-auto px-4 py-8">
-
-            <!-- Вкладка: ГОЛОВНА (Home) -->
-            {% if active_tab == 'home' %}
-            <section class="max-w-6xl mx-auto text-center py-8">
-                <h1 class="text-4xl md:text-6xl font-black uppercase mb-6 drop-shadow-lg tracking-tighter">
-                    Ласкаво просимо до <span class="text-red-600">УКД Talent</span>
-                </h1>
-                <p class="text-lg md:text-xl mb-12 font-light text-gray-200 max-w-3xl mx-auto">
-                    Платформа, що об'єднує найкращих студентів та провідних роботодавців для побудови успішного майбутнього.
-                </p>
-
-                <div class="grid md:grid-cols-2 gap-8 text-left mb-16">
-                    <div class="bg-white text-black p-8 rounded-3xl shadow-2xl border-l-8 border-red-700 transition hover:-translate-y-2">
-                        <div class="text-red-700 text-4xl mb-4"><i class="fas fa-university"></i></div>
-                        <h2 class="text-2xl font-black uppercase mb-4">Університет Короля Данила (УКД)</h2>
-                        <p class="text-gray-700 font-medium leading-relaxed">
-                            Університет Короля Данила — це сучасний заклад вищої освіти, який фокусується на практичних навичках, інноваціях та успішному працевлаштуванні випускників. Ми створюємо умови для розвитку талантів та тісно співпрацюємо з провідними компаніями, щоб наші студенти отримували реальний професійний досвід ще під час навчання.
-                        </p>
-                    </div>
-                    
-                    <div class="bg-white text-black p-8 rounded-3xl shadow-2xl border-l-8 border-black transition hover:-translate-y-2">
-                        <div class="text-black text-4xl mb-4"><i class="fas fa-project-diagram"></i></div>
-                        <h2 class="text-2xl font-black uppercase mb-4">Про Проєкт</h2>
-                        <p class="text-gray-700 font-medium leading-relaxed">
-                            <b>УКД Recruitment Platform</b> — це інноваційне рішення для спрощення процесу пошуку першої роботи для студентів та молодих спеціалістів. 
-                            Студенти можуть створювати професійні портфоліо та вказувати свої навички, а компанії отримують зручний інструмент для пошуку кандидатів за спеціальностями, рейтингом та можуть надсилати їм прямі запрошення на роботу.
-                        </p>
-                    </div>
-                </div>
-
-                <div class="mt-8 border-t border-white/20 pt-12 pb-6">
-                    <p class="text-gray-400 font-bold uppercase mb-6">Відкритий вихідний код проєкту на GitHub:</p>
-                    <a href="https://github.com/YuraFedorets/TeamProject/tree/V3" target="_blank" class="inline-flex items-center gap-3 bg-gray-800 hover:bg-black text-white px-8 py-4 rounded-full font-black uppercase transition shadow-xl border border-gray-600 hover:border-gray-400 transform hover:scale-105">
-                        <i class="fab fa-github text-3xl"></i> 
-                        TeamProject / V3
-                    </a>
-                </div>
-            </section>
-            {% endif %}
-
-            <!-- Вкладка: РЕЙТИНГ (Ranking) -->
-            {% if active_tab == 'ranking' %}
-            <section class="max-w-7xl mx-auto">
-                <h2 class="text-4xl font-black mb-8 uppercase tracking-tighter border-b-4 border-white pb-2">
-                    Рейтинг Студентів
-                </h2>
-                
-                <!-- ПАНЕЛЬ ПОШУКУ ТА ФІЛЬТРІВ -->
-                <form method="GET" action="/" class="bg-white text-black p-6 rounded-2xl shadow-xl mb-8 flex flex-wrap gap-4 items-end">
-                    <input type="hidden" name="tab" value="ranking">
-                    
-                    <div class="flex-grow min-w-[200px]">
-                        <label class="block text-xs font-bold uppercase text-gray-500 mb-1">Пошук (Ім'я, Навички)</label>
-                        <div class="relative">
-                            <i class="fas fa-search absolute left-3 top-3.5 text-gray-400"></i>
-                            <input type="text" name="search" value="{{ current_filters.search }}" class="w-full pl-10 pr-3 py-3 rounded-xl border-2 border-gray-200" placeholder="Наприклад: Python, Дизайн...">
-                        </div>
-                    </div>
-                    
-                    <div class="w-full md:w-auto">
-                        <label class="block text-xs font-bold uppercase text-gray-500 mb-1">Курс</label>
-                        <select name="course" class="w-full p-3 rounded-xl border-2 border-gray-200 bg-white">
-                            <option value="">Всі курси</option>
-                            {% for c in unique_courses %}
-                            <option value="{{ c }}" {% if current_filters.course == c|string %}selected{% endif %}>{{ c }} курс</option>
-                            {% endfor %}
-                        </select>
-                    </div>
-
-                    <div class="w-full md:w-auto">
-                        <label class="block text-xs font-bold uppercase text-gray-500 mb-1">Спеціальність</label>
-                        <select name="specialty" class="w-full p-3 rounded-xl border-2 border-gray-200 bg-white">
-                            <option value="">Всі спеціальності</option>
-                            {% for s in unique_specialties %}
-                            <option value="{{ s }}" {% if current_filters.specialty == s %}selected{% endif %}>{{ s }}</option>
-                            {% endfor %}
-                        </select>
-                    </div>
-
-                    <div class="w-full md:w-auto">
-                        <label class="block text-xs font-bold uppercase text-gray-500 mb-1">Сортування</label>
-                        <select name="sort" class="w-full p-3 rounded-xl border-2 border-gray-200 bg-white">
-                            <option value="desc" {% if current_filters.sort == 'desc' %}selected{% endif %}>Рейтинг: За спаданням (Топ)</option>
-                            <option value="asc" {% if current_filters.sort == 'asc' %}selected{% endif %}>Рейтинг: За зростанням</option>
-                        </select>
-                    </div>
-
-                    <div class="w-full md:w-auto flex gap-2">
-                        <button type="submit" class="bg-red-700 text-white px-6 py-3 rounded-xl font-black uppercase tracking-wide hover:bg-black transition"><i class="fas fa-filter mr-1"></i> Знайти</button>
-                        <a href="/?tab=ranking" class="bg-gray-200 text-gray-700 px-6 py-3 rounded-xl font-bold uppercase hover:bg-gray-300 transition text-center" title="Скинути фільтри"><i class="fas fa-times"></i></a>
-                    </div>
-                </form>
-
-                <!-- СПИСОК СТУДЕНТІВ -->
-                {% if students %}
-                <div class="grid md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-                    {% for std in students %}
-                    <div class="card rounded-2xl p-6 relative group overflow-hidden flex flex-col h-full">
-                        <!-- Зірочка рейтингу -->
-                        <div class="absolute top-4 right-4 bg-yellow-400 text-black px-2 py-1 rounded-lg font-black text-sm shadow-md" title="Рейтинг студента">
-                            <i class="fas fa-star text-xs"></i> {{ std.rating or 0 }}
-                        </div>
-
-                        <div class="flex items-center space-x-4 mb-4">
-                            <img src="{{ std.avatar }}" class="w-16 h-16 rounded-full border-2 border-black object-cover bg-gray-200">
-                            <div class="pr-8"> <!-- Відступ для зірочки -->
-                                <h3 class="text-lg font-black uppercase leading-tight">{{ std.last_name }} {{ std.first_name }}</h3>
-                                <p class="text-xs text-gray-500 font-bold mt-1">{{ std.course or '?' }} курс, {{ std.specialty or 'Спеціальність не вказана' }}</p>
-                            </div>
-                        </div>
-                        
-                        <div class="mb-4 flex-grow overflow-hidden">
-                            <p class="text-[10px] font-bold uppercase text-gray-400 mb-1">Навички:</p>
-                            <div class="flex flex-wrap gap-1 max-h-16 overflow-y-auto">
-                                {% for skill in (std.skills or '').split(',') %}
-                                    {% if skill.strip() %}
-                                    <span class="bg-gray-200 text-black px-2 py-0.5 rounded text-[10px] font-bold">{{ skill.strip() }}</span>
-                                    {% endif %}
-                                {% endfor %}
-                                {% if not std.skills %}<span class="text-gray-400 text-xs italic">Немає даних</span>{% endif %}
-                            </div>
-                        </div>
-
-                        <div class="grid grid-cols-2 gap-2 mt-auto pt-4 border-t border-gray-100">
-                            <button onclick="openStudentProfile({{ std.user_id }})" class="bg-black text-white py-2 rounded-lg font-bold text-xs uppercase hover:bg-gray-800 transition">
-                                <i class="fas fa-eye mr-1"></i> Профіль
-                            </button>
-                            
-                            {% if session.get('role') in ['COMPANY', 'ADMIN'] %}
-                            <button onclick="openInviteModal({{ std.id }}, '{{ std.first_name }}')" class="bg-red-700 text-white py-2 rounded-lg font-bold text-xs uppercase hover:bg-red-800 transition">
-                                <i class="fas fa-handshake mr-1"></i> Найняти
-                            </button>
-                            {% endif %}
-                        </div>
-                    </div>
-                    {% endfor %}
-                </div>
-                {% else %}
-                    <div class="text-center opacity-50 text-xl py-20 bg-black/20 rounded-2xl border border-white/10">
-                        <i class="fas fa-search mb-4 text-4xl"></i><br>
-                        Студентів за такими критеріями не знайдено.
-                    </div>
-                {% endif %}
-            </section>
-            {% endif %}
-
-            <!-- Вкладка: СКРИНЬКА (Invitations) -->
-            {% if active_tab == 'invitations' %}
-            <section class="max-w-5xl mx-auto">
-                <h2 class="text-3xl font-black mb-8 uppercase flex items-center gap-3">
-                    {% if session.get('role') == 'ADMIN' %} <i class="fas fa-shield-alt text-yellow-400"></i> Панель Керування Заявками
-                    {% elif session.get('role') == 'STUDENT' %} <i class="fas fa-inbox text-white"></i> Мої Запрошення на Роботу
-                    {% else %} <i class="fas fa-paper-plane text-blue-400"></i> Надіслані Пропозиції {% endif %}
-                </h2>
-                
-                <div class="bg-white text-black rounded-3xl shadow-2xl overflow-hidden">
-                    <div class="table-wrapper">
-                        <table class="w-full text-left min-w-max">
-                            <thead class="bg-gray-100 border-b-2 border-black">
-                                <tr>
-                                {% if session.get('role') != 'COMPANY' %}<th class="p-4 font-black uppercase">Від Кого (Компанія)</th>{% endif %}
-                                {% if session.get('role') != 'STUDENT' %}<th class="p-4 font-black uppercase">Кому (Студент)</th>{% endif %}
-                                <th class="p-4 font-black uppercase">Повідомлення</th>
-                                <th class="p-4 font-black uppercase">Статус</th>
-                                <th class="p-4 font-black uppercase">Дії</th>
-                            </tr>
-                        </thead>
-                        <tbody class="divide-y divide-gray-200">
-                            {% for inv in invitations %}
-                            <tr class="hover:bg-gray-50 transition {% if session.get('role') == 'ADMIN' and inv.flagged %}bg-red-50 border-l-4 border-red-600{% endif %}">
-                                {% if session.get('role') != 'COMPANY' %}
-                                <td class="p-4">
-                                    <div class="flex items-center space-x-3">
-                                        <img src="{{ inv.company_avatar or 'https://cdn-icons-png.flaticon.com/512/3061/3061341.png' }}" class="w-10 h-10 rounded-full border border-gray-300">
-                                        <div>
-                                            <span class="font-bold text-blue-800 block">{{ inv.company_name or 'Невідома Компанія' }}</span>
-                                            <span class="text-xs text-gray-500">{{ inv.created_at }}</span>
-                                        </div>
-                                    </div>
-                                </td>
-                                {% endif %}
-                                
-                                {% if session.get('role') != 'STUDENT' %}
-                                <td class="p-4 font-bold">{{ inv.last_name }} {{ inv.first_name }}</td>
-                                {% endif %}
-                                
-                                <td class="p-4 text-sm text-gray-600 italic max-w-xs whitespace-normal">"{{ inv.message }}"</td>
-                                
-                                <td class="p-4">
-                                    {% if inv.status == 'pending' %}
-                                        <span class="bg-yellow-100 text-yellow-800 px-3 py-1 rounded-full text-xs font-black uppercase animate-pulse">Очікує</span>
-                                    {% elif inv.status == 'accepted' %}
-                                        <span class="bg-green-100 text-green-800 px-3 py-1 rounded-full text-xs font-black uppercase"><i class="fas fa-check mr-1"></i> Прийнято</span>
-                                    {% elif inv.status == 'rejected' %}
-                                        <span class="bg-red-100 text-red-800 px-3 py-1 rounded-full text-xs font-black uppercase"><i class="fas fa-times mr-1"></i> Відхилено</span>
-                                    {% endif %}
-                                    
-                                    {% if session.get('role') == 'ADMIN' and inv.flagged %}
-                                        <div class="mt-2 text-red-600 text-xs font-black uppercase animate-bounce"><i class="fas fa-flag"></i> Увага адміна!</div>
-                                    {% endif %}
-                                </td>
-
-                                <td class="p-4">
-                                    <div class="flex gap-2 items-center flex-wrap min-w-[150px]">
-                                        {% if session.get('role') == 'STUDENT' and inv.status == 'pending' %}
-                                            <form action="/respond_invite" method="POST" class="inline-block m-0">
-                                                <input type="hidden" name="invite_id" value="{{ inv.id }}">
-                                                <input type="hidden" name="action" value="accept">
-                                                <button class="bg-green-600 text-white px-3 py-1 rounded hover:bg-green-700 text-xs font-bold uppercase whitespace-nowrap">Так</button>
-                                            </form>
-                                            <form action="/respond_invite" method="POST" class="inline-block m-0">
-                                                <input type="hidden" name="invite_id" value="{{ inv.id }}">
-                                                <input type="hidden" name="action" value="reject">
-                                                <button class="bg-red-600 text-white px-3 py-1 rounded hover:bg-red-700 text-xs font-bold uppercase whitespace-nowrap">Ні</button>
-                                            </form>
-                                        {% elif session.get('role') == 'STUDENT' %}
-                                            <span class="text-gray-400 text-xs uppercase font-bold">Закрито</span>
-                                        {% endif %}
-                                        
-                                        {% if session.get('role') == 'ADMIN' %}
-                                            <form action="/delete_invite" method="POST" class="inline-block m-0" onsubmit="return confirm('Видалити цю заявку назавжди?');">
-                                                <input type="hidden" name="invite_id" value="{{ inv.id }}">
-                                                <button class="bg-black text-white px-3 py-1 rounded hover:bg-red-700 text-xs font-bold uppercase whitespace-nowrap" title="Видалити"><i class="fas fa-trash"></i></button>
-                                            </form>
-                                        {% endif %}
-                                        
-                                        {% if session.get('role') == 'COMPANY' %}
-                                            {% if not inv.flagged %}
-                                                <form action="/flag_invite" method="POST" class="inline-block m-0">
-                                                    <input type="hidden" name="invite_id" value="{{ inv.id }}">
-                                                    <button class="bg-yellow-400 text-black px-3 py-1 rounded hover:bg-yellow-500 text-xs font-bold uppercase whitespace-nowrap" title="Покликати адміна для вирішення питань"><i class="fas fa-flag"></i> Покликати Адміна</button>
-                                                </form>
-                                            {% else %}
-                                                <span class="text-red-600 text-xs font-bold uppercase whitespace-nowrap"><i class="fas fa-flag"></i> Адмін сповіщений</span>
-                                            {% endif %}
-                                        {% endif %}
-                                    </div>
-                                </td>
-                            </tr>
-                            {% endfor %}
-                            {% if not invitations %}
-                            <tr><td colspan="5" class="p-8 text-center text-gray-400">У вас поки немає повідомлень.</td></tr>
-                            {% endif %}
-                        </tbody>
-                    </table>
-                </div>
-            </section>
-            {% endif %}
-
-            <!-- Вкладка: КОРИСТУВАЧІ (Admin Only) -->
-            {% if active_tab == 'users' and session.get('role') == 'ADMIN' %}
-            <section class="w-full max-w-[95%] mx-auto">
-                <h2 class="text-3xl font-black mb-8 uppercase flex items-center gap-3">
-                    <i class="fas fa-users text-purple-400"></i> Управління Користувачами
-                </h2>
-                <div class="bg-white text-black rounded-3xl shadow-2xl overflow-hidden">
-                    <div class="table-wrapper">
-                        <table class="w-full text-left text-sm min-w-max">
-                            <thead class="bg-gray-100 border-b-2 border-black">
-                                <tr>
-                                    <th class="p-4 font-black uppercase whitespace-nowrap">ID</th>
-                                    <th class="p-4 font-black uppercase whitespace-nowrap">Email</th>
-                                    <th class="p-4 font-black uppercase whitespace-nowrap">Посада / Роль</th>
-                                    <th class="p-4 font-black uppercase min-w-[150px]">Company Name</th>
-                                    <th class="p-4 font-black uppercase min-w-[200px]">ПІБ (Прізвище, Ім'я, По-батькові)</th>
-                                    <th class="p-4 font-black uppercase min-w-[150px]">Курс і Спеціальність</th>
-                                    <th class="p-4 font-black uppercase min-w-[250px]">Контактна інформація</th>
-                                    <th class="p-4 font-black uppercase whitespace-nowrap">Статус</th>
-                                    <th class="p-4 font-black uppercase whitespace-nowrap">Дії</th>
-                                </tr>
-                            </thead>
-                            <tbody class="divide-y divide-gray-200">
-                                {% for u in all_users %}
-                                <tr class="hover:bg-gray-50 transition {% if u.status == 'blocked' %}bg-red-50 opacity-75{% endif %}">
-                                    <td class="p-4 font-bold whitespace-nowrap">{{ u.id }}</td>
-                                    <td class="p-4 font-medium text-blue-700 whitespace-nowrap">{{ u.email or '-' }}</td>
-                                    
-                                    <td class="p-4 whitespace-nowrap">
-                                        {% if u.role == 'COMPANY' %}
-                                            <span class="bg-blue-100 text-blue-800 px-2 py-1 rounded text-xs font-bold">{{ u.position or 'Представник' }}</span>
-                                        {% elif u.role == 'ADMIN' %}
-                                            <span class="bg-purple-100 text-purple-800 px-2 py-1 rounded text-xs font-bold">Адміністратор</span>
-                                        {% else %}
-                                            <span class="text-gray-400 text-xs">-</span>
-                                        {% endif %}
-                                    </td>
-                                    
-                                    <td class="p-4 font-bold break-words whitespace-normal">
-                                        {% if u.role == 'COMPANY' %}{{ u.company_name or '-' }}{% else %}<span class="text-gray-400 text-xs">-</span>{% endif %}
-                                    </td>
-                                <td class="p-4 break-words whitespace-normal">
-                                    {% if u.role == 'STUDENT' %}
-                                        <b>{{ u.last_name }}</b> {{ u.first_name }} {{ u.patronymic }}
-                                    {% else %}<span class="text-gray-400 text-xs">-</span>{% endif %}
-                                </td>
-                                
-                                <td class="p-4 break-words whitespace-normal">
-                                    {% if u.role == 'STUDENT' %}
-                                        {% if u.course or u.specialty %}
-                                            <div class="font-bold whitespace-nowrap">{{ u.course or '?' }} курс</div>
-                                            <div class="text-xs text-red-600">{{ u.specialty or '-' }}</div>
-                                        {% else %}-{% endif %}
-                                    {% else %}<span class="text-gray-400 text-xs">-</span>{% endif %}
-                                </td>
-                                
-                                <td class="p-4 text-xs min-w-[250px] whitespace-normal break-words">
-                                    {{ u.contact_info or '-' }}
-                                </td>
-                                
-                                <td class="p-4 whitespace-nowrap">
-                                    {% if u.status == 'blocked' %}
-                                        <span class="bg-red-200 text-red-800 px-2 py-1 rounded text-xs font-black uppercase">Заблоковано</span>
-                                    {% else %}
-                                        <span class="bg-green-200 text-green-800 px-2 py-1 rounded text-xs font-black uppercase">Активний</span>
-                                    {% endif %}
-                                </td>
-                                
-                                <td class="p-4">
-                                    <div class="flex gap-2 items-center min-w-[200px]">
-                                        {% if u.id != session.get('user_id') %}
-                                            <form action="/admin/toggle_block" method="POST" class="inline-block m-0">
-                                                <input type="hidden" name="user_id" value="{{ u.id }}">
-                                                {% if u.status == 'blocked' %}
-                                                    <button class="bg-green-600 text-white px-3 py-2 rounded hover:bg-green-700 text-xs font-bold uppercase whitespace-nowrap" title="Розблокувати"><i class="fas fa-unlock mr-1"></i> Розблок.</button>
-                                                {% else %}
-                                                    <button class="bg-orange-500 text-white px-3 py-2 rounded hover:bg-orange-600 text-xs font-bold uppercase whitespace-nowrap" title="Заблокувати" onclick="return confirm('Заблокувати користувача?');"><i class="fas fa-ban mr-1"></i> Блок.</button>
-                                                {% endif %}
-                                            </form>
-                                            <form action="/admin/delete_user" method="POST" class="inline-block m-0" onsubmit="return confirm('ОБЕРЕЖНО! Видалити користувача та всі його дані назавжди?');">
-                                                <input type="hidden" name="user_id" value="{{ u.id }}">
-                                                <button class="bg-red-700 text-white px-3 py-2 rounded hover:bg-black text-xs font-bold uppercase whitespace-nowrap" title="Видалити"><i class="fas fa-trash mr-1"></i> Видалити</button>
-                                            </form>
-                                        {% else %}
-                                            <span class="text-gray-400 text-xs font-bold whitespace-nowrap">Це ви</span>
-                                        {% endif %}
-                                    </div>
-                                </td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </div>
-            </section>
-            {% endif %}
-
-            <!-- Вкладка: ПРОФІЛЬ (Profile) -->
-            {% if active_tab == 'profile' %}
-            <section class="max-w-4xl mx-auto">
-                <div class="bg-white text-black rounded-[2rem] p-8 md:p-12 shadow-2xl relative">
-                    
-                    {% if session.get('role') == 'ADMIN' %}
-                    <div class="absolute top-4 right-4 bg-yellow-300 px-3 py-1 rounded-lg text-xs font-bold uppercase">Admin Mode</div>
-                    {% endif %}
-
-                    <h2 class="text-3xl font-black mb-6 uppercase border-b pb-4 flex items-center justify-between">
-                        Редагування Профілю
-                        <span class="text-sm bg-black text-white px-3 py-1 rounded-full font-normal">{{ user_info.role }}</span>
-                    </h2>
-
-                    <form action="/update_profile" method="POST" class="space-y-6">
-                        <!-- Загальні поля -->
-                        <div class="grid md:grid-cols-2 gap-6 bg-gray-50 p-4 rounded-xl border">
-                            <div>
-                                <label class="label-text">Логін</label>
-                                <input type="text" value="{{ user_info.username }}" disabled class="w-full p-3 rounded-xl bg-gray-200 cursor-not-allowed font-mono">
-                            </div>
-                            <div>
-                                <label class="label-text">Email</label>
-                                <input type="email" name="email" value="{{ user_info.email }}" class="w-full p-3 rounded-xl bg-white font-bold border focus:border-red-500">
-                            </div>
-                        </div>
-
-                        {% if user_info.role == 'STUDENT' %}
-                        
-                        <!-- ПАНЕЛЬ АДМІНІСТРАТОРА (Редагування рейтингу) -->
-                        {% if session.get('role') == 'ADMIN' %}
-                        <div class="bg-yellow-50 p-4 rounded-xl border border-yellow-400 mb-6 shadow-inner">
-                            <label class="label-text text-yellow-800"><i class="fas fa-star text-yellow-500"></i> Рейтинг Студента (Тільки для Адміністратора)</label>
-                            <input type="number" name="rating" value="{{ profile_data.rating or 0 }}" class="w-full p-3 rounded-xl border-2 border-yellow-300 bg-white font-black text-xl" placeholder="Введіть бали рейтингу...">
-                        </div>
-                        {% endif %}
-
-                        <div class="space-y-4">
-                            <!-- ПІБ -->
-                            <div class="grid md:grid-cols-3 gap-4">
-                                <div>
-                                    <label class="label-text">Прізвище</label>
-                                    <input type="text" name="last_name" value="{{ profile_data.last_name or '' }}" class="w-full p-3 rounded-xl border">
-                                </div>
-                                <div>
-                                    <label class="label-text">Ім'я</label>
-                                    <input type="text" name="first_name" value="{{ profile_data.first_name or '' }}" class="w-full p-3 rounded-xl border">
-                                </div>
-                                <div>
-                                    <label class="label-text">По батькові</label>
-                                    <input type="text" name="patronymic" value="{{ profile_data.patronymic or '' }}" class="w-full p-3 rounded-xl border">
-                                </div>
-                            </div>
-                            
-                            <!-- Навчання -->
-                            <div class="grid md:grid-cols-2 gap-4">
-                                <div>
-                                    <label class="label-text">Курс</label>
-                                    <input type="number" name="course" value="{{ profile_data.course or '' }}" class="w-full p-3 rounded-xl border" placeholder="1-6">
-                                </div>
-                                <div>
-                                    <label class="label-text">Спеціальність</label>
-                                    <input type="text" name="specialty" value="{{ profile_data.specialty or '' }}" class="w-full p-3 rounded-xl border" placeholder="Наприклад: Інженерія ПЗ">
-                                </div>
-                            </div>
-
-                            <div class="grid md:grid-cols-[auto_1fr] gap-4 items-start pt-2">
-                                <img src="{{ profile_data.avatar }}" class="w-20 h-20 rounded-full border bg-gray-100 object-cover">
-                                <div>
-                                    <label class="label-text">Посилання на фото (Аватар)</label>
-                                    <input type="text" name="avatar" value="{{ profile_data.avatar or '' }}" class="w-full p-3 rounded-xl border" placeholder="https://...">
-                                </div>
-                            </div>
-                            
-                            <label class="label-text">Навички (через кому)</label>
-                            <textarea name="skills" class="w-full p-3 rounded-xl border h-20" placeholder="Python, SQL, Figma...">{{ profile_data.skills or '' }}</textarea>
-                            
-                            <hr class="my-4">
-                            <h3 class="font-black text-red-700 uppercase mb-2">Контакти та Зв'язок</h3>
-
-                            <div>
-                                <label class="label-text">Контактна інформація (Телефон, Telegram тощо)</label>
-                                <input type="text" name="contact_info" value="{{ profile_data.contact_info or '' }}" class="w-full p-3 rounded-xl border" placeholder="+380... або @username">
-                            </div>
-                            
-                            <div>
-                                <label class="label-text">Link (GitHub, LinkedIn, Портфоліо)</label>
-                                <input type="text" name="links" value="{{ profile_data.links or '' }}" class="w-full p-3 rounded-xl border" placeholder="https://github.com/...">
-                                <p class="text-xs text-gray-500 mt-1">Додайте посилання через кому, вони перетворяться на зручні іконки.</p>
-                            </div>
-                        </div>
-                        
-                        {% elif user_info.role == 'COMPANY' %}
-                        <div class="space-y-4">
-                            <div>
-                                <label class="label-text text-blue-800">Назва Компанії</label>
-                                <input type="text" name="company_name" value="{{ profile_data.company_name or '' }}" class="w-full p-3 rounded-xl border-2 border-blue-100 font-bold text-lg" placeholder="Назва вашої фірми">
-                            </div>
-
-                            <div>
-                                <label class="label-text text-blue-800">Ваша Посада (Company Role)</label>
-                                <input type="text" name="position" value="{{ profile_data.position or '' }}" class="w-full p-3 rounded-xl border-2 border-blue-100 font-bold" placeholder="HR, Менеджер, Рекрутер, CEO...">
-                            </div>
-
-                            <div class="grid md:grid-cols-[auto_1fr] gap-4 items-start bg-blue-50 p-4 rounded-xl">
-                                <img src="{{ profile_data.avatar }}" class="w-24 h-24 rounded-lg border bg-white object-contain">
-                                <div class="w-full">
-                                    <label class="label-text text-blue-800">Логотип Компанії (URL)</label>
-                                    <input type="text" name="avatar" value="{{ profile_data.avatar or '' }}" class="w-full p-3 rounded-xl border" placeholder="Вставте посилання на картинку логотипу...">
-                                </div>
-                            </div>
-                            
-                            <div>
-                                <label class="label-text text-blue-800">Контактна інформація</label>
-                                <input type="text" name="contact_info" value="{{ profile_data.contact_info or '' }}" class="w-full p-3 rounded-xl border-2 border-blue-100" placeholder="Телефон, адреса офісу, або Telegram рекрутера...">
-                            </div>
-
-                            <div>
-                                <label class="label-text text-blue-800">Опис Компанії / Вакансії</label>
-                                <textarea name="description" class="w-full p-3 rounded-xl border h-32" placeholder="Опишіть, чим займається ваша компанія і кого ви шукаєте...">{{ profile_data.description or '' }}</textarea>
-                            </div>
-                        </div>
-                        {% endif %}
-
-                        <button type="submit" class="w-full bg-black text-white py-4 rounded-xl font-black uppercase tracking-widest hover:bg-red-700 transition transform hover:-translate-y-1 shadow-xl">
-                            Зберегти Профіль
-                        </button>
-                    </form>
-
-                    {% if session.get('role') == 'ADMIN' %}
-                    <div class="mt-12 pt-8 border-t-2 border-dashed border-gray-300">
-                        <h3 class="font-bold mb-4">Адмін: Редагувати іншого користувача</h3>
-                        <form action="/admin/select_user" method="POST" class="flex gap-2">
-                            <input type="number" name="target_user_id" placeholder="ID" class="p-3 rounded-xl border-2 border-black w-24 text-center">
-                            <button class="bg-yellow-400 text-black px-6 rounded-xl font-bold uppercase hover:bg-yellow-500">Вибрати</button>
-                        </form>
-                    </div>
-                    {% endif %}
-                </div>
-            </section>
-            {% endif %}
-
-        </div>
-        {% endif %}
-
-    </main>
-
-    <!-- МОДАЛКИ (Login/Register/View) -->
-    <div id="login-modal" class="hidden fixed inset-0 modal-bg z-[100] flex items-center justify-center p-4">
-        <div class="bg-white text-black p-8 rounded-3xl w-full max-w-sm relative shadow-2xl">
-            <button onclick="toggleModal('login-modal')" class="absolute top-4 right-4 text-2xl font-bold hover:text-red-600">&times;</button>
-            <h2 class="text-3xl font-black mb-6 text-center uppercase">Вхід</h2>
-            <form action="/login" method="POST" class="space-y-4">
-                <input type="text" name="username" placeholder="Логін" required class="w-full p-3 rounded-xl font-bold bg-gray-100 border focus:border-black">
-                <input type="password" name="password" placeholder="Пароль" required class="w-full p-3 rounded-xl font-bold bg-gray-100 border focus:border-black">
-                <button class="w-full bg-black text-white py-3 rounded-xl font-black uppercase hover:bg-red-700 transition">Увійти</button>
-            </form>
-        </div>
-    </div>
-
-    <div id="register-modal" class="hidden fixed inset-0 modal-bg z-[100] flex items-center justify-center p-4">
-        <div class="bg-white text-black p-8 rounded-3xl w-full max-w-md relative shadow-2xl max-h-[90vh] overflow-y-auto">
-            <button onclick="toggleModal('register-modal')" class="absolute top-4 right-4 text-2xl font-bold hover:text-red-600">&times;</button>
-            <h2 class="text-3xl font-black mb-6 text-center uppercase">Реєстрація</h2>
-            <form action="/register" method="POST" class="space-y-4">
-                <label class="block font-bold mb-1 ml-1 text-gray-500 text-xs uppercase">Оберіть Роль</label>
-                <select name="role" class="w-full p-3 rounded-xl font-bold bg-gray-100 mb-4 border-2 border-black cursor-pointer hover:bg-gray-200 transition">
-                    <option value="STUDENT">👨‍🎓 Студент (Шукаю роботу)</option>
-                    <option value="COMPANY">🏢 Компанія (Шукаю людей)</option>
-                </select>
-                <input type="text" name="username" placeholder="Логін" required class="w-full p-3 rounded-xl font-bold bg-gray-100 border">
-                <input type="email" name="email" placeholder="Email" required class="w-full p-3 rounded-xl font-bold bg-gray-100 border">
-                <input type="password" name="password" placeholder="Пароль" required class="w-full p-3 rounded-xl font-bold bg-gray-100 border">
-                <button class="w-full bg-red-700 text-white py-3 rounded-xl font-black uppercase hover:bg-black transition">Створити акаунт</button>
-            </form>
-        </div>
-    </div>
-
-    <!-- Запрошення -->
-    <div id="invite-modal" class="hidden fixed inset-0 modal-bg z-[100] flex items-center justify-center p-4">
-        <div class="bg-white text-black p-8 rounded-3xl w-full max-w-md relative shadow-2xl">
-            <button onclick="toggleModal('invite-modal')" class="absolute top-4 right-4 text-2xl font-bold">&times;</button>
-            <h2 class="text-2xl font-black mb-2 uppercase text-red-700">Найняти Студента</h2>
-            <p id="invite-student-name" class="text-xl font-bold mb-6">...</p>
-            <form action="/send_invite" method="POST" class="space-y-4">
-                <input type="hidden" name="student_id" id="invite-student-id">
-                <textarea name="message" placeholder="Напишіть коротке повідомлення: яку вакансію пропонуєте, умови, контакти..." required class="w-full p-4 rounded-xl bg-gray-100 h-32 border focus:border-black"></textarea>
-                <button class="w-full bg-green-600 text-white py-3 rounded-xl font-black uppercase hover:bg-green-700 transition">Надіслати Запрошення</button>
-            </form>
-        </div>
-    </div>
-
-    <!-- Перегляд студента -->
-    <div id="student-view-modal" class="hidden fixed inset-0 modal-bg z-[100] flex items-center justify-center p-4">
-        <div class="bg-white text-black p-0 rounded-3xl w-full max-w-lg relative shadow-2xl overflow-hidden">
-            <div class="h-28 bg-gradient-to-r from-red-900 to-black w-full relative">
-                <button onclick="toggleModal('student-view-modal')" class="absolute top-4 right-4 text-white text-2xl font-bold hover:scale-110 transition">&times;</button>
-            </div>
-            <div class="px-8 pb-8 text-center -mt-14">
-                <img id="sv-avatar" src="" class="w-28 h-28 rounded-full border-4 border-white shadow-lg mx-auto bg-gray-200 object-cover">
-                <h2 id="sv-name" class="text-3xl font-black uppercase mt-4 tracking-tight"></h2>
-                <p id="sv-spec" class="text-red-600 font-bold mb-6 text-lg"></p>
-                
-                <div class="text-left bg-gray-50 p-6 rounded-2xl space-y-4 text-sm border">
-                    <div>
-                        <span class="block text-xs font-bold uppercase text-gray-400 mb-1">Навички</span>
-                        <p id="sv-skills" class="font-medium bg-white p-2 rounded border"></p>
-                    </div>
-                    
-                    <div>
-                        <span class="block text-xs font-bold uppercase text-gray-400 mb-1">Контактна інформація</span>
-                        <p id="sv-contact-info" class="font-bold text-gray-800 bg-white p-2 rounded border truncate"></p>
-                    </div>
-
-                    <div class="grid grid-cols-2 gap-4">
-                        <div>
-                            <span class="block text-xs font-bold uppercase text-gray-400 mb-1">Link (Мережі)</span>
-                            <p id="sv-links" class="text-blue-600 flex gap-3 flex-wrap mt-1"></p>
-                        </div>
-                        <div>
-                            <span class="block text-xs font-bold uppercase text-gray-400 mb-1">Email</span>
-                            <p id="sv-email" class="text-gray-800 font-bold truncate mt-1"></p>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        function toggleModal(id) {
-            document.getElementById(id).classList.toggle('hidden');
-        }
-        
-        function openInviteModal(id, name) {
-            document.getElementById('invite-student-id').value = id;
-            document.getElementById('invite-student-name').innerText = name;
-            toggleModal('invite-modal');
-        }
-
-        function openStudentProfile(userId) {
-            fetch('/api/student/' + userId)
-                .then(r => r.json())
-                .then(data => {
-                    if(data.error) return alert(data.error);
-                    document.getElementById('sv-avatar').src = data.avatar || '';
-                    
-                    let fullName = [data.last_name, data.first_name, data.patronymic].filter(Boolean).join(' ');
-                    document.getElementById('sv-name').innerText = fullName || 'Студент';
-                    
-                    let specText = [];
-                    if(data.course) specText.push(data.course + ' курс');
-                    if(data.specialty) specText.push(data.specialty);
-                    document.getElementById('sv-spec').innerText = specText.join(', ') || 'Студент';
-                    
-                    document.getElementById('sv-skills').innerText = data.skills || '-';
-                    document.getElementById('sv-contact-info').innerText = data.contact_info || '-';
-                    
-                    // Обробка посилань у клікабельні іконки
-                    let linksHtml = '';
-                    if (data.links && data.links.trim() !== '') {
-                        let urls = data.links.split(',').map(l => l.trim());
-                        urls.forEach(url => {
-                            if (!url) return;
-                            let href = url.startsWith('http') ? url : 'https://' + url;
-                            let iconClass = 'fas fa-link';
-                            if (url.toLowerCase().includes('github')) iconClass = 'fab fa-github';
-                            if (url.toLowerCase().includes('linkedin')) iconClass = 'fab fa-linkedin';
-                            linksHtml += `<a href="${href}" target="_blank" class="text-2xl hover:text-red-600 transition" title="${url}"><i class="${iconClass}"></i></a>`;
-                        });
-                    } else {
-                        linksHtml = '-';
-                    }
-                    document.getElementById('sv-links').innerHTML = linksHtml;
-                    
-                    document.getElementById('sv-email').innerText = data.email || '';
-                    toggleModal('student-view-modal');
-                });
-        }
-    </script>
-    <style>
-        .label-text { display: block; font-weight: bold; font-size: 0.75rem; text-transform: uppercase; color: #6b7280; margin-bottom: 0.25rem; }
-    </style>
-</body>
-</html>
-"""
+        return migrations.migrate(get_db())
+
+def prepare(app):
+    """Міграції й компіляція шаблонів — один раз: у майстрі перед fork (wsgi.py) або на першому запиті."""
+    applied = init_db(app)
+    precompile_templates(app)
+    app.extensions['ukd'].schema_ready = True
+    return applied
+
+@bp.before_app_request
+def ensure_schema():
+    if not services.schema_ready:
+        prepare(current_app._get_current_object())
+    if services.workers_pid != os.getpid():
+        services.start_workers()
+
+@bp.cli.command('migrate')
+@click.option('--status', is_flag=True, help='Лише показати стан міграцій.')
+def migrate_command(status):
+    """Застосувати міграції схеми БД."""
+    db = get_db()
+    if not status:
+        for version, name in migrations.migrate(db):
+            click.echo(f"applied  {version:03d} {name}")
+    applied, pending = migrations.migration_status(db)
+    for version, name in applied:
+        click.echo(f"[x] {version:03d} {name}")
+    for version, name in pending:
+        click.echo(f"[ ] {version:03d} {name}")
+
+@bp.cli.command('check-query-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Показати план кожного запиту.')
+def check_query_plans_command(verbose):
+    """Перевірити, що гарячі запити не роблять повний прохід по таблицях."""
+    results = query_plans.check([os.path.abspath(__file__)])
+    failures = [r for r in results if r[3]]
+    for origin, sql, plan, hot in results:
+        if verbose or hot:
+            click.echo(f"{'FAIL' if hot else 'ok'} {origin}: {sql[:120]}")
+            for detail in plan:
+                click.echo(f"    {detail}")
+    click.echo(f"{len(results)} statements checked, {len(failures)} with full scans")
+    if failures:
+        raise SystemExit(1)
+
+@bp.cli.command('repair-invite-counters')
+def repair_invite_counters_command():
+    """Перерахувати лічильники запрошень (студентів і підсумки по статусах) з нуля."""
+    db = get_db()
+    updated = invites.repair_counters(db)
+    statuses = invites.repair_totals(db)
+    db.commit()
+    click.echo(f"{updated} students recounted, {statuses} status totals rebuilt")
+
+def after_bulk_import(db, report):
+    """Після імпорту студентів: кеш фасетів застарів, а рушій підбору простіше перебудувати."""
+    if report['kind'] == 'students' and report['imported']:
+        services.ranking_version.bump()
+        if services.matcher.built_at is not None:
+            services.matcher.refresh()
+
+@bp.cli.command('import-csv')
+@click.argument('kind', type=click.Choice(sorted(bulk_import.KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=bulk_import.CHUNK_SIZE, show_default=True, help="Рядків на одну транзакцію.")
+def import_csv_command(kind, path, chunk_size):
+    """Масово імпортувати студентів або компанії з CSV-файлу."""
+    init_db(current_app._get_current_object())
+    db = get_db()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            report = bulk_import.import_csv(db, f, kind, chunk_size)
+        except bulk_import.InvalidImport as e:
+            raise click.ClickException(str(e))
+    after_bulk_import(db, report)
+    for line, reason in report['rejected']:
+        click.echo(f"line {line}: {reason}", err=True)
+    click.echo(f"{report['imported']} {kind} imported in {report['chunks']} chunks, {len(report['rejected'])} rows rejected")
+
+@bp.cli.command('mail-worker')
+@click.option('--once', is_flag=True, help="Розвантажити чергу один раз і вийти.")
+@click.option('--interval', default=5.0, show_default=True, help="Пауза між перевірками черги, с.")
+def mail_worker_command(once, interval):
+    """Надсилати листи з outbox в окремому процесі."""
+    sender = mail_service.sender_from_env()
+    if sender is None:
+        raise click.UsageError("UKD_MAIL_SENDER is not set (smtp, file or console)")
+    # Щоб ConsoleSender і помилки воркера було видно в терміналі
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s: %(message)s')
+    init_db(current_app._get_current_object())
+    worker = mail_service.OutboxWorker(services.pool(), sender, interval=interval)
+    if once:
+        click.echo(f"{worker.drain()} messages processed: {worker.stats}")
+        return
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        click.echo(f"stopped: {worker.stats}")
+
+@bp.cli.command('recompute-ratings')
+def recompute_ratings_command():
+    """Повністю перерахувати автоматичний рейтинг студентів (для cron)."""
+    db = get_db()
+    changed = rating_engine.recompute_all(db)
+    db.commit()
+    click.echo(f"{changed} ratings changed")
+
+# --- HTML ШАБЛОНИ ---
+
+def precompile_templates(app):
+    """Завантажує (і компілює) всі шаблони наперед, щоб перший запит не платив за це."""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+@bp.cli.command('precompile-templates')
+def precompile_templates_command():
+    """Скомпілювати всі шаблони (і заповнити bytecode-кеш, якщо він увімкнений)."""
+    for name in precompile_templates(current_app):
+        click.echo(name)
 
 # --- МАРШРУТИЗАЦІЯ ---
 
-@app.route('/')
+def template_version(app):
+    """Хеш усіх шаблонів — версія застосунку, якщо UKD_APP_VERSION не задано явно."""
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(app.jinja_loader.searchpath[0])):
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(name.encode() + f.read())
+    return digest.hexdigest()[:12]
+
+def landing_page():
+    # Flash-повідомлення (напр. "Невірні дані для входу") робить сторінку унікальною
+    if session.get('_flashes'):
+        return render_template('landing.html', active_tab='landing')
+    version = services.app_version
+    html = services.landing_cache.get(version)
+    if html is None:
+        html = services.landing_cache[version] = render_template('landing.html', active_tab='landing')
+    response = make_response(html)
+    response.set_etag(f"landing-{version}")
+    return response.make_conditional(request)
+
+@bp.route('/')
 def index():
-    init_db() 
     active_tab = request.args.get('tab', 'home') # Змінено вкладку за замовчуванням на 'home'
-    db = get_db()
     
     if 'user_id' not in session:
-        return render_template_string(HTML_TEMPLATE, active_tab='landing')
-
-    # Отримання параметрів фільтрації для Ranking
-    search_query = request.args.get('search', '').strip()
-    course_filter = request.args.get('course', '').strip()
-    specialty_filter = request.args.get('specialty', '').strip()
-    sort_order = request.args.get('sort', 'desc') # за замовчуванням рейтинг по спаданню (топ найкращих)
-
-    # Зберігаємо поточні фільтри для підстановки в HTML шаблоні
-    current_filters = {
-        'search': search_query,
-        'course': course_filter,
-        'specialty': specialty_filter,
-        'sort': sort_order
-    }
-
-    # Підготовка списків для dropdown-меню (витягуємо унікальні курси та спеціальності)
+        return landing_page()
+
+    db = get_db()
+
+    # Отримання параметрів фільтрації для Ranking (зберігаються для підстановки в HTML шаблоні)
+    current_filters = ranking.normalize_filters(request.args)
+
+    # Списки для dropdown-меню (унікальні курси та спеціальності з кількістю студентів) — з кешу
     unique_courses = []
     unique_specialties = []
-    
+
     if active_tab == 'ranking':
-        c_cur = db.execute("SELECT DISTINCT course FROM students WHERE course IS NOT NULL AND course != '' ORDER BY course")
-        unique_courses = [r['course'] for r in c_cur.fetchall()]
-        
-        s_cur = db.execute("SELECT DISTINCT specialty FROM students WHERE specialty IS NOT NULL AND specialty != '' ORDER BY specialty")
-        unique_specialties = [r['specialty'] for r in s_cur.fetchall()]
+        facets = ranking_facets()
+        unique_courses = facets['courses']
+        unique_specialties = facets['specialties']
 
-    # Формування запиту з фільтрами (Ranking)
+    # Формування запиту з фільтрами (Ranking), одна сторінка за раз
     students = []
+    next_cursor = None
     if active_tab == 'ranking':
-        base_query = "SELECT s.*, u.email FROM students s JOIN users u ON s.user_id = u.id WHERE u.status != 'blocked'"
-        params = []
-        
-        if search_query:
-            base_query += " AND (s.first_name LIKE ? OR s.last_name LIKE ? OR s.skills LIKE ? OR s.specialty LIKE ?)"
-            like_search = f"%{search_query}%"
-            params.extend([like_search, like_search, like_search, like_search])
-            
-        if course_filter:
-            base_query += " AND s.course = ?"
-            params.append(course_filter)
-            
-        if specialty_filter:
-            base_query += " AND s.specialty = ?"
-            params.append(specialty_filter)
-            
-        if sort_order == 'asc':
-            base_query += " ORDER BY s.rating ASC"
-        else:
-            base_query += " ORDER BY s.rating DESC"
-
-        cur = db.execute(base_query, params)
-        students = [dict(row) for row in cur.fetchall()]
+        try:
+            students, next_cursor = ranking_page(current_filters, request.args.get('cursor'))
+        except ranking.InvalidCursor:
+            return redirect('/?tab=ranking')
 
-    # Users Table for Admin
+    # Users Table for Admin — лише сторінками з фільтрами; увесь список — через експорт CSV/NDJSON
+    # (HTML-таблиця всіх користувачів рендерилася секундами й тримала з'єднання з пулу)
     all_users = []
+    users_next_cursor = None
+    user_filters = admin_panel.user_filters(request.args)
     if active_tab == 'users' and session.get('role') == 'ADMIN':
-        query = """
-            SELECT u.id, u.username, u.email, u.role, u.status,
-                   s.first_name, s.last_name, s.patronymic, s.course, s.specialty, s.skills, s.links,
-                   c.company_name, c.description, c.position,
-                   COALESCE(s.contact_info, c.contact_info) as contact_info
-            FROM users u
-            LEFT JOIN students s ON u.id = s.user_id
-            LEFT JOIN companies c ON u.id = c.user_id
-            ORDER BY u.id DESC
-        """
-        all_users = [dict(row) for row in db.execute(query).fetchall()]
+        try:
+            all_users, users_next_cursor = admin_panel.fetch_users_page(db, user_filters, request.args.get('cursor'))
+        except ranking.InvalidCursor:
+            return redirect('/?tab=users')
 
     # Profile Data
     user_info = {}
     profile_data = {}
-    if 'user_id' in session:
+    if active_tab == 'profile':
         target_id = session.get('edit_target_id', session['user_id'])
         cur = db.execute("SELECT * FROM users WHERE id = ?", (target_id,))
         user_info = dict(cur.fetchone() or {})
@@ -997,23 +402,25 @@ def index():
     # Invitations
     invitations = []
     pending_count = 0
-    
-    if session.get('role') == 'STUDENT':
-        count_res = db.execute("SELECT COUNT(*) as c FROM invitations i JOIN students s ON i.student_id = s.id WHERE s.user_id = ? AND i.status='pending'", (session['user_id'],)).fetchone()
-        pending_count = count_res['c']
+    unread_count = 0
+
+    invite_filters = admin_panel.invitation_filters(request.args)
+    invites_next_cursor = None
+    invite_totals = {}
+    companies = []
+    slow_query_groups = []
 
     if active_tab == 'invitations':
         if session.get('role') == 'ADMIN':
-            query = """
-                SELECT i.*, s.first_name, s.last_name, 
-                       c.company_name, c.avatar as company_avatar
-                FROM invitations i
-                LEFT JOIN students s ON i.student_id = s.id
-                LEFT JOIN companies c ON i.company_id = c.id
-                ORDER BY i.created_at DESC
-            """
-            invitations = [dict(row) for row in db.execute(query).fetchall()]
-            
+            # Сторінка з фільтрами замість усієї історії; підсумки — з лічильників
+            try:
+                invitations, invites_next_cursor = admin_panel.fetch_invitations_page(
+                    db, invite_filters, request.args.get('cursor'))
+            except ranking.InvalidCursor:
+                return redirect('/?tab=invitations')
+            invite_totals = invites.status_totals(db)
+            companies = admin_panel.company_choices(db)
+
         elif session.get('role') == 'COMPANY':
             query = """
                 SELECT i.*, s.first_name, s.last_name
@@ -1034,41 +441,72 @@ def index():
                 ORDER BY i.created_at DESC
             """
             invitations = [dict(row) for row in db.execute(query, (session['user_id'],)).fetchall()]
+            # Студент побачив список — нові запрошення більше не "непрочитані"
+            if any(not inv['is_read'] for inv in invitations):
+                student_user_id = session['user_id']
+                run_write(lambda write_db: invites.mark_read(write_db, student_user_id))
+
+    # Повільні запити, згруповані за відбитком (Admin Only)
+    if active_tab == 'slow_queries' and session.get('role') == 'ADMIN':
+        slow_query_groups = services.slow_query_log.groups(request.args.get('sort'))
 
-    return render_template_string(HTML_TEMPLATE, 
-                                  active_tab=active_tab, 
-                                  students=students, 
-                                  all_users=all_users,
-                                  user_info=user_info, 
-                                  profile_data=profile_data,
-                                  invitations=invitations,
-                                  pending_count=pending_count,
-                                  current_filters=current_filters,
-                                  unique_courses=unique_courses,
-                                  unique_specialties=unique_specialties)
+    # Бейдж у навігації береться з підтримуваного лічильника, а не з COUNT(*)
+    if session.get('role') == 'STUDENT':
+        pending_count, unread_count = invites.badge_counts(db, session['user_id'])
+
+    return render_template(TAB_TEMPLATES.get(active_tab, 'tab_base.html'),
+                           active_tab=active_tab,
+                           students=students,
+                           all_users=all_users,
+                           users_next_cursor=users_next_cursor,
+                           user_filters=user_filters,
+                           user_info=user_info,
+                           profile_data=profile_data,
+                           invitations=invitations,
+                           invite_filters=invite_filters,
+                           invites_next_cursor=invites_next_cursor,
+                           invite_totals=invite_totals,
+                           companies=companies,
+                           slow_query_groups=slow_query_groups,
+                           slow_query_threshold=services.slow_query_log.threshold_ms,
+                           profiling_enabled=services.profiling,
+                           pending_count=pending_count,
+                           unread_count=unread_count,
+                           current_filters=current_filters,
+                           next_cursor=next_cursor,
+                           unique_courses=unique_courses,
+                           unique_specialties=unique_specialties)
 
 # --- АВТОРИЗАЦІЯ ---
 
-@app.route('/register', methods=['POST'])
+@bp.route('/register', methods=['POST'])
 def register():
     role = request.form.get('role')
     username = request.form.get('username')
     email = request.form.get('email')
     password = request.form.get('password')
-    
-    db = get_db()
-    try:
+
+    def write(db):
         cur = db.cursor()
         cur.execute("INSERT INTO users (username, password, email, role) VALUES (?, ?, ?, ?)", 
                     (username, password, email, role))
         user_id = cur.lastrowid
-        
+        student_id = None
+
         if role == 'STUDENT':
-            cur.execute("INSERT INTO students (user_id, first_name, last_name) VALUES (?, ?, ?)", (user_id, username, 'Student'))
+            cur.execute("INSERT INTO students (user_id, first_name, last_name, profile_updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                        (user_id, username, 'Student'))
+            student_id = cur.lastrowid
+            rating_engine.recompute(db, [student_id])
         elif role == 'COMPANY':
             cur.execute("INSERT INTO companies (user_id, company_name) VALUES (?, ?)", (user_id, username))
-            
-        db.commit()
+        return user_id, student_id
+
+    try:
+        user_id, matcher_student_id = run_write(write)
+        if role == 'STUDENT':
+            services.ranking_version.bump()
+            services.matcher.update_student(get_db(), matcher_student_id)
         session['user_id'] = user_id
         session['role'] = role
         session['username'] = username
@@ -1078,7 +516,7 @@ def register():
         
     return redirect('/')
 
-@app.route('/login', methods=['POST'])
+@bp.route('/login', methods=['POST'])
 def login():
     username = request.form.get('username')
     password = request.form.get('password')
@@ -1099,14 +537,14 @@ def login():
         
     return redirect('/')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
     return redirect('/')
 
 # --- ЛОГІКА ---
 
-@app.route('/update_profile', methods=['POST'])
+@bp.route('/update_profile', methods=['POST'])
 def update_profile():
     if 'user_id' not in session: return redirect('/')
     
@@ -1115,50 +553,66 @@ def update_profile():
     if target_id != session['user_id'] and session['role'] != 'ADMIN':
         return "Access Denied", 403
 
-    db = get_db()
-    role = db.execute("SELECT role FROM users WHERE id = ?", (target_id,)).fetchone()['role']
-    
-    db.execute("UPDATE users SET email = ? WHERE id = ?", (request.form.get('email'), target_id))
-    
-    if role == 'STUDENT':
-        # Якщо ми під адміном, отримуємо переданий рейтинг (якщо ні - лишаємо старий)
-        rating_val = request.form.get('rating')
-        if session.get('role') == 'ADMIN' and rating_val is not None:
-            db.execute("UPDATE students SET rating=? WHERE user_id=?", (int(rating_val), target_id))
+    # Запис виконується поза контекстом запиту — форму й роль беремо заздалегідь
+    form = request.form
+    is_admin = session.get('role') == 'ADMIN'
 
-        db.execute("""
-            UPDATE students SET first_name=?, last_name=?, patronymic=?, course=?, specialty=?, skills=?, links=?, contact_info=?, avatar=?
-            WHERE user_id=?
-        """, (
-            request.form.get('first_name'),
-            request.form.get('last_name'),
-            request.form.get('patronymic'),
-            request.form.get('course'),
-            request.form.get('specialty'),
-            request.form.get('skills'),
-            request.form.get('links'),
-            request.form.get('contact_info'),
-            request.form.get('avatar'),
-            target_id
-        ))
-    elif role == 'COMPANY':
-        db.execute("""
-            UPDATE companies SET company_name=?, description=?, avatar=?, position=?, contact_info=?
-            WHERE user_id=?
-        """, (
-            request.form.get('company_name'),
-            request.form.get('description'),
-            request.form.get('avatar'),
-            request.form.get('position'),
-            request.form.get('contact_info'),
-            target_id
-        ))
-    
-    db.commit()
+    def write(db):
+        role = db.execute("SELECT role FROM users WHERE id = ?", (target_id,)).fetchone()['role']
+
+        db.execute("UPDATE users SET email = ? WHERE id = ?", (form.get('email'), target_id))
+
+        student_id = None
+        if role == 'STUDENT':
+            db.execute("""
+                UPDATE students SET first_name=?, last_name=?, patronymic=?, course=?, specialty=?, skills=?, links=?, contact_info=?, avatar=?,
+                                    profile_updated_at=CURRENT_TIMESTAMP
+                WHERE user_id=?
+            """, (
+                form.get('first_name'),
+                form.get('last_name'),
+                form.get('patronymic'),
+                form.get('course'),
+                form.get('specialty'),
+                form.get('skills'),
+                form.get('links'),
+                form.get('contact_info'),
+                form.get('avatar'),
+                target_id
+            ))
+            student = db.execute("SELECT id, rating FROM students WHERE user_id = ?", (target_id,)).fetchone()
+            student_id = student['id']
+            skills.sync_student_skills(db, student_id, form.get('skills'))
+            rating_engine.recompute(db, [student_id])
+
+            # Рейтинг рахується автоматично; якщо адмін змінив число у формі — це ручна поправка,
+            # яка лишається в силі й надалі (rating_bonus = бажаний рейтинг - обчислені бали)
+            rating_val = form.get('rating')
+            if is_admin and rating_val not in (None, '') and int(rating_val) != student['rating']:
+                db.execute("UPDATE students SET rating_bonus = ? - (rating - rating_bonus), rating = ? WHERE id = ?",
+                           (int(rating_val), int(rating_val), student_id))
+        elif role == 'COMPANY':
+            db.execute("""
+                UPDATE companies SET company_name=?, description=?, avatar=?, position=?, contact_info=?
+                WHERE user_id=?
+            """, (
+                form.get('company_name'),
+                form.get('description'),
+                form.get('avatar'),
+                form.get('position'),
+                form.get('contact_info'),
+                target_id
+            ))
+        return student_id
+
+    student_id = run_write(write)
+    services.ranking_version.bump()
+    if student_id is not None:
+        services.matcher.update_student(get_db(), student_id)
     flash("Профіль успішно оновлено!")
     return redirect('/?tab=profile')
 
-@app.route('/admin/select_user', methods=['POST'])
+@bp.route('/admin/select_user', methods=['POST'])
 def admin_select_user():
     if session.get('role') != 'ADMIN': return redirect('/')
     try:
@@ -1169,27 +623,116 @@ def admin_select_user():
         flash("Невірний ID")
     return redirect('/?tab=profile')
 
-@app.route('/send_invite', methods=['POST'])
+@bp.route('/send_invite', methods=['POST'])
 def send_invite():
     if 'user_id' not in session: return redirect('/')
     
-    db = get_db()
+    company_user_id = session['user_id']
     student_record_id = request.form.get('student_id') 
     message = request.form.get('message')
-    
-    comp_row = db.execute("SELECT id FROM companies WHERE user_id = ?", (session['user_id'],)).fetchone()
-    comp_id = comp_row['id'] if comp_row else None
-    
-    db.execute("""
-        INSERT INTO invitations (student_id, company_id, user_id, message, status)
-        VALUES (?, ?, ?, ?, 'pending')
-    """, (student_record_id, comp_id, session['user_id'], message))
-    
-    db.commit()
+
+    def write(db):
+        # Студента могли видалити (або id підроблено): з foreign_keys=ON INSERT упав би з IntegrityError
+        if not db.execute("SELECT 1 FROM students WHERE id = ?", (student_record_id,)).fetchone():
+            return None
+        comp_row = db.execute("SELECT id FROM companies WHERE user_id = ?", (company_user_id,)).fetchone()
+        comp_id = comp_row['id'] if comp_row else None
+
+        db.execute("""
+            INSERT INTO invitations (student_id, company_id, user_id, message, status)
+            VALUES (?, ?, ?, ?, 'pending')
+        """, (student_record_id, comp_id, company_user_id, message))
+        mail_service.notify_invited(db, comp_id, [student_record_id], message)
+        return rating_engine.recompute(db, [student_record_id])
+
+    changed = run_write(write)
+    if changed is None:
+        flash("Помилка: студента не знайдено.")
+        return redirect('/?tab=ranking')
+    if changed:
+        services.ranking_version.bump()
+    services.wake_mail_worker()
     flash("Запрошення надіслано!")
     return redirect('/?tab=ranking')
 
-@app.route('/respond_invite', methods=['POST'])
+@bp.route('/api/invites/bulk', methods=['POST'])
+def bulk_invite_api():
+    role = session.get('role')
+    if role not in ['COMPANY', 'ADMIN']: return {"error": "Access Denied"}, 403
+
+    # JSON ({"student_ids": [...], "message": "..."}) від сторінки або звичайна форма
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        raw_ids, message = data.get('student_ids'), data.get('message')
+    else:
+        raw_ids, message = request.form.getlist('student_ids'), request.form.get('message')
+    message = (message or '').strip()
+    if isinstance(raw_ids, (str, int)):
+        raw_ids = [raw_ids]
+    student_ids, invalid = invites.parse_student_ids(raw_ids)
+    if not message:
+        return {"error": "Message is required"}, 400
+    if not student_ids:
+        return {"error": "No students selected", "invalid": invalid}, 400
+    if len(student_ids) > invites.MAX_BULK_INVITES:
+        return {"error": f"At most {invites.MAX_BULK_INVITES} students per request"}, 400
+
+    company_user_id = session['user_id']
+
+    # Перевірка дублікатів і вставка — в одній транзакції з блокуванням на запис (run_write)
+    def write(db):
+        comp_row = db.execute("SELECT id FROM companies WHERE user_id = ?", (company_user_id,)).fetchone()
+        comp_id = comp_row['id'] if comp_row else None
+        results = invites.send_bulk(db, comp_id, company_user_id, student_ids, message)
+        sent_ids = [r['student_id'] for r in results if r['result'] == 'sent']
+        mail_service.notify_invited(db, comp_id, sent_ids, message)
+        return results, rating_engine.recompute(db, sent_ids)
+
+    results, rating_changed = run_write(write)
+    if rating_changed:
+        services.ranking_version.bump()
+    services.wake_mail_worker()
+
+    summary = {}
+    for item in results:
+        summary[item['result']] = summary.get(item['result'], 0) + 1
+    return {"results": results, "summary": summary, "invalid": invalid}
+
+def wants_fragment():
+    """?format=json|html — дію викликав JavaScript сторінки, і йому потрібен лише змінений рядок."""
+    return request.args.get('format') in ('json', 'html')
+
+def action_response(tab, message, html=None, **data):
+    """Відповідь на дію над рядком таблиці: JSON з HTML оновленого рядка (None — рядок зник)
+    і лічильниками, лише сам рядок (?format=html) або, без JavaScript, flash і повна вкладка."""
+    fmt = request.args.get('format')
+    if fmt == 'json':
+        return dict(data, message=message, html=html)
+    if fmt == 'html':
+        return html or ''
+    flash(message)
+    return redirect(f'/?tab={tab}')
+
+def invitation_row(db, invite_id):
+    """HTML одного рядка вкладки запрошень для поточного студента чи компанії (як у index())."""
+    if session.get('role') == 'COMPANY':
+        row = db.execute("""
+            SELECT i.*, s.first_name, s.last_name
+            FROM invitations i
+            JOIN students s ON i.student_id = s.id
+            WHERE i.id = ? AND i.user_id = ?
+        """, (invite_id, session['user_id'])).fetchone()
+    else:
+        row = db.execute("""
+            SELECT i.*, c.company_name, c.avatar as company_avatar
+            FROM invitations i
+            JOIN students s ON i.student_id = s.id
+            LEFT JOIN companies c ON i.company_id = c.id
+            WHERE i.id = ? AND s.user_id = ?
+        """, (invite_id, session['user_id'])).fetchone()
+    return render_template('partials/invitation_row.html', inv=dict(row)) if row is not None else None
+
+@bp.route('/respond_invite', methods=['POST'])
 def respond_invite():
     if session.get('role') != 'STUDENT': return redirect('/')
     
@@ -1197,68 +740,253 @@ def respond_invite():
     action = request.form.get('action') 
     
     new_status = 'accepted' if action == 'accept' else 'rejected'
-    
-    db = get_db()
-    db.execute("UPDATE invitations SET status = ? WHERE id = ?", (new_status, invite_id))
-    db.commit()
+
+    def write(db):
+        db.execute("UPDATE invitations SET status = ? WHERE id = ?", (new_status, invite_id))
+        mail_service.notify_response(db, invite_id, new_status)
+        return rating_engine.recompute(db, rating_engine.students_for_invites(db, [invite_id]))
+
+    if run_write(write):
+        services.ranking_version.bump()
+    services.wake_mail_worker()
     
     msg = "Ви прийняли пропозицію!" if new_status == 'accepted' else "Ви відхилили пропозицію."
-    flash(msg)
-    return redirect('/?tab=invitations')
+    if not wants_fragment():
+        return action_response('invitations', msg)
+    db = get_db()
+    pending_count, unread_count = invites.badge_counts(db, session['user_id'])
+    return action_response('invitations', msg, invitation_row(db, invite_id),
+                           pending_count=pending_count, unread_count=unread_count)
 
-@app.route('/delete_invite', methods=['POST'])
+@bp.route('/delete_invite', methods=['POST'])
 def delete_invite():
     if session.get('role') != 'ADMIN': return redirect('/')
     invite_id = request.form.get('invite_id')
-    db = get_db()
-    db.execute("DELETE FROM invitations WHERE id = ?", (invite_id,))
-    db.commit()
-    flash("Заявку успішно видалено.")
-    return redirect('/?tab=invitations')
 
-@app.route('/flag_invite', methods=['POST'])
+    def write(db):
+        affected = rating_engine.students_for_invites(db, [invite_id])
+        db.execute("DELETE FROM invitations WHERE id = ?", (invite_id,))
+        return rating_engine.recompute(db, affected)
+
+    if run_write(write):
+        services.ranking_version.bump()
+    # Рядок зникає, а підсумки в шапці панелі змінилися
+    totals = invites.status_totals(get_db()) if wants_fragment() else None
+    return action_response('invitations', "Заявку успішно видалено.", totals=totals)
+
+@bp.route('/flag_invite', methods=['POST'])
 def flag_invite():
     if session.get('role') != 'COMPANY': return redirect('/')
     invite_id = request.form.get('invite_id')
-    db = get_db()
-    db.execute("UPDATE invitations SET flagged = 1 WHERE id = ?", (invite_id,))
-    db.commit()
-    flash("Ви позначили цю заявку. Адміністратор отримає сповіщення!")
-    return redirect('/?tab=invitations')
+    run_write(lambda db: db.execute("UPDATE invitations SET flagged = 1 WHERE id = ?", (invite_id,)))
+    return action_response('invitations', "Ви позначили цю заявку. Адміністратор отримає сповіщення!",
+                           invitation_row(get_db(), invite_id) if wants_fragment() else None)
 
-@app.route('/admin/toggle_block', methods=['POST'])
+@bp.route('/admin/toggle_block', methods=['POST'])
 def admin_toggle_block():
     if session.get('role') != 'ADMIN': return redirect('/')
     user_id = request.form.get('user_id')
+    run_write(lambda db: db.execute(
+        "UPDATE users SET status = CASE WHEN status = 'blocked' THEN 'active' ELSE 'blocked' END WHERE id = ?", (user_id,)))
+    services.ranking_version.bump()
     db = get_db()
-    db.execute("UPDATE users SET status = CASE WHEN status = 'blocked' THEN 'active' ELSE 'blocked' END WHERE id = ?", (user_id,))
-    db.commit()
-    flash("Статус користувача змінено.")
-    return redirect('/?tab=users')
-
-@app.route('/admin/delete_user', methods=['POST'])
+    student = db.execute("SELECT id FROM students WHERE user_id = ?", (user_id,)).fetchone()
+    if student:
+        services.matcher.update_student(db, student['id'])
+    html = None
+    if wants_fragment():
+        user = admin_panel.fetch_user(db, user_id)
+        html = render_template('partials/user_row.html', u=user) if user is not None else None
+    return action_response('users', "Статус користувача змінено.", html)
+
+@bp.route('/admin/delete_user', methods=['POST'])
 def admin_delete_user():
     if session.get('role') != 'ADMIN': return redirect('/')
     user_id = request.form.get('user_id')
+
+    def write(db):
+        student = db.execute("SELECT id FROM students WHERE user_id = ?", (user_id,)).fetchone()
+        # Запрошення видаленої компанії більше не рахуються в рейтингу її кандидатів
+        affected = [row[0] for row in db.execute("""
+            SELECT DISTINCT student_id FROM invitations
+            WHERE user_id = ? OR company_id IN (SELECT id FROM companies WHERE user_id = ?)
+        """, (user_id, user_id))]
+
+        db.execute("""
+            DELETE FROM invitations 
+            WHERE user_id = ? 
+               OR student_id IN (SELECT id FROM students WHERE user_id = ?) 
+               OR company_id IN (SELECT id FROM companies WHERE user_id = ?)
+        """, (user_id, user_id, user_id))
+
+        db.execute("DELETE FROM students WHERE user_id = ?", (user_id,))
+        db.execute("DELETE FROM companies WHERE user_id = ?", (user_id,))
+        db.execute("DELETE FROM admins WHERE user_id = ?", (user_id,))
+        db.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        rating_engine.recompute(db, affected)
+        return student['id'] if student else None
+
+    student_id = run_write(write)
+    services.ranking_version.bump()
+    if student_id is not None:
+        services.matcher.remove_student(student_id)
+
+    return action_response('users', "Користувача та всі його дані успішно видалено назавжди.")
+
+@bp.route('/admin/import', methods=['POST'])
+def admin_import():
+    if session.get('role') != 'ADMIN': return redirect('/')
+    upload = request.files.get('file')
+    kind = request.form.get('kind')
+    if upload is None or not upload.filename:
+        flash("Оберіть CSV-файл для імпорту.")
+        return redirect('/?tab=users')
+
     db = get_db()
-    
-    db.execute("""
-        DELETE FROM invitations 
-        WHERE user_id = ? 
-           OR student_id IN (SELECT id FROM students WHERE user_id = ?) 
-           OR company_id IN (SELECT id FROM companies WHERE user_id = ?)
-    """, (user_id, user_id, user_id))
-    
-    db.execute("DELETE FROM students WHERE user_id = ?", (user_id,))
-    db.execute("DELETE FROM companies WHERE user_id = ?", (user_id,))
-    db.execute("DELETE FROM admins WHERE user_id = ?", (user_id,))
-    db.execute("DELETE FROM users WHERE id = ?", (user_id,))
-    db.commit()
-    
-    flash("Користувача та всі його дані успішно видалено назавжди.")
+    # Файл читається потоком, а не вантажиться в пам'ять цілком
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        report = bulk_import.import_csv(db, lines, kind)
+    except (bulk_import.InvalidImport, UnicodeDecodeError) as e:
+        flash(f"Імпорт неможливий: {e}")
+        return redirect('/?tab=users')
+    after_bulk_import(db, report)
+
+    if request.args.get('format') == 'json':
+        return report
+    # Показується одне flash-повідомлення, тож перші відхилені рядки — в ньому ж
+    message = f"Імпортовано: {report['imported']}, відхилено рядків: {len(report['rejected'])}."
+    details = '; '.join(f"рядок {line}: {reason}" for line, reason in report['rejected'][:5])
+    if details:
+        message += f" ({details}{'; ...' if len(report['rejected']) > 5 else ''})"
+    flash(message)
     return redirect('/?tab=users')
 
-@app.route('/api/student/<int:user_id>')
+def export_response(rows, columns, name):
+    fmt = exports.export_format(request.args.get('format'))
+    mimetype, extension = exports.FORMATS[fmt]
+    # stream_with_context тримає з'єднання з пулу, поки генератор не дочитає курсор
+    return Response(stream_with_context(exports.stream_rows(rows, columns, fmt)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{name}.{extension}"'})
+
+@bp.route('/export/ranking')
+def export_ranking():
+    if session.get('role') not in ['COMPANY', 'ADMIN']: return {"error": "Access Denied"}, 403
+    filters = ranking.normalize_filters(request.args)
+    snapshot = services.ranking_snapshot
+    if snapshot is not None and snapshot.covers(filters):
+        rows = snapshot.iter_rows(filters)
+    else:
+        rows = ranking.iter_rows(get_db(), filters)
+    return export_response(rows, exports.RANKING_COLUMNS, 'ranking')
+
+@bp.route('/admin/export/users')
+def export_users():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    filters = admin_panel.user_filters(request.args)
+    return export_response(admin_panel.iter_users(get_db(), filters), exports.USERS_COLUMNS, 'users')
+
+@bp.route('/api/ranking')
+def ranking_api():
+    if 'user_id' not in session: return {"error": "Unauthorized"}, 401
+    filters = ranking.normalize_filters(request.args)
+    try:
+        students, next_cursor = ranking_page(filters, request.args.get('cursor'),
+                                             ranking.page_size(request.args.get('limit')))
+    except ranking.InvalidCursor:
+        return {"error": "Invalid cursor"}, 400
+    return {"students": students, "next_cursor": next_cursor, "filters": filters}
+
+@bp.route('/api/students/by_skills')
+def students_by_skills_api():
+    if 'user_id' not in session: return {"error": "Unauthorized"}, 401
+    names = skills.parse_skills(request.args.get('skills'))
+    mode = 'any' if request.args.get('mode') == 'any' else 'all'
+    students = skills.students_with_skills(get_db(), names, mode, ranking.page_size(request.args.get('limit')))
+    return {"skills": names, "mode": mode, "students": students}
+
+@bp.route('/api/matches')
+def matches_api():
+    role = session.get('role')
+    if role not in ['COMPANY', 'ADMIN']: return {"error": "Access Denied"}, 403
+    if not matching.available():
+        return {"error": "Matching engine is unavailable: NumPy is not installed"}, 503
+
+    db = get_db()
+    if role == 'ADMIN' and request.args.get('company_id'):
+        company = db.execute("SELECT id, position, description FROM companies WHERE id = ?",
+                             (request.args.get('company_id'),)).fetchone()
+    else:
+        company = db.execute("SELECT id, position, description FROM companies WHERE user_id = ?",
+                             (session['user_id'],)).fetchone()
+    if company is None:
+        return {"error": "Company not found"}, 404
+
+    services.matcher.ensure_built(db)
+    top = services.matcher.top_k(company['position'], company['description'],
+                                 ranking.page_size(request.args.get('k')))
+    students = {}
+    if top:
+        placeholders = ', '.join('?' for _ in top)
+        rows = db.execute(f"SELECT s.*, u.email FROM students s JOIN users u ON s.user_id = u.id WHERE s.id IN ({placeholders})",
+                          [student_id for student_id, _ in top]).fetchall()
+        students = {row['id']: dict(row) for row in rows}
+    matches = [dict(students[sid], score=round(score, 4)) for sid, score in top if sid in students]
+    return {"company_id": company['id'], "matches": matches, "engine": services.matcher.stats()}
+
+@bp.route('/metrics')
+def metrics():
+    # Адмін у браузері або Prometheus з токеном (Authorization: Bearer ...), якщо UKD_METRICS_TOKEN задано
+    # compare_digest — час порівняння не підказує, скільки символів токена вгадано
+    token_ok = bool(services.metrics_token) and hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f"Bearer {services.metrics_token}".encode())
+    if session.get('role') != 'ADMIN' and not token_ok: return {"error": "Access Denied"}, 403
+    return Response(services.profiler.metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/admin/slow_queries')
+def admin_slow_queries():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    return {"threshold_ms": services.slow_query_log.threshold_ms, "profiling": services.profiling,
+            "groups": services.slow_query_log.groups(request.args.get('sort'))}
+
+@bp.route('/admin/slow_queries/clear', methods=['POST'])
+def admin_clear_slow_queries():
+    if session.get('role') != 'ADMIN': return redirect('/')
+    services.slow_query_log.clear()
+    flash("Журнал повільних запитів очищено.")
+    return redirect('/?tab=slow_queries')
+
+@bp.route('/admin/pool_stats')
+def admin_pool_stats():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    return services.pool().stats()
+
+@bp.route('/admin/ranking_snapshot_stats')
+def admin_ranking_snapshot_stats():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    if services.ranking_snapshot is None:
+        return {"enabled": False}
+    return dict(services.ranking_snapshot.stats, enabled=True, version=services.ranking_version.value)
+
+@bp.route('/admin/write_queue_stats')
+def admin_write_queue_stats():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    if services.write_queue is None:
+        return {"enabled": False}
+    return dict(services.write_queue.stats, enabled=True)
+
+@bp.route('/admin/compression_stats')
+def admin_compression_stats():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    return dict(services.compressor.stats, brotli=compression.brotli is not None, app_version=services.app_version)
+
+@bp.route('/admin/mail_stats')
+def admin_mail_stats():
+    if session.get('role') != 'ADMIN': return {"error": "Access Denied"}, 403
+    return {"queue": mail_service.queue_stats(get_db()),
+            "worker": dict(services.mail_worker.stats) if services.mail_worker is not None else None}
+
+@bp.route('/api/student/<int:user_id>')
 def get_student_api(user_id):
     db = get_db()
     std = db.execute("""
@@ -1272,6 +1000,7 @@ def get_student_api(user_id):
     return {"error": "Student not found"}, 404
 
 if __name__ == '__main__':
-    if not os.path.exists(DATABASE):
-        init_db()
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Сервер розробки; кілька воркерів за балансувальником — через wsgi.py (див. README)
+    app = create_app()
+    prepare(app)
+    app.run(debug=True, port=int(os.environ.get('UKD_PORT', 5000)))
\ No newline at end of file
@@ -0,0 +1,345 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import bulk_import
+import seed_data
+
+# --- НАВАНТАЖУВАЛЬНИЙ БЕНЧМАРК УСІХ МАРШРУТІВ ---
+#
+# Ганяє кожен маршрут додатка через Flask test client на наповненій БД
+# (seed_data.py) і друкує p50/p95/p99 затримки та пропускну здатність.
+# Результати зберігаються в JSON, а --compare показує різницю з попереднім
+# запуском. Маршрути, що пишуть, змінюють БД — тому бенчмарк працює з окремим
+# файлом (за замовчуванням bench.db), який створюється й наповнюється сам.
+#
+#   python benchmark.py --db bench.db --students 100000 --invitations 200000 --output after.json --compare before.json
+
+PREFIX = seed_data.PREFIX
+STUDENT_LOGIN = f'{PREFIX}student_1'
+COMPANY_LOGIN = f'{PREFIX}company_0'
+ADMIN_LOGIN = 'admin'
+
+# Налаштування додатка (app.config), що впливають на виміри й потрапляють у JSON результатів.
+# Лише явний перелік: файли результатів зберігаються й пересилаються, тож секрети
+# (SECRET_KEY, METRICS_TOKEN, паролі SMTP з оточення) туди не пишуться
+RECORDED_SETTINGS = ['DATABASE', 'POOL_SIZE', 'SQLITE_CACHE_KB', 'SQLITE_MMAP_MB', 'FACET_CACHE_TTL',
+                     'COMPRESSION_CACHE_SIZE', 'TEMPLATE_CACHE_DIR', 'PROFILING', 'SLOW_QUERY_MS',
+                     'RANKING_SNAPSHOT', 'RANKING_SNAPSHOT_INTERVAL', 'MAIL_WORKER', 'RATING_INTERVAL',
+                     'WRITE_QUEUE', 'WRITE_BATCH']
+
+
+class Scenario:
+    """Один маршрут із конкретними параметрами. request(ctx, i) -> (method, url, kwargs)."""
+
+    def __init__(self, name, role, request, fixtures=None, read_body=True):
+        self.name = name
+        self.role = role
+        self.request = request
+        # fixtures(ctx, n) готує n одноразових об'єктів (запрошення, користувачі) до вимірювання
+        self.fixtures = fixtures
+        self.read_body = read_body
+
+
+def _get(url):
+    return lambda ctx, i: ('GET', url(ctx, i) if callable(url) else url, {})
+
+
+def _post(url, data):
+    return lambda ctx, i: ('POST', url, {'data': data(ctx, i)})
+
+
+# --- Одноразові дані для маршрутів, що видаляють або змінюють стан ---
+
+def _fresh_invites(ctx, n):
+    """n нових запрошень від бенчмарк-компанії бенчмарк-студенту."""
+    db = ctx.db
+    db.executemany("INSERT INTO invitations (student_id, company_id, user_id, message) VALUES (?, ?, ?, ?)",
+                   [(ctx.student_id, ctx.company_id, ctx.company_user_id, 'benchmark')] * n)
+    db.commit()
+    return [row[0] for row in db.execute("SELECT id FROM invitations ORDER BY id DESC LIMIT ?", (n,))][::-1]
+
+
+def _fresh_users(ctx, n):
+    """n нових студентів, яких адмін видалятиме."""
+    tag = f"bench_del_{time.time_ns()}"
+    report = bulk_import.import_csv(ctx.db, seed_data._csv_lines(
+        ['username', 'password', 'first_name', 'last_name'],
+        ([f"{tag}_{i}", '123', 'Бенч', 'Марк'] for i in range(n))), 'students')
+    assert report['imported'] == n, report
+    return [row[0] for row in ctx.db.execute("SELECT id FROM users WHERE username LIKE ? ORDER BY id", (f"{tag}_%",))]
+
+
+def _import_file(ctx, i):
+    tag = f"bench_imp_{time.time_ns()}_{i}"
+    lines = ['username,password,first_name,last_name,course,specialty,skills']
+    lines += [f"{tag}_{j},123,Імпорт,Тест,2,ІПЗ,\"Python, SQL\"" for j in range(50)]
+    return {'kind': 'students', 'file': (io.BytesIO('\n'.join(lines).encode()), 'bench.csv')}
+
+
+def scenarios():
+    ranking_filters = [
+        ('ranking', '/?tab=ranking'),
+        ('ranking_course', '/?tab=ranking&course=3'),
+        ('ranking_specialty', "/?tab=ranking&specialty=ІПЗ"),
+        ('ranking_course_specialty_asc', '/?tab=ranking&course=2&specialty=Економіка&sort=asc'),
+        ('ranking_search', '/?tab=ranking&search=Python'),
+        ('ranking_search_by_rating', '/?tab=ranking&search=Коваленко&sort=desc'),
+    ]
+    result = [Scenario('landing', None, _get('/'))]
+    result += [Scenario(name, 'company', _get(url)) for name, url in ranking_filters]
+    result += [
+        Scenario('ranking_page_2', 'company', _get(lambda ctx, i: f'/?tab=ranking&cursor={ctx.ranking_cursor}')),
+        Scenario('home_student', 'student', _get('/?tab=home')),
+        Scenario('profile_student', 'student', _get('/?tab=profile')),
+        Scenario('invitations_student', 'student', _get('/?tab=invitations')),
+        Scenario('invitations_company', 'company', _get('/?tab=invitations')),
+        Scenario('invitations_admin', 'admin', _get('/?tab=invitations')),
+        Scenario('invitations_admin_flagged', 'admin', _get('/?tab=invitations&flagged=1')),
+        Scenario('invitations_admin_pending', 'admin', _get('/?tab=invitations&status=pending')),
+        Scenario('users_admin', 'admin', _get('/?tab=users')),
+        Scenario('users_admin_search', 'admin', _get('/?tab=users&q=Шевченко&role=STUDENT')),
+        Scenario('api_student', 'company', _get(lambda ctx, i: f'/api/student/{ctx.rng.choice(ctx.student_user_ids)}')),
+        Scenario('api_ranking', 'company', _get('/api/ranking?limit=50')),
+        Scenario('api_students_by_skills', 'company', _get('/api/students/by_skills?skills=Python,SQL')),
+        Scenario('api_matches', 'company', _get('/api/matches?k=20')),
+        Scenario('export_ranking_csv', 'company', _get('/export/ranking?course=4')),
+        Scenario('export_users_ndjson', 'admin', _get('/admin/export/users?format=ndjson&role=COMPANY')),
+        Scenario('export_users_csv', 'admin', _get('/admin/export/users?format=csv')),
+        Scenario('admin_pool_stats', 'admin', _get('/admin/pool_stats')),
+        Scenario('admin_mail_stats', 'admin', _get('/admin/mail_stats')),
+        Scenario('login', 'visitor', _post('/login', lambda ctx, i: {'username': STUDENT_LOGIN, 'password': '123'})),
+        Scenario('register', 'visitor', _post('/register', lambda ctx, i: {
+            'role': 'STUDENT', 'username': f"bench_reg_{time.time_ns()}_{i}", 'email': '', 'password': '123'})),
+        Scenario('update_profile', 'student', _post('/update_profile', lambda ctx, i: dict(
+            ctx.student_profile, skills=ctx.rng.choice(['Python, SQL', 'Python, SQL, Docker'])))),
+        Scenario('send_invite', 'company', _post('/send_invite', lambda ctx, i: {
+            'student_id': ctx.rng.choice(ctx.student_ids), 'message': 'benchmark'})),
+        Scenario('bulk_invite_api', 'company', lambda ctx, i: ('POST', '/api/invites/bulk', {'json': {
+            'student_ids': ctx.rng.sample(ctx.student_ids, 20), 'message': 'benchmark'}})),
+        Scenario('respond_invite', 'student', _post('/respond_invite', lambda ctx, i: {
+            'invite_id': ctx.fixture(i), 'action': ctx.rng.choice(['accept', 'reject'])}), fixtures=_fresh_invites),
+        Scenario('flag_invite', 'company', _post('/flag_invite', lambda ctx, i: {'invite_id': ctx.fixture(i)}),
+                 fixtures=_fresh_invites),
+        Scenario('delete_invite', 'admin', _post('/delete_invite', lambda ctx, i: {'invite_id': ctx.fixture(i)}),
+                 fixtures=_fresh_invites),
+        Scenario('admin_select_user', 'admin_editor', _post('/admin/select_user', lambda ctx, i: {
+            'target_user_id': ctx.rng.choice(ctx.student_user_ids)})),
+        Scenario('admin_toggle_block', 'admin', _post('/admin/toggle_block', lambda ctx, i: {
+            'user_id': ctx.fixture(i)}), fixtures=lambda ctx, n: [ctx.block_target_id] * n),
+        Scenario('admin_delete_user', 'admin', _post('/admin/delete_user', lambda ctx, i: {
+            'user_id': ctx.fixture(i)}), fixtures=_fresh_users),
+        Scenario('admin_import', 'admin', lambda ctx, i: ('POST', '/admin/import?format=json', {
+            'data': _import_file(ctx, i), 'content_type': 'multipart/form-data'})),
+    ]
+    return result
+
+
+class Context:
+    """Спільний стан запуску: додаток, клієнти за ролями, вибірки id із БД."""
+
+    LOGINS = {'student': STUDENT_LOGIN, 'company': COMPANY_LOGIN, 'admin': ADMIN_LOGIN, 'admin_editor': ADMIN_LOGIN}
+
+    def __init__(self, app, seed):
+        self.app = app
+        self.rng = random.Random(seed)
+        self._local = threading.local()
+        self._fixtures = []
+        self.db = sqlite3.connect(app.config['DATABASE'], check_same_thread=False)
+        self.db.execute("PRAGMA busy_timeout = 5000")
+
+        row = self.db.execute("SELECT s.id, u.id FROM students s JOIN users u ON s.user_id = u.id WHERE u.username = ?",
+                              (STUDENT_LOGIN,)).fetchone()
+        if row is None:
+            raise SystemExit(f"{app.config['DATABASE']} is not seeded: user '{STUDENT_LOGIN}' not found")
+        self.student_id, self.student_user_id = row
+        self.company_id, self.company_user_id = self.db.execute(
+            "SELECT c.id, u.id FROM companies c JOIN users u ON c.user_id = u.id WHERE u.username = ?",
+            (COMPANY_LOGIN,)).fetchone()
+        sample = self.db.execute("SELECT id, user_id FROM students ORDER BY random() LIMIT 1000").fetchall()
+        self.student_ids = [sid for sid, _ in sample]
+        self.student_user_ids = [uid for _, uid in sample]
+        self.block_target_id = self.db.execute(
+            "SELECT id FROM users WHERE username = ?", (f'{PREFIX}student_2',)).fetchone()[0]
+        profile = self.db.execute("SELECT * FROM students WHERE id = ?", (self.student_id,)).fetchone()
+        columns = [d[0] for d in self.db.execute("SELECT * FROM students LIMIT 0").description]
+        profile = dict(zip(columns, profile))
+        self.student_profile = {key: profile.get(key) or '' for key in
+                                ['first_name', 'last_name', 'patronymic', 'course', 'specialty', 'skills',
+                                 'links', 'contact_info', 'avatar']}
+        self.student_profile['email'] = f'{STUDENT_LOGIN}@students.ukd.edu.ua'
+        self.ranking_cursor = self.client('company').get('/api/ranking').get_json()['next_cursor']
+
+    def client(self, role):
+        """Окремий залогінений клієнт на роль і потік (сесія в cookie клієнта)."""
+        clients = self._local.__dict__.setdefault('clients', {})
+        if role not in clients:
+            client = self.app.test_client()
+            if role in self.LOGINS:
+                client.post('/login', data={'username': self.LOGINS[role], 'password': '123'})
+            clients[role] = client
+        return clients[role]
+
+    def prepare(self, scenario, n):
+        self._fixtures = list(scenario.fixtures(self, n)) if scenario.fixtures else []
+
+    def fixture(self, i):
+        return self._fixtures[i]
+
+    def close(self):
+        self.db.close()
+
+
+def percentile(values, p):
+    """Перцентиль за найближчим рангом по відсортованому списку."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def run_scenario(ctx, scenario, requests, warmup, concurrency):
+    ctx.prepare(scenario, warmup + requests)
+    errors = []
+
+    def call(i):
+        method, url, kwargs = scenario.request(ctx, i)
+        started = time.perf_counter()
+        response = ctx.client(scenario.role).open(url, method=method, **kwargs)
+        if scenario.read_body:
+            response.get_data()
+        elapsed = time.perf_counter() - started
+        response.close()
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+        return elapsed
+
+    for i in range(warmup):
+        call(i)
+    errors.clear()
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(call, range(warmup, warmup + requests)))
+    else:
+        latencies = [call(i) for i in range(warmup, warmup + requests)]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        'role': scenario.role,
+        'requests': requests,
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3),
+        'rps': round(requests / wall, 1),
+    }
+
+
+def database_sizes(db_path):
+    with sqlite3.connect(db_path) as db:
+        return {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ['users', 'students', 'companies', 'invitations']}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_table(results, baseline=None):
+    header = f"{'scenario':32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'err':>4}"
+    if baseline:
+        header += f" {'Δp50':>8} {'Δp95':>8} {'Δreq/s':>8}"
+    print(header)
+    for name, r in results.items():
+        line = f"{name:32} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} {r['rps']:9.1f} {r['errors']:4}"
+        old = (baseline or {}).get(name)
+        if old:
+            change = lambda new, before: f"{(new - before) / before * 100:+7.1f}%" if before else '     n/a'
+            line += f" {change(r['p50_ms'], old['p50_ms'])} {change(r['p95_ms'], old['p95_ms'])} {change(r['rps'], old['rps'])}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк усіх маршрутів на синтетичних даних.")
+    parser.add_argument('--db', default='bench.db', help="Окрема БД для бенчмарку (наповнюється, якщо її немає).")
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--invitations', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help="Виміряних запитів на сценарій.")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1, help="Потоків із власними клієнтами.")
+    parser.add_argument('--only', action='append', help="Лише сценарії, назва яких містить рядок (можна кілька).")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="JSON попереднього запуску для порівняння.")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        seed_data.main(['--db', args.db, '--students', str(args.students), '--companies', str(args.companies),
+                        '--invitations', str(args.invitations), '--seed', str(args.seed)])
+
+    # Фонові воркери лише додають шуму у виміри; БД — бенчмаркова
+    os.environ['UKD_DATABASE'] = args.db
+    os.environ.setdefault('UKD_MAIL_WORKER', 'off')
+    os.environ.setdefault('UKD_RATING_INTERVAL', '0')
+    import app_timer
+
+    sizes = database_sizes(args.db)
+    ctx = Context(app_timer.create_app(), args.seed)
+    results = {}
+    try:
+        for scenario in scenarios():
+            if args.only and not any(part in scenario.name for part in args.only):
+                continue
+            results[scenario.name] = run_scenario(ctx, scenario, args.requests, args.warmup, args.concurrency)
+            print(f"  {scenario.name}: p50 {results[scenario.name]['p50_ms']} ms", file=sys.stderr)
+    finally:
+        ctx.close()
+
+    report = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'database': args.db,
+            'sizes': sizes,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'settings': {key: ctx.app.config.get(key) for key in RECORDED_SETTINGS},
+        },
+        'results': results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
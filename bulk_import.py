@@ -0,0 +1,166 @@
+import csv
+import re
+import sqlite3
+
+import rating_engine
+import skills
+
+# --- МАСОВИЙ ІМПОРТ СТУДЕНТІВ І КОМПАНІЙ З CSV ---
+#
+# Файл читається потоково, рядок за рядком, і пишеться порціями: кожна порція —
+# одна транзакція з executemany для users, профілів і навичок. Погані рядки не
+# зупиняють імпорт, а потрапляють у звіт з номером рядка та причиною.
+# FTS-індекс і лічильники запрошень оновлюються тригерами в тих самих транзакціях.
+
+CHUNK_SIZE = 500
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# Тип імпорту -> (роль, колонки профілю, обов'язкові колонки)
+KINDS = {
+    'students': ('STUDENT',
+                 ['first_name', 'last_name', 'patronymic', 'course', 'specialty', 'skills', 'links',
+                  'contact_info', 'rating'],
+                 ['first_name', 'last_name']),
+    'companies': ('COMPANY',
+                  ['company_name', 'position', 'description', 'contact_info'],
+                  ['company_name']),
+}
+
+USER_COLUMNS = ['username', 'password', 'email']
+
+
+class InvalidImport(ValueError):
+    """Файл не можна імпортувати взагалі (невідомий тип, немає потрібних колонок)."""
+
+
+def _validate(kind, row, seen):
+    """Повертає (користувач, профіль) або кидає ValueError з причиною відмови."""
+    _, profile_columns, required = KINDS[kind]
+    values = {key: (row.get(key) or '').strip() for key in USER_COLUMNS + profile_columns}
+
+    username = values['username']
+    if not username:
+        raise ValueError("username is empty")
+    if username in seen:
+        raise ValueError(f"duplicate username '{username}' in file")
+    if not values['password']:
+        raise ValueError("password is empty")
+    if values['email'] and not EMAIL_RE.match(values['email']):
+        raise ValueError(f"invalid email '{values['email']}'")
+    for column in required:
+        if not values[column]:
+            raise ValueError(f"{column} is empty")
+
+    profile = {column: values[column] or None for column in profile_columns}
+    if kind == 'students':
+        if profile['course'] and not (profile['course'].isascii() and profile['course'].isdigit() and 1 <= int(profile['course']) <= 6):
+            raise ValueError(f"invalid course '{profile['course']}'")
+        # Рейтинг рахує rating_engine; число з файлу — ручна поправка до нього
+        try:
+            profile['rating_bonus'] = int(profile.pop('rating') or 0)
+        except ValueError:
+            raise ValueError(f"invalid rating '{row.get('rating')}'")
+    return (username, values['password'], values['email'] or None), profile
+
+
+def _write_chunk(db, kind, chunk, report):
+    """Одна транзакція: users -> профілі -> навички. chunk = [(рядок, user, profile)]."""
+    role = KINDS[kind][0]
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # Логіни, що вже є в БД, — у звіт; перевірка всередині транзакції, тож без гонок
+        placeholders = ', '.join('?' for _ in chunk)
+        taken = {row[0] for row in db.execute(
+            f"SELECT username FROM users WHERE username IN ({placeholders})",
+            [user[0] for _, user, _ in chunk])}
+        rows = []
+        for line, user, profile in chunk:
+            if user[0] in taken:
+                report['rejected'].append((line, f"username '{user[0]}' already exists"))
+            else:
+                rows.append((user, profile))
+        if not rows:
+            db.rollback()
+            return
+
+        db.executemany("INSERT INTO users (username, password, email, role) VALUES (?, ?, ?, ?)",
+                       [(*user, role) for user, _ in rows])
+        placeholders = ', '.join('?' for _ in rows)
+        user_ids = dict(db.execute(f"SELECT username, id FROM users WHERE username IN ({placeholders})",
+                                   [user[0] for user, _ in rows]).fetchall())
+
+        table = 'students' if kind == 'students' else 'companies'
+        profile_columns = list(rows[0][1])
+        columns = ['user_id'] + profile_columns
+        values = ['?' for _ in columns]
+        if kind == 'students':
+            # Як register і update_profile: імпортований профіль одразу отримує бали за свіжість
+            columns.append('profile_updated_at')
+            values.append('CURRENT_TIMESTAMP')
+        db.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(values)})",
+                       [(user_ids[user[0]], *(profile[c] for c in profile_columns)) for user, profile in rows])
+
+        if kind == 'students':
+            _write_skills(db, [(user_ids[user[0]], profile['skills']) for user, profile in rows])
+            # Рейтинг нових студентів — одним UPDATE на всю порцію
+            rating_engine.recompute(db, _student_ids(db, [user_ids[user[0]] for user, _ in rows]))
+        db.commit()
+    except sqlite3.Error:
+        db.rollback()
+        raise
+    report['imported'] += len(rows)
+    report['chunks'] += 1
+
+
+def _student_ids(db, user_ids):
+    placeholders = ', '.join('?' for _ in user_ids)
+    return [row[0] for row in db.execute(f"SELECT id FROM students WHERE user_id IN ({placeholders})", user_ids)]
+
+
+def _write_skills(db, students):
+    """Навички всієї порції: один INSERT OR IGNORE у довідник і один executemany зв'язків."""
+    parsed = [(user_id, skills.parse_skills(text)) for user_id, text in students if text]
+    if not parsed:
+        return
+    ids = skills.skill_ids(db, {name for _, names in parsed for name in names}, create=True)
+    placeholders = ', '.join('?' for _ in parsed)
+    student_ids = dict(db.execute(f"SELECT user_id, id FROM students WHERE user_id IN ({placeholders})",
+                                  [user_id for user_id, _ in parsed]).fetchall())
+    db.executemany("INSERT OR IGNORE INTO student_skills (skill_id, student_id, position) VALUES (?, ?, ?)",
+                   [(ids[skills.slugify(name)], student_ids[user_id], pos)
+                    for user_id, names in parsed for pos, name in enumerate(names)])
+
+
+def import_csv(db, lines, kind, chunk_size=CHUNK_SIZE):
+    """Імпортує CSV (будь-який ітерований по рядках текст) і повертає звіт.
+
+    Звіт: {'kind', 'imported', 'chunks', 'rejected': [(номер рядка, причина)]}.
+    """
+    if kind not in KINDS:
+        raise InvalidImport(f"unknown import kind '{kind}'")
+    reader = csv.DictReader(lines)
+    required = KINDS[kind][2]
+    missing = [c for c in ['username', 'password'] + required if c not in (reader.fieldnames or [])]
+    if missing:
+        raise InvalidImport(f"missing columns: {', '.join(missing)}")
+
+    report = {'kind': kind, 'imported': 0, 'chunks': 0, 'rejected': []}
+    seen = set()
+    chunk = []
+    for row in reader:
+        line = reader.line_num
+        try:
+            user, profile = _validate(kind, row, seen)
+        except ValueError as e:
+            report['rejected'].append((line, str(e)))
+            continue
+        seen.add(user[0])
+        chunk.append((line, user, profile))
+        if len(chunk) >= chunk_size:
+            _write_chunk(db, kind, chunk, report)
+            chunk = []
+    if chunk:
+        _write_chunk(db, kind, chunk, report)
+    report['rejected'].sort()
+    return report
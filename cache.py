@@ -0,0 +1,56 @@
+import threading
+import time
+
+# --- КЕШ З ВЕРСІЄЮ ДАНИХ ---
+#
+# Маршрути, що змінюють дані, збільшують лічильник версії; кешовані значення,
+# пораховані для старішої версії, вважаються застарілими. Перевірка кешу —
+# це лише порівняння двох чисел, без жодного SQL.
+
+
+class DataVersion:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class VersionedCache:
+    """Кеш, записи якого живуть, доки не зміниться версія даних.
+
+    ttl обмежує вік запису: лічильник версії живе в пам'яті одного процесу,
+    тож зміни, зроблені іншим воркером, він побачить не пізніше ніж через ttl секунд.
+    """
+
+    def __init__(self, version, ttl=None):
+        self.version = version
+        self.ttl = ttl
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            version, created, value = entry
+            if version == self.version.value and (self.ttl is None or now - created < self.ttl):
+                self.hits += 1
+                return value
+        self.misses += 1
+        # Версію беремо до обчислення: якщо дані зміняться під час нього, запис одразу застаріє
+        version = self.version.value
+        value = loader()
+        self._entries[key] = (version, now, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
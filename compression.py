@@ -0,0 +1,150 @@
+import gzip
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+from jinja2.ext import Extension
+
+try:
+    import brotli
+except ImportError:  # brotli необов'язковий: без нього стискаємо лише gzip
+    brotli = None
+
+# --- СТИСНЕННЯ ВІДПОВІДЕЙ І МІНІФІКАЦІЯ HTML ---
+#
+# Сторінки — це десятки кілобайт повторюваної Tailwind-розмітки, яка добре
+# стискається. after_request-обробник стискає відповіді (br, якщо є модуль
+# brotli і клієнт його приймає, інакше gzip), починаючи з порогового розміру.
+# Потокові відповіді (експорт) стискаються gzip-ом на льоту, порція за порцією.
+# Відступи в шаблонах прибираються один раз — при компіляції шаблону, а не на кожен запит.
+
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'application/x-ndjson',
+}
+
+PRESERVE_RE = re.compile(r'(<(pre|textarea)\b.*?</\2>)', re.IGNORECASE | re.DOTALL)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\s*\[).*?-->', re.DOTALL)
+INDENT_RE = re.compile(r'\n[ \t]*(?:\n[ \t]*)*')
+
+
+def minify_html(source):
+    """Прибирає відступи, порожні рядки та HTML-коментарі; <pre> і <textarea> не чіпає."""
+    parts = PRESERVE_RE.split(source)
+    result = []
+    # split з двома групами дає [текст, блок, тег, текст, блок, тег, ...]
+    for i in range(0, len(parts), 3):
+        text = HTML_COMMENT_RE.sub('', parts[i])
+        result.append(INDENT_RE.sub('\n', text))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return ''.join(result).strip() + '\n'
+
+
+class HTMLMinifier(Extension):
+    """Jinja-розширення: мініфікує джерело шаблону перед компіляцією (результат потрапляє й у bytecode-кеш)."""
+
+    def preprocess(self, source, name, filename=None):
+        if name and name.endswith('.html'):
+            return minify_html(source)
+        return source
+
+
+def accepted_encoding(accept_encoding):
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        # Закриваємо вихідний генератор явно — stream_with_context звільняє з'єднання саме тут
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class Compressor:
+    def __init__(self, app=None, min_size=MIN_SIZE, cache_size=32):
+        self.min_size = min_size
+        # Стиснені тіла відповідей з ETag (напр. кешована головна сторінка) — щоб не стискати повторно
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.stats = {'compressed': 0, 'bytes_in': 0, 'bytes_out': 0, 'cache_hits': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def _cached(self, key, data, encoding):
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return body
+        body = compress(data, encoding)
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+    def after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding', ''))
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Потік: лише gzip, довжина заздалегідь невідома
+            if 'gzip' not in request.headers.get('Accept-Encoding', ''):
+                return response
+            response.response = _gzip_stream(response.response)
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers.pop('Content-Length', None)
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            body = self._cached((etag, encoding), data, encoding)
+        else:
+            body = compress(data, encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        with self._lock:
+            self.stats['compressed'] += 1
+            self.stats['bytes_in'] += len(data)
+            self.stats['bytes_out'] += len(body)
+        return response
@@ -0,0 +1,163 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# --- ПУЛ З'ЄДНАНЬ SQLite ---
+#
+# Кожен воркер тримає обмежений набір "теплих" з'єднань. PRAGMA-налаштування
+# виконуються один раз при створенні з'єднання, а не на кожен запит.
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,        # ~16 МБ кешу сторінок (від'ємне значення — у КіБ)
+    'mmap_size': 128 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY',
+}
+
+
+def is_busy_error(exc):
+    msg = str(exc).lower()
+    return 'database is locked' in msg or 'database is busy' in msg
+
+
+class PooledConnection(sqlite3.Connection):
+    """З'єднання, яке повторює операцію, якщо БД тимчасово зайнята."""
+
+    pool = None
+    busy_retries = 3
+
+    def _retry(self, fn, *args):
+        for attempt in range(self.busy_retries + 1):
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == self.busy_retries:
+                    raise
+                if self.pool is not None:
+                    self.pool.record_busy_retry()
+                time.sleep(0.01 * 2 ** attempt)
+
+    def execute(self, sql, parameters=()):
+        return self._retry(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._retry(super().executemany, sql, seq_of_parameters)
+
+    def commit(self):
+        return self._retry(super().commit)
+
+
+class ConnectionPool:
+    def __init__(self, database, size=8, timeout=10.0, pragmas=None):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'checkouts': 0, 'waits': 0, 'wait_time': 0.0,
+                       'busy_retries': 0, 'discarded': 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, timeout=self.pragmas['busy_timeout'] / 1000,
+                               check_same_thread=False, factory=PooledConnection)
+        conn.pool = self
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        self._bump('created')
+        return conn
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def record_busy_retry(self):
+        self._bump('busy_retries')
+
+    def acquire(self):
+        self._bump('checkouts')
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Пул вичерпано — чекаємо, поки інший запит поверне з'єднання
+        started = time.perf_counter()
+        self._bump('waits')
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("connection pool exhausted")
+        finally:
+            self._bump('wait_time', time.perf_counter() - started)
+        return conn
+
+    def release(self, conn, discard=False):
+        if not discard:
+            try:
+                # Незакомічені зміни не повинні "протекти" в наступний запит
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        if discard:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+                self._stats['discarded'] += 1
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = self._created
+        stats['idle'] = self._idle.qsize()
+        stats['in_use'] = stats['open'] - stats['idle']
+        stats['size'] = self.size
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database, size=8, pragmas=None):
+    # Пул прив'язаний до процесу: після fork дочірній воркер створює власний
+    key = (os.getpid(), database)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(database, size=size, pragmas=pragmas)
+    return pool
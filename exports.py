@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+
+# --- ЕКСПОРТ (CSV / NDJSON) ---
+#
+# Рядки йдуть прямо з курсора SQLite у відповідь: генератор віддає текст
+# порціями, тож пам'ять не залежить від кількості рядків, а воркер починає
+# відповідати одразу, не чекаючи кінця вибірки.
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+
+RANKING_COLUMNS = ['id', 'last_name', 'first_name', 'patronymic', 'course', 'specialty',
+                   'skills', 'rating', 'email', 'contact_info', 'links']
+
+# Текст, з якого Excel/LibreOffice починають формулу (=HYPERLINK(...) у імені студента тощо)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+USERS_COLUMNS = ['id', 'username', 'email', 'role', 'status', 'first_name', 'last_name', 'patronymic',
+                 'course', 'specialty', 'skills', 'links', 'company_name', 'position', 'contact_info']
+
+
+def export_format(value):
+    return value if value in FORMATS else 'csv'
+
+
+def csv_cell(value):
+    """Значення клітинки CSV; текст, що виглядає як формула, — з апострофом попереду."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_rows(rows, columns, fmt, batch_size=500):
+    """Генератор тексту відповіді: рядки (dict або sqlite3.Row) у CSV чи NDJSON, порціями."""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        # BOM — щоб Excel відкрив кирилицю без танців з кодуванням
+        buffer.write('\ufeff')
+        writer.writerow(columns)
+        write = lambda row: writer.writerow([csv_cell(row[c]) for c in columns])
+    else:
+        write = lambda row: buffer.write(json.dumps({c: row[c] for c in columns}, ensure_ascii=False) + '\n')
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,21 @@
+import multiprocessing
+import os
+
+# --- НАЛАШТУВАННЯ GUNICORN ---
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# Значення беруться з UKD_* змінних оточення, як і налаштування самого додатка (settings.py).
+
+bind = os.environ.get('UKD_BIND', '0.0.0.0:8000')
+# За замовчуванням 2 воркери на ядро; SQLite у WAL читає паралельно, записи чергуються (busy_timeout)
+workers = int(os.environ.get('UKD_WORKERS', multiprocessing.cpu_count() * 2))
+# Потоки в кожному воркері (gthread); UKD_POOL_SIZE має бути не меншим
+threads = int(os.environ.get('UKD_THREADS', 4))
+# wsgi.py імпортується в майстрі: міграції й компіляція шаблонів — один раз до fork
+preload_app = True
+timeout = int(os.environ.get('UKD_TIMEOUT', 60))
+# Воркер перезапускається після стількох запитів (0 — ніколи): обмежує ріст пам'яті кешів
+max_requests = int(os.environ.get('UKD_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('UKD_ACCESS_LOG') or None
@@ -0,0 +1,123 @@
+# --- ЗАПРОШЕННЯ: ЛІЧИЛЬНИКИ ДЛЯ БЕЙДЖА ---
+#
+# students.pending_invites / unread_invites підтримуються тригерами на invitations
+# (див. міграцію 7), тож бейдж у навігації читає один рядок замість COUNT(*).
+# Так само invitation_totals тримає підсумки по статусах для адмін-панелі (міграція 10).
+
+STATUSES = ['pending', 'accepted', 'rejected']
+
+# Скільки студентів можна запросити одним масовим запитом
+MAX_BULK_INVITES = 200
+
+
+def badge_counts(db, user_id):
+    """Повертає (очікують, непрочитані) для студента з users.id = user_id."""
+    row = db.execute("SELECT pending_invites, unread_invites FROM students WHERE user_id = ?",
+                     (user_id,)).fetchone()
+    if row is None:
+        return 0, 0
+    return row[0], row[1]
+
+
+def mark_read(db, user_id):
+    """Позначає всі запрошення студента прочитаними (коли він відкриває вкладку)."""
+    cur = db.execute("""
+        UPDATE invitations SET is_read = 1
+        WHERE is_read = 0 AND student_id = (SELECT id FROM students WHERE user_id = ?)
+    """, (user_id,))
+    return cur.rowcount
+
+
+def repair_counters(db):
+    """Перераховує лічильники з нуля — на випадок, якщо вони колись розійшлися з даними."""
+    cur = db.execute("""
+        UPDATE students SET
+            pending_invites = (SELECT COUNT(*) FROM invitations i
+                               WHERE i.student_id = students.id AND i.status = 'pending'),
+            unread_invites = (SELECT COUNT(*) FROM invitations i
+                              WHERE i.student_id = students.id AND i.is_read = 0)
+    """)
+    return cur.rowcount
+
+
+def status_totals(db):
+    """{статус: {'total': .., 'flagged': ..}} для всіх відомих статусів (відсутні — нулі)."""
+    totals = {status: {'total': 0, 'flagged': 0} for status in STATUSES}
+    for status, total, flagged in db.execute("SELECT status, total, flagged FROM invitation_totals"):
+        if status is not None and total:
+            totals[status] = {'total': total, 'flagged': flagged}
+    return totals
+
+
+def repair_totals(db):
+    """Перераховує invitation_totals одним згрупованим запитом."""
+    db.execute("DELETE FROM invitation_totals")
+    cur = db.execute("""
+        INSERT INTO invitation_totals (status, total, flagged)
+        SELECT status, COUNT(*), SUM(COALESCE(flagged, 0) != 0)
+        FROM invitations WHERE status IS NOT NULL
+        GROUP BY status
+    """)
+    return cur.rowcount
+
+
+def parse_student_ids(values, limit=MAX_BULK_INVITES):
+    """Список id студентів з форми/JSON ("1,2", ["3", 4]) без повторів; (ids, нерозпізнані).
+
+    Розбір зупиняється на limit + 1 різних id (викликачу досить знати, що ліміт
+    перевищено), нерозпізнаних повертається не більше limit.
+    """
+    ids, invalid = {}, []
+    for value in values or []:
+        for part in str(value).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            # isascii: str.isdigit() пропускає й '²' чи арабсько-індійські цифри
+            if not (part.isascii() and part.isdigit()):
+                if len(invalid) < limit:
+                    invalid.append(part)
+                continue
+            ids[int(part)] = None
+            if len(ids) > limit:
+                return list(ids), invalid
+    return list(ids), invalid
+
+
+def send_bulk(db, company_id, user_id, student_ids, message):
+    """Запрошує багатьох студентів одним executemany; повертає [{'student_id', 'result'}].
+
+    result: 'sent', 'duplicate' (вже є pending-запрошення від цієї компанії),
+    'blocked' або 'not_found'. Транзакцією (BEGIN IMMEDIATE ... commit) керує
+    викликач, щоб перевірка дублікатів і вставка були атомарними.
+    """
+    if not student_ids:
+        return []
+    placeholders = ', '.join('?' for _ in student_ids)
+    statuses = dict(db.execute(f"""
+        SELECT s.id, u.status FROM students s JOIN users u ON s.user_id = u.id
+        WHERE s.id IN ({placeholders})
+    """, student_ids).fetchall())
+    pending = {row[0] for row in db.execute(f"""
+        SELECT student_id FROM invitations
+        WHERE student_id IN ({placeholders}) AND status = 'pending' AND company_id IS ?
+    """, [*student_ids, company_id])}
+
+    results, rows = [], []
+    for student_id in student_ids:
+        if student_id not in statuses:
+            result = 'not_found'
+        elif statuses[student_id] == 'blocked':
+            result = 'blocked'
+        elif student_id in pending:
+            result = 'duplicate'
+        else:
+            result = 'sent'
+            rows.append((student_id, company_id, user_id, message))
+        results.append({'student_id': student_id, 'result': result})
+
+    db.executemany("""
+        INSERT INTO invitations (student_id, company_id, user_id, message, status)
+        VALUES (?, ?, ?, ?, 'pending')
+    """, rows)
+    return results
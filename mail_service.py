@@ -0,0 +1,246 @@
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from email.message import EmailMessage
+
+# --- ПОШТОВІ СПОВІЩЕННЯ (transactional outbox) ---
+#
+# Маршрут не надсилає пошту сам: він лише додає лист у таблицю outbox у тій самій
+# транзакції, що й зміну запрошення (тож лист є тоді й лише тоді, коли зміна
+# закомічена). Фоновий воркер — потік у процесі або окремий процес
+# (flask mail-worker) — забирає листи порціями й передає їх відправнику,
+# повторюючи невдалі спроби з експоненційною затримкою.
+# Відправник задається явно (UKD_MAIL_SENDER): без нього воркер не запускається
+# і листи лишаються в outbox, а не позначаються надісланими в нікуди.
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 5.0      # секунд; далі 10, 20, 40 ...
+LEASE_SECONDS = 60.0        # скільки "взятий" лист недоступний іншим воркерам
+
+DEFAULT_FROM = 'no-reply@ukd.edu.ua'
+
+logger = logging.getLogger(__name__)
+
+
+# --- Запис у outbox (викликається всередині транзакції маршруту) ---
+
+def enqueue(db, recipient, subject, body):
+    """Додає лист у чергу. Не комітить — це робить маршрут разом зі своєю зміною."""
+    if not recipient:
+        return
+    db.execute("INSERT INTO outbox (recipient, subject, body) VALUES (?, ?, ?)", (recipient, subject, body))
+
+
+def notify_invited(db, company_id, student_ids, message):
+    """Листи студентам про нові запрошення від компанії (одне чи масове надсилання)."""
+    if not student_ids:
+        return
+    company = db.execute("SELECT company_name FROM companies WHERE id IS ?", (company_id,)).fetchone()
+    company_name = (company[0] if company else None) or 'Компанія'
+    placeholders = ', '.join('?' for _ in student_ids)
+    rows = db.execute(f"""
+        SELECT u.email, s.first_name FROM students s JOIN users u ON s.user_id = u.id
+        WHERE s.id IN ({placeholders}) AND u.email IS NOT NULL AND u.email != ''
+    """, list(student_ids)).fetchall()
+    db.executemany("INSERT INTO outbox (recipient, subject, body) VALUES (?, ?, ?)", [
+        (email, f"Нове запрошення від {company_name}",
+         f"Вітаємо, {first_name or 'студенте'}!\n\n{company_name} запрошує вас:\n\n{message}\n\n"
+         f"Відповісти можна у вкладці «Запрошення».")
+        for email, first_name in rows])
+
+
+def notify_response(db, invite_id, status):
+    """Лист компанії про відповідь студента на запрошення."""
+    row = db.execute("""
+        SELECT u.email, s.first_name, s.last_name
+        FROM invitations i
+        JOIN users u ON i.user_id = u.id
+        LEFT JOIN students s ON i.student_id = s.id
+        WHERE i.id = ?
+    """, (invite_id,)).fetchone()
+    if row is None:
+        return
+    email, first_name, last_name = row
+    verdict = 'прийняв(ла)' if status == 'accepted' else 'відхилив(ла)'
+    name = ' '.join(part for part in (last_name, first_name) if part) or 'Студент'
+    enqueue(db, email, f"{name} {verdict} ваше запрошення",
+            f"{name} {verdict} запрошення #{invite_id}.")
+
+
+# --- Відправники ---
+
+class ConsoleSender:
+    """Пише лист у журнал замість відправки — лише для розробки (UKD_MAIL_SENDER=console)."""
+
+    def send(self, recipient, subject, body):
+        logger.info("mail to %s: %s\n%s", recipient, subject, body)
+
+
+class FileSender:
+    """Складає листи .eml-файлами в каталог — заміна SMTP для тестів і локального запуску."""
+
+    def __init__(self, directory, sender=DEFAULT_FROM):
+        self.directory = directory
+        self.sender = sender
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, recipient, subject, body):
+        message = build_message(self.sender, recipient, subject, body)
+        name = f"{time.time():.6f}-{random.randrange(1 << 30):08x}.eml"
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(bytes(message))
+
+
+class SMTPSender:
+    """Справжня відправка через SMTP (з локальним `python -m aiosmtpd -n` теж працює)."""
+
+    def __init__(self, host='localhost', port=25, username=None, password=None, starttls=False,
+                 sender=DEFAULT_FROM, timeout=10):
+        self.host, self.port = host, port
+        self.username, self.password = username, password
+        self.starttls = starttls
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, recipient, subject, body):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(build_message(self.sender, recipient, subject, body))
+
+
+def build_message(sender, recipient, subject, body):
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = recipient
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
+
+
+def sender_from_env(environ=os.environ):
+    """UKD_MAIL_SENDER = smtp | file | console; не задано — None (листи чекають в outbox)."""
+    kind = environ.get('UKD_MAIL_SENDER')
+    if not kind:
+        return None
+    sender = environ.get('UKD_MAIL_FROM', DEFAULT_FROM)
+    if kind == 'file':
+        return FileSender(environ.get('UKD_MAIL_DIR', 'sent_mail'), sender=sender)
+    if kind == 'smtp':
+        return SMTPSender(host=environ.get('UKD_SMTP_HOST', 'localhost'),
+                          port=int(environ.get('UKD_SMTP_PORT', 25)),
+                          username=environ.get('UKD_SMTP_USER') or None,
+                          password=environ.get('UKD_SMTP_PASSWORD') or None,
+                          starttls=environ.get('UKD_SMTP_STARTTLS') == '1',
+                          sender=sender)
+    if kind == 'console':
+        return ConsoleSender()
+    raise ValueError(f"unknown UKD_MAIL_SENDER '{kind}' (expected smtp, file or console)")
+
+
+# --- Воркер ---
+
+class OutboxWorker:
+    def __init__(self, pool, sender, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS,
+                 base_delay=RETRY_BASE_DELAY, interval=5.0):
+        self.pool = pool
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0}
+
+    def _claim(self, db, now):
+        # Одним UPDATE ... RETURNING: листи "орендуються", і паралельний воркер їх не візьме
+        rows = db.execute("""
+            UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?
+            WHERE id IN (SELECT id FROM outbox WHERE status = 'pending' AND next_attempt_at <= ?
+                         ORDER BY next_attempt_at LIMIT ?)
+            RETURNING id, recipient, subject, body, attempts
+        """, (now + LEASE_SECONDS, now, self.batch_size)).fetchall()
+        db.commit()
+        return rows
+
+    def retry_delay(self, attempts):
+        return self.base_delay * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+
+    def drain_once(self):
+        """Одна порція: взяти, надіслати, записати результати. Повертає кількість узятих листів."""
+        db = self.pool.acquire()
+        try:
+            batch = self._claim(db, time.time())
+            if not batch:
+                return 0
+            sent, retry, failed = [], [], []
+            for outbox_id, recipient, subject, body, attempts in batch:
+                try:
+                    self.sender.send(recipient, subject, body)
+                except Exception as e:  # будь-яка помилка відправника — це просто невдала спроба
+                    error = f"{type(e).__name__}: {e}"[:500]
+                    if attempts >= self.max_attempts:
+                        failed.append((error, outbox_id))
+                    else:
+                        retry.append((time.time() + self.retry_delay(attempts), error, outbox_id))
+                else:
+                    sent.append((outbox_id,))
+            db.executemany("UPDATE outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL "
+                           "WHERE id = ?", sent)
+            db.executemany("UPDATE outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?", retry)
+            db.executemany("UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?", failed)
+            db.commit()
+            self.stats['sent'] += len(sent)
+            self.stats['retried'] += len(retry)
+            self.stats['failed'] += len(failed)
+            self.stats['batches'] += 1
+            return len(batch)
+        finally:
+            self.pool.release(db)
+
+    def drain(self):
+        """Розвантажує все, що готове до відправки зараз."""
+        total = 0
+        while True:
+            taken = self.drain_once()
+            total += taken
+            if taken < self.batch_size:
+                return total
+
+    def wake(self):
+        """Маршрут щойно закомітив лист — не чекати наступного інтервалу."""
+        self._wake.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except sqlite3.Error:
+                logger.exception("outbox drain failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='outbox-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def queue_stats(db):
+    return dict(db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
@@ -0,0 +1,324 @@
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # рушій підбору необов'язковий: без NumPy ендпоінт просто недоступний
+    np = None
+
+# --- ПІДБІР КАНДИДАТІВ ДЛЯ КОМПАНІЇ (TF-IDF) ---
+#
+# Профіль кожного студента — розріджений TF-IDF вектор (навички, спеціальність,
+# курс), а вся база — одна розріджена матриця у NumPy-масивах, збережена
+# по стовпцях (термін -> студенти). Запит компанії (посада + опис) векторизується
+# тим самим словником, і оцінки для всіх студентів рахуються одним np.bincount
+# над ваговими списками лише тих термінів, що є в запиті.
+# Зміни окремих профілів складаються в невелику "дельту" поверх основної
+# матриці; коли її стає забагато, матриця перебудовується повністю.
+# Повна перебудова (для великої бази — секунди) іде у фоновому потоці на власному
+# з'єднанні, не більше однієї на раз: запити тим часом рахуються по старій матриці,
+# а зміни профілів, що прийшли під час перебудови, накладаються на нову як дельта.
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+COURSE_RE = re.compile(r'(\d)\s*(?:-?\s*(?:й|го|ий))?\s*курс', re.IGNORECASE)
+
+# Вага полів профілю: навички важать більше, ніж слова зі спеціальності
+FIELD_WEIGHTS = {'skills': 2.0, 'specialty': 1.0, 'course': 0.5}
+
+STUDENTS_QUERY = """
+    SELECT s.id, s.skills, s.specialty, s.course
+    FROM students s JOIN users u ON s.user_id = u.id
+    WHERE u.status != 'blocked'
+"""
+
+
+def available():
+    return np is not None
+
+
+def tokenize(text):
+    return [t.lower() for t in TOKEN_RE.findall(text or '') if len(t) > 1 or t.isdigit()]
+
+
+def student_terms(skills, specialty, course):
+    """{термін: вага} для профілю студента."""
+    terms = {}
+    for field, tokens in (('skills', tokenize(skills)), ('specialty', tokenize(specialty))):
+        for token in tokens:
+            terms[token] = terms.get(token, 0.0) + FIELD_WEIGHTS[field]
+    if course not in (None, ''):
+        terms[f"course:{course}"] = FIELD_WEIGHTS['course']
+    return terms
+
+
+def company_terms(position, description):
+    text = f"{position or ''} {description or ''}"
+    terms = {}
+    for token in tokenize(text):
+        terms[token] = terms.get(token, 0.0) + 1.0
+    for course in COURSE_RE.findall(text):
+        terms[f"course:{course}"] = 1.0
+    return terms
+
+
+logger = logging.getLogger(__name__)
+
+
+def _weights(vocab, idf, terms):
+    indices, data = [], []
+    for term, tf in terms.items():
+        col = vocab.get(term)
+        if col is None:
+            continue
+        indices.append(col)
+        data.append(math.log1p(tf) * float(idf[col]))
+    norm = math.sqrt(sum(v * v for v in data)) or 1.0
+    return indices, [v / norm for v in data]
+
+
+class MatchingEngine:
+    def __init__(self, database=None, max_delta=2000, max_age=600):
+        # database — для фонової перебудови; без нього застаріла матриця просто лишається
+        self.database = database
+        self.max_delta = max_delta
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Тримається, поки йде повна перебудова (у будь-якому потоці)
+        self._build_lock = threading.Lock()
+        # {student_id: терміни або None} — зміни профілів під час перебудови
+        self._pending = None
+        self.built_at = None
+        self._reset()
+
+    def _reset(self):
+        self.vocab = {}
+        self.idf = np.zeros(0, dtype=np.float32) if np is not None else None
+        self.n_docs = 0
+        self.row_ids = None
+        self.alive = None
+        self.position = {}
+        self.main = None
+        self.delta = {}
+        self._delta_csr = None
+
+    # --- Побудова ---
+
+    def _vectorize(self, terms, grow):
+        """Розріджений рядок (indices, data), L2-нормований. grow=True додає нові терміни в словник."""
+        if grow:
+            for term in terms:
+                if term not in self.vocab:
+                    self._add_term(term)
+        return _weights(self.vocab, self.idf, terms)
+
+    def _add_term(self, term):
+        # Новий термін між повними перебудовами: idf як для терміна, що трапився один раз
+        col = len(self.vocab)
+        self.vocab[term] = col
+        self.idf = np.append(self.idf, np.float32(math.log((1 + self.n_docs) / 2) + 1))
+        return col
+
+    @staticmethod
+    def _csr(rows):
+        lengths = np.fromiter((len(ind) for ind, _ in rows), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter((c for ind, _ in rows for c in ind), dtype=np.int32, count=int(indptr[-1]))
+        data = np.fromiter((v for _, dat in rows for v in dat), dtype=np.float32, count=int(indptr[-1]))
+        return indptr, indices, data
+
+    @staticmethod
+    def _csc(csr, n_terms):
+        """Транспонує CSR у формат "термін -> (рядки, ваги)" для швидкого скорингу."""
+        indptr, indices, data = csr
+        rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+        order = np.argsort(indices, kind='stable')
+        col_indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=n_terms), out=col_indptr[1:])
+        return col_indptr, rows[order], data[order], len(indptr) - 1
+
+    def build(self, db):
+        """Повна перебудова в поточному потоці (чекає, якщо вже йде інша)."""
+        if np is None:
+            raise RuntimeError("NumPy is required for candidate matching")
+        with self._build_lock:
+            self._build(db)
+
+    def _build(self, db):
+        with self._lock:
+            self._pending = {}
+        try:
+            state = self._load(db)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        vocab, idf, n_docs, main, row_ids, position = state
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._reset()
+            self.vocab, self.idf, self.n_docs = vocab, idf, n_docs
+            self.main, self.row_ids, self.position = main, row_ids, position
+            self.alive = np.ones(n_docs, dtype=bool)
+            # Нова матриця прочитана до цих змін — накладаємо їх зверху
+            for student_id, terms in pending.items():
+                self._drop(student_id)
+                if terms is not None:
+                    self.delta[student_id] = self._vectorize(terms, grow=True)
+            self.built_at = time.monotonic()
+
+    def _load(self, db):
+        """Читає профілі й рахує нову матрицю, не блокуючи запити до поточної."""
+        docs = []
+        doc_freq = {}
+        for student_id, skills, specialty, course in db.execute(STUDENTS_QUERY):
+            terms = student_terms(skills, specialty, course)
+            docs.append((student_id, terms))
+            for term in terms:
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+
+        vocab = {term: col for col, term in enumerate(doc_freq)}
+        n_docs = len(docs)
+        idf = np.array([math.log((1 + n_docs) / (1 + doc_freq[t])) + 1 for t in vocab], dtype=np.float32)
+
+        rows = [_weights(vocab, idf, terms) for _, terms in docs]
+        return (vocab, idf, n_docs, self._csc(self._csr(rows), len(vocab)),
+                np.array([sid for sid, _ in docs], dtype=np.int64),
+                {sid: pos for pos, (sid, _) in enumerate(docs)})
+
+    def ensure_built(self, db):
+        if self.built_at is None:
+            # Перший запит чекає на побудову; одночасні з ним — на ту саму, а не на свою
+            with self._build_lock:
+                if self.built_at is None:
+                    self._build(db)
+        elif time.monotonic() - self.built_at > self.max_age:
+            self.refresh()
+
+    def refresh(self):
+        """Запускає фонову перебудову, якщо вона ще не йде; запити тим часом бачать стару матрицю."""
+        if self.database is None or np is None or not self._build_lock.acquire(blocking=False):
+            return False
+        try:
+            threading.Thread(target=self._refresh, name='ukd-matcher', daemon=True).start()
+        except BaseException:
+            self._build_lock.release()
+            raise
+        return True
+
+    def _refresh(self):
+        try:
+            db = sqlite3.connect(self.database)
+            try:
+                self._build(db)
+            finally:
+                db.close()
+        except Exception:
+            logger.exception("matching index rebuild failed")
+        finally:
+            self._build_lock.release()
+
+    # --- Інкрементальні оновлення ---
+
+    def update_student(self, db, student_id):
+        """Перераховує вектор одного студента після зміни його профілю."""
+        if self.built_at is None and self._pending is None:
+            return
+        row = db.execute(STUDENTS_QUERY + " AND s.id = ?", (student_id,)).fetchone()
+        terms = student_terms(row[1], row[2], row[3]) if row is not None else None
+        with self._lock:
+            if self._pending is not None:
+                self._pending[student_id] = terms
+            if self.built_at is None:
+                return
+            self._drop(student_id)
+            if terms is not None:
+                self.delta[student_id] = self._vectorize(terms, grow=True)
+            self._delta_csr = None
+            needs_rebuild = len(self.delta) > self.max_delta
+        if needs_rebuild:
+            self.refresh()
+
+    def remove_student(self, student_id):
+        with self._lock:
+            if self._pending is not None:
+                self._pending[student_id] = None
+            if self.built_at is None:
+                return
+            self._drop(student_id)
+            self._delta_csr = None
+
+    def _drop(self, student_id):
+        pos = self.position.get(student_id)
+        if pos is not None:
+            self.alive[pos] = False
+        self.delta.pop(student_id, None)
+
+    # --- Запити ---
+
+    @staticmethod
+    def _main_scores(csc, q_indices, q_data):
+        # Читаються лише "постинги" термінів із запиту, а не вся матриця
+        col_indptr, rows, data, n_rows = csc
+        spans = [(col_indptr[c], col_indptr[c + 1], w) for c, w in zip(q_indices, q_data) if c < len(col_indptr) - 1]
+        if not spans:
+            return np.zeros(n_rows, dtype=np.float32)
+        hit_rows = np.concatenate([rows[a:b] for a, b, _ in spans])
+        weights = np.concatenate([data[a:b] * np.float32(w) for a, b, w in spans])
+        return np.bincount(hit_rows, weights=weights, minlength=n_rows).astype(np.float32)
+
+    @staticmethod
+    def _scores(csr, query):
+        indptr, indices, data = csr
+        if len(data) == 0:
+            return np.zeros(len(indptr) - 1, dtype=np.float32)
+        # Додатковий нуль у кінці, щоб початок порожнього останнього рядка був валідним індексом;
+        # reduceat для порожніх рядків повертає чуже значення — їх обнуляємо
+        products = np.append(data * query[indices], np.float32(0))
+        sums = np.add.reduceat(products, indptr[:-1])
+        sums[indptr[1:] == indptr[:-1]] = 0.0
+        return sums
+
+    def top_k(self, position, description, k=20):
+        """[(student_id, оцінка)] — найкращі k студентів для тексту вакансії."""
+        with self._lock:
+            if self.main is None:
+                return []
+            q_indices, q_data = self._vectorize(company_terms(position, description), grow=False)
+            if not q_indices:
+                return []
+            query = np.zeros(len(self.vocab), dtype=np.float32)
+            query[q_indices] = q_data
+
+            scores = self._main_scores(self.main, q_indices, q_data)
+            scores = np.where(self.alive, scores, 0.0)
+            ids = self.row_ids
+            if self.delta:
+                if self._delta_csr is None:
+                    delta_ids = list(self.delta)
+                    self._delta_csr = (np.array(delta_ids, dtype=np.int64),
+                                       self._csr([self.delta[sid] for sid in delta_ids]))
+                delta_ids, delta_csr = self._delta_csr
+                scores = np.concatenate([scores, self._scores(delta_csr, query)])
+                ids = np.concatenate([ids, delta_ids])
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+    def stats(self):
+        return {
+            'available': np is not None,
+            'students': int(self.alive.sum()) + len(self.delta) if self.alive is not None else 0,
+            'delta': len(self.delta),
+            'vocabulary': len(self.vocab),
+            'nnz': int(len(self.main[1])) if self.main is not None else 0,
+            'age_seconds': round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+        }
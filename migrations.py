@@ -0,0 +1,423 @@
+import re
+import sqlite3
+
+# --- МІГРАЦІЇ СХЕМИ (PRAGMA user_version) ---
+#
+# Кожна міграція — це (версія, назва, функція). Версії йдуть строго по зростанню,
+# а номер останньої застосованої міграції зберігається в PRAGMA user_version.
+# Функції мають бути ідемпотентними: стара БД могла вже мати частину колонок.
+# Міграції "заморожені": вони не викликають код додатка (invites, skills,
+# rating_engine), а містять SQL у тому вигляді, який був на момент своєї версії,
+# тож нова й давно оновлена БД приходять до однакового стану.
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def decorator(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+def table_columns(db, table):
+    return {row[1] for row in db.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def add_column(db, table, column, definition):
+    if column not in table_columns(db, table):
+        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+@migration(1, 'base schema')
+def base_schema(db):
+    # 1. Users
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            email TEXT,
+            role TEXT NOT NULL DEFAULT 'STUDENT',
+            status TEXT DEFAULT 'active'
+        )
+    ''')
+
+    # 2. Students
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            first_name TEXT,
+            last_name TEXT,
+            patronymic TEXT,
+            course TEXT,
+            specialty TEXT,
+            skills TEXT,
+            links TEXT,
+            contact_info TEXT,
+            rating INTEGER DEFAULT 0,
+            avatar TEXT DEFAULT 'https://cdn-icons-png.flaticon.com/512/354/354637.png',
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # 3. Companies
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS companies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            company_name TEXT,
+            description TEXT,
+            avatar TEXT DEFAULT 'https://cdn-icons-png.flaticon.com/512/3061/3061341.png',
+            position TEXT,
+            contact_info TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # 4. Admins
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            admin_level INTEGER DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # 5. Invitations
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS invitations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            company_id INTEGER,
+            user_id INTEGER,
+            message TEXT,
+            status TEXT DEFAULT 'pending',
+            flagged BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (company_id) REFERENCES companies (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # Колонки, яких не було в ранніх версіях БД
+    for col in ['patronymic', 'course', 'contact_info']:
+        add_column(db, 'students', col, 'TEXT')
+    add_column(db, 'students', 'rating', 'INTEGER DEFAULT 0')
+
+    for col in ['avatar', 'position', 'contact_info']:
+        add_column(db, 'companies', col, 'TEXT')
+
+    add_column(db, 'invitations', 'flagged', 'BOOLEAN DEFAULT 0')
+    add_column(db, 'users', 'status', "TEXT DEFAULT 'active'")
+
+
+@migration(2, 'default admin')
+def default_admin(db):
+    if db.execute("SELECT id FROM users WHERE username = 'admin'").fetchone():
+        return
+    cur = db.execute("INSERT INTO users (username, password, email, role) VALUES (?, ?, ?, ?)",
+                     ('admin', '123', 'admin@ukd.edu.ua', 'ADMIN'))
+    db.execute("INSERT INTO admins (user_id, admin_level) VALUES (?, ?)", (cur.lastrowid, 10))
+
+
+@migration(3, 'students full-text index')
+def students_fts(db):
+    # External-content FTS5: індекс зберігає лише токени, дані лишаються в students
+    db.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            first_name, last_name, skills, specialty,
+            content='students', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts (rowid, first_name, last_name, skills, specialty)
+            VALUES (new.id, new.first_name, new.last_name, new.skills, new.specialty);
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, first_name, last_name, skills, specialty)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.skills, old.specialty);
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_au
+        AFTER UPDATE OF first_name, last_name, skills, specialty ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, first_name, last_name, skills, specialty)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.skills, old.specialty);
+            INSERT INTO students_fts (rowid, first_name, last_name, skills, specialty)
+            VALUES (new.id, new.first_name, new.last_name, new.skills, new.specialty);
+        END
+    ''')
+    db.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+
+
+@migration(4, 'non-null student ratings')
+def non_null_ratings(db):
+    # Курсор пагінації порівнює (rating, id), тож NULL-рейтинги ламали б порядок
+    db.execute("UPDATE students SET rating = 0 WHERE rating IS NULL")
+
+
+@migration(5, 'secondary indexes for hot queries')
+def hot_query_indexes(db):
+    # Рейтинг: сортування за (rating, id), окремо з фільтром за курсом / спеціальністю.
+    # Ці ж індекси покривають SELECT DISTINCT course / specialty для фільтрів.
+    db.execute("CREATE INDEX IF NOT EXISTS idx_students_rating ON students (rating, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_students_course_rating ON students (course, rating, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_students_specialty_rating ON students (specialty, rating, id)")
+    # Бейдж "очікує" у студента
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_student_status ON invitations (student_id, status)")
+    # Вхідні компанії та панель адміністратора
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_user_created ON invitations (user_id, created_at)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_created ON invitations (created_at)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_company ON invitations (company_id)")
+
+
+@migration(6, 'ranking facets index')
+def facets_index(db):
+    # Покриває GROUP BY course, specialty для фасетів фільтра без читання рядків таблиці
+    db.execute("CREATE INDEX IF NOT EXISTS idx_students_facets ON students (course, specialty, user_id)")
+
+
+@migration(7, 'student invitation counters')
+def invitation_counters(db):
+    add_column(db, 'invitations', 'is_read', 'BOOLEAN DEFAULT 0')
+    add_column(db, 'students', 'pending_invites', 'INTEGER NOT NULL DEFAULT 0')
+    add_column(db, 'students', 'unread_invites', 'INTEGER NOT NULL DEFAULT 0')
+    # Старі запрошення вважаємо прочитаними, щоб не засипати студентів "новими"
+    db.execute("UPDATE invitations SET is_read = 1")
+
+    # Лічильники підтримуються тригерами, тож будь-який шлях запису (send_invite,
+    # respond_invite, delete_invite, admin_delete_user) оновлює їх у тій самій транзакції
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS invitations_counters_ai AFTER INSERT ON invitations BEGIN
+            UPDATE students
+            SET pending_invites = pending_invites + (new.status = 'pending'),
+                unread_invites = unread_invites + (COALESCE(new.is_read, 0) = 0)
+            WHERE id = new.student_id;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS invitations_counters_ad AFTER DELETE ON invitations BEGIN
+            UPDATE students
+            SET pending_invites = pending_invites - (old.status = 'pending'),
+                unread_invites = unread_invites - (COALESCE(old.is_read, 0) = 0)
+            WHERE id = old.student_id;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS invitations_counters_au
+        AFTER UPDATE OF status, is_read, student_id ON invitations BEGIN
+            UPDATE students
+            SET pending_invites = pending_invites - (old.status = 'pending'),
+                unread_invites = unread_invites - (COALESCE(old.is_read, 0) = 0)
+            WHERE id = old.student_id;
+            UPDATE students
+            SET pending_invites = pending_invites + (new.status = 'pending'),
+                unread_invites = unread_invites + (COALESCE(new.is_read, 0) = 0)
+            WHERE id = new.student_id;
+        END
+    ''')
+    db.execute("""
+        UPDATE students SET
+            pending_invites = (SELECT COUNT(*) FROM invitations i
+                               WHERE i.student_id = students.id AND i.status = 'pending'),
+            unread_invites = (SELECT COUNT(*) FROM invitations i
+                              WHERE i.student_id = students.id AND i.is_read = 0)
+    """)
+
+
+# Розбір тексту навичок так, як він працював у версії 8
+V8_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _v8_skill_names(text):
+    names, seen = [], set()
+    for part in (text or '').split(','):
+        name = V8_WHITESPACE_RE.sub(' ', part).strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+@migration(8, 'normalized student skills')
+def student_skills(db):
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            slug TEXT NOT NULL UNIQUE
+        )
+    ''')
+    # Первинний ключ (skill_id, student_id) — це й є інвертований індекс "навичка -> студенти"
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS student_skills (
+            skill_id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (skill_id, student_id),
+            FOREIGN KEY (skill_id) REFERENCES skills (id),
+            FOREIGN KEY (student_id) REFERENCES students (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    db.execute("CREATE INDEX IF NOT EXISTS idx_student_skills_student ON student_skills (student_id, position)")
+    for student_id, text in db.execute("SELECT id, skills FROM students WHERE skills IS NOT NULL AND skills != ''").fetchall():
+        names = _v8_skill_names(text)
+        db.executemany("INSERT OR IGNORE INTO skills (name, slug) VALUES (?, ?)",
+                       [(name, name.lower()) for name in names])
+        db.execute("DELETE FROM student_skills WHERE student_id = ?", (student_id,))
+        db.executemany("""
+            INSERT OR IGNORE INTO student_skills (skill_id, student_id, position)
+            SELECT id, ?, ? FROM skills WHERE slug = ?
+        """, [(student_id, position, name.lower()) for position, name in enumerate(names)])
+
+
+@migration(9, 'admin users table indexes')
+def admin_users_indexes(db):
+    # Фільтри й сортування таблиці користувачів в адмінці: (ключ, id) — як у курсора
+    db.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users (role, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_users_status ON users (status, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users (IFNULL(email, ''), id)")
+
+
+@migration(10, 'admin invitations panel')
+def admin_invitations_panel(db):
+    # Підсумки по статусах для шапки адмін-панелі — так само тригерами, як і лічильники студентів
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS invitation_totals (
+            status TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            flagged INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS invitation_totals_ai AFTER INSERT ON invitations BEGIN
+            INSERT OR IGNORE INTO invitation_totals (status) VALUES (new.status);
+            UPDATE invitation_totals
+            SET total = total + 1, flagged = flagged + (COALESCE(new.flagged, 0) != 0)
+            WHERE status = new.status;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS invitation_totals_ad AFTER DELETE ON invitations BEGIN
+            UPDATE invitation_totals
+            SET total = total - 1, flagged = flagged - (COALESCE(old.flagged, 0) != 0)
+            WHERE status = old.status;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS invitation_totals_au AFTER UPDATE OF status, flagged ON invitations BEGIN
+            UPDATE invitation_totals
+            SET total = total - 1, flagged = flagged - (COALESCE(old.flagged, 0) != 0)
+            WHERE status = old.status;
+            INSERT OR IGNORE INTO invitation_totals (status) VALUES (new.status);
+            UPDATE invitation_totals
+            SET total = total + 1, flagged = flagged + (COALESCE(new.flagged, 0) != 0)
+            WHERE status = new.status;
+        END
+    ''')
+    db.execute("DELETE FROM invitation_totals")
+    db.execute("""
+        INSERT INTO invitation_totals (status, total, flagged)
+        SELECT status, COUNT(*), SUM(COALESCE(flagged, 0) != 0)
+        FROM invitations WHERE status IS NOT NULL
+        GROUP BY status
+    """)
+
+    # Фільтри панелі + keyset-порядок (created_at, id); позначені — маленький частковий індекс
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_status_created ON invitations (status, created_at, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_flagged_created ON invitations (created_at, id) WHERE flagged = 1")
+    db.execute("DROP INDEX IF EXISTS idx_invitations_company")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_invitations_company_created ON invitations (company_id, created_at, id)")
+
+
+@migration(11, 'mail outbox')
+def mail_outbox(db):
+    # Листи пишуться в ту саму транзакцію, що й зміна запрошення; надсилає їх mail_service
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    ''')
+    db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (next_attempt_at) WHERE status = 'pending'")
+
+
+# Формула балів рейтингу версії 12 (rating_engine.SCORE_SQL могла змінитися пізніше)
+V12_SCORE_SQL = """
+    ((IFNULL(first_name, '') != '') + (IFNULL(last_name, '') != '') + (IFNULL(patronymic, '') != '')
+     + (IFNULL(course, '') != '') + (IFNULL(specialty, '') != '') + (IFNULL(skills, '') != '')
+     + (IFNULL(links, '') != '') + (IFNULL(contact_info, '') != '')) * 5
+    + MIN((SELECT COUNT(*) FROM student_skills ss WHERE ss.student_id = students.id), 10) * 2
+    + MIN((SELECT COUNT(*) FROM invitations i WHERE i.student_id = students.id), 10) * 2
+    + MIN((SELECT COUNT(*) FROM invitations i WHERE i.student_id = students.id AND i.status = 'accepted'), 4) * 5
+    + IFNULL(MAX(0, 10 - 10 * (julianday('now') - julianday(COALESCE(
+          MAX(profile_updated_at, (SELECT MAX(i.created_at) FROM invitations i WHERE i.student_id = students.id)),
+          profile_updated_at,
+          (SELECT MAX(i.created_at) FROM invitations i WHERE i.student_id = students.id))))
+          / 180), 0)
+"""
+
+
+@migration(12, 'automatic student rating')
+def automatic_rating(db):
+    add_column(db, 'students', 'rating_bonus', 'INTEGER NOT NULL DEFAULT 0')
+    add_column(db, 'students', 'profile_updated_at', 'TIMESTAMP')
+    # Рейтинги, виставлені адміном вручну, стають поправкою поверх обчислених балів:
+    # rating_bonus = rating - бали, тож поточний рейтинг не змінюється (NULL — лише бали).
+    # Один UPDATE: обидва вирази бачать старий rating і той самий 'now'
+    db.execute(f"""
+        UPDATE students SET
+            rating_bonus = IFNULL(rating - CAST(ROUND({V12_SCORE_SQL}) AS INTEGER), 0),
+            rating = IFNULL(rating, CAST(ROUND({V12_SCORE_SQL}) AS INTEGER))
+    """)
+
+
+def current_version(db):
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migration_status(db):
+    """Повертає (applied, pending) — списки пар (версія, назва)."""
+    version = current_version(db)
+    applied = [(v, name) for v, name, _ in MIGRATIONS if v <= version]
+    pending = [(v, name) for v, name, _ in MIGRATIONS if v > version]
+    return applied, pending
+
+
+def migrate(db):
+    """Застосовує всі нові міграції по черзі, кожну у власній транзакції."""
+    applied = []
+    for version, name, fn in MIGRATIONS:
+        if version <= current_version(db):
+            continue
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # Інший процес міг встигнути застосувати цю міграцію, поки ми чекали на lock
+            if version <= current_version(db):
+                db.rollback()
+                continue
+            fn(db)
+            db.execute(f"PRAGMA user_version = {int(version)}")
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+        applied.append((version, name))
+    return applied
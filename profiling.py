@@ -0,0 +1,401 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request, before_render_template, template_rendered
+
+# --- ПРОФІЛЮВАННЯ ЗАПИТІВ І МЕТРИКИ ---
+#
+# З'єднання з get_db() обгортається: кожен SQL-вираз рахується, а час і кількість
+# рядків накопичуються разом із часом вибірки з курсора (SQLite виконує запит
+# ліниво, під час fetch). Час рендеру шаблону береться з сигналів Flask — без
+# SQL, виконаного всередині шаблону (напр. ліниві запити з генераторів).
+# Підсумок запиту йде в гістограми (формат Prometheus на /metrics) і в
+# заголовок Server-Timing, який видно у вкладці Network браузера.
+# Метрики живуть у пам'яті процесу: кожен воркер віддає свої.
+# Вирази запиту групуються за текстом SQL (не більше MAX_STATEMENTS різних), і
+# параметри зберігаються лише для найповільнішого виконання кожного — для
+# executemany це перший рядок і кількість рядків, а не весь список (імпорт CSV).
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+ITER_BATCH = 256
+
+# Скільки різних SQL-текстів тримає профіль одного запиту; решта йде лише в лічильники
+MAX_STATEMENTS = 200
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        # Значення на межі кошика потрапляє в нього (le — "менше або дорівнює")
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labels, (counts, total, count) in series:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = 'le="{}"'.format(bound if bound == '+Inf' else _format_value(bound))
+                lines.append(f"{self.name}_bucket{{{','.join(pairs + [le])}}} {cumulative}")
+            label_text = '{' + ','.join(pairs) + '}' if pairs else ''
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            pairs = ','.join(f'{name}="{_escape(v)}"' for name, v in zip(self.labelnames, labels))
+            lines.append(f"{self.name}{{{pairs}}} {value}")
+        return lines
+
+
+class RequestProfile:
+    """Лічильники одного запиту; живе в g._profile від before_request до закриття відповіді."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.sql_rows = 0
+        self.render_time = 0.0
+        # Очікування потоку-письменника (write_queue), разом із чергою й COMMIT; SQL самої
+        # функції запису письменник теж рахує сюди (sql_*), тож write його перекриває
+        self.write_time = 0.0
+        # {sql: Statement}
+        self.statements = {}
+        self._render_started = []
+
+    def add_sql(self, elapsed, rows=0):
+        self.sql_time += elapsed
+        self.sql_rows += rows
+
+    def statement(self, sql):
+        """Група для тексту SQL; None, якщо запит уже виконав MAX_STATEMENTS різних виразів."""
+        statement = self.statements.get(sql)
+        if statement is None and len(self.statements) < MAX_STATEMENTS:
+            statement = self.statements[sql] = Statement(sql)
+        return statement
+
+    def merge(self, other):
+        """Додає SQL іншого профілю (напр. функції, виконаної потоком-письменником)."""
+        self.sql_count += other.sql_count
+        self.add_sql(other.sql_time, other.sql_rows)
+        for sql, source in other.statements.items():
+            statement = self.statement(sql)
+            if statement is None:
+                continue
+            statement.count += source.count
+            statement.elapsed += source.elapsed
+            statement.rows += source.rows
+            if source.max_elapsed > statement.max_elapsed:
+                statement.max_elapsed = source.max_elapsed
+                statement.parameters, statement.many, statement.batch = source.parameters, source.many, source.batch
+
+    def server_timing(self):
+        parts = [f'sql;desc="{self.sql_count} queries, {self.sql_rows} rows";dur={self.sql_time * 1000:.2f}']
+        if self.write_time:
+            parts.append(f'write;dur={self.write_time * 1000:.2f}')
+        if self.render_time:
+            parts.append(f'render;dur={self.render_time * 1000:.2f}')
+        parts.append(f'app;dur={(time.perf_counter() - self.started) * 1000:.2f}')
+        return ', '.join(parts)
+
+
+class Statement:
+    """SQL-вираз запиту: кількість виконань, сумарний і найбільший час, рядки (з вибіркою).
+
+    parameters/many/batch — найповільнішого виконання (для EXPLAIN у журналі повільних
+    запитів); для executemany parameters — перший рядок, batch — скільки їх було.
+    """
+
+    __slots__ = ('sql', 'count', 'elapsed', 'rows', 'max_elapsed', 'parameters', 'many', 'batch')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.elapsed = 0.0
+        self.rows = 0
+        self.max_elapsed = 0.0
+        self.parameters = ()
+        self.many = False
+        self.batch = 0
+
+
+class _Batch:
+    """Рядки для executemany: пропускає їх у SQLite, запам'ятовуючи лише перший і кількість."""
+
+    __slots__ = ('_rows', 'first', 'count')
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.first = ()
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            if not self.count:
+                self.first = row
+            self.count += 1
+            yield row
+
+
+class InstrumentedCursor:
+    """Курсор, що додає час виконання й вибірки та кількість рядків до профілю запиту."""
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+        # Профіль тримає лише Statement, а не сам курсор: незакритий курсор SQLite
+        # тримав би відкритою транзакцію читання до кінця запиту
+        self.statement = None
+        # Поточне виконання: час (з вибіркою) і його параметри
+        self._elapsed = 0.0
+        self._sample = None
+
+    def _started(self, sql, parameters, elapsed, many=False, batch=0):
+        # Для INSERT/UPDATE/DELETE — змінені рядки; для SELECT rowcount = -1, рядки рахує вибірка
+        affected = max(self._cursor.rowcount, 0)
+        self._profile.sql_count += 1
+        self._profile.add_sql(elapsed, affected)
+        self.statement = self._profile.statement(sql)
+        self._elapsed, self._sample = 0.0, (parameters, many, batch)
+        if self.statement is not None:
+            self.statement.count += 1
+            self._add(elapsed, affected)
+
+    def _fetched(self, elapsed, rows):
+        if self.statement is not None:
+            self._add(elapsed, rows)
+        self._profile.add_sql(elapsed, rows)
+
+    def _add(self, elapsed, rows):
+        statement = self.statement
+        statement.elapsed += elapsed
+        statement.rows += rows
+        self._elapsed += elapsed
+        if self._elapsed > statement.max_elapsed:
+            statement.max_elapsed = self._elapsed
+            statement.parameters, statement.many, statement.batch = self._sample
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        self._cursor.execute(sql, parameters)
+        self._started(sql, parameters, time.perf_counter() - started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        batch = _Batch(seq_of_parameters)
+        started = time.perf_counter()
+        self._cursor.executemany(sql, batch)
+        self._started(sql, batch.first, time.perf_counter() - started, many=True, batch=batch.count)
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(time.perf_counter() - started, int(row is not None))
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._fetched(time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(time.perf_counter() - started, len(rows))
+        return rows
+
+    def __iter__(self):
+        # Порціями, щоб не міряти час на кожен рядок
+        while True:
+            rows = self.fetchmany(ITER_BATCH)
+            if not rows:
+                return
+            yield from rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Обгортка з'єднання з пулу: execute/executemany повертають InstrumentedCursor."""
+
+    def __init__(self, conn, profile):
+        self._conn = conn
+        self._profile = profile
+
+    def execute(self, sql, parameters=()):
+        cursor = InstrumentedCursor(None, self._profile)
+        started = time.perf_counter()
+        # Через execute самого з'єднання — щоб лишилися повтори при "database is locked"
+        cursor._cursor = self._conn.execute(sql, parameters)
+        cursor._started(sql, parameters, time.perf_counter() - started)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        batch = _Batch(seq_of_parameters)
+        cursor = InstrumentedCursor(None, self._profile)
+        started = time.perf_counter()
+        cursor._cursor = self._conn.executemany(sql, batch)
+        cursor._started(sql, batch.first, time.perf_counter() - started, many=True, batch=batch.count)
+        return cursor
+
+    def cursor(self):
+        return InstrumentedCursor(self._conn.cursor(), self._profile)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            self._profile.add_sql(time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class Profiler:
+    def __init__(self, app=None, tabs=(), enabled=True):
+        self.tabs = set(tabs)
+        self.enabled = enabled
+        self.request_duration = Histogram(
+            'ukd_request_duration_seconds', 'Total handler time including streamed body.', ['endpoint', 'tab'])
+        self.sql_duration = Histogram(
+            'ukd_request_sql_duration_seconds', 'SQL time per request (execute + fetch + commit).',
+            ['endpoint', 'tab'])
+        self.sql_statements = Histogram(
+            'ukd_request_sql_statements', 'SQL statements per request.', ['endpoint', 'tab'], COUNT_BUCKETS)
+        self.sql_rows = Histogram(
+            'ukd_request_sql_rows', 'Rows fetched or changed per request.', ['endpoint', 'tab'], ROW_BUCKETS)
+        self.render_duration = Histogram(
+            'ukd_template_render_duration_seconds', 'Template render time excluding SQL inside it.', ['template'])
+        self.responses = Counter('ukd_responses_total', 'Responses by endpoint and status.', ['endpoint', 'status'])
+        # Слухачі завершених запитів: fn(profile, labels) — напр. журнал повільних запитів
+        self.listeners = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+    def wrap(self, conn):
+        """Обгортає з'єднання для поточного запиту; поза запитом або з вимкненим профілюванням — як є."""
+        profile = g.get('_profile')
+        if profile is None:
+            return conn
+        wrapped = g.get('_profiled_db')
+        if wrapped is None or wrapped._conn is not conn:
+            wrapped = g._profiled_db = InstrumentedConnection(conn, profile)
+        return wrapped
+
+    def labels(self):
+        # Без префікса blueprint ("ukd.index" -> "index"): мітки метрик не залежать від реєстрації маршрутів
+        endpoint = (request.endpoint or 'unknown').rpartition('.')[2]
+        tab = ''
+        if endpoint == 'index':
+            tab = request.args.get('tab', 'home')
+            if tab not in self.tabs:
+                tab = 'other'
+        return endpoint, tab
+
+    def before_request(self):
+        if self.enabled:
+            g._profile = RequestProfile()
+
+    def after_request(self, response):
+        profile = g.get('_profile')
+        if profile is None:
+            return response
+        response.headers['Server-Timing'] = profile.server_timing()
+        labels = self.labels()
+        status = response.status_code
+        # Потокова відповідь ще не згенерована — підсумок пишемо, коли сервер її закриє
+        response.call_on_close(lambda: self._finish(profile, labels, status))
+        return response
+
+    def _finish(self, profile, labels, status):
+        self.request_duration.observe(labels, time.perf_counter() - profile.started)
+        self.sql_duration.observe(labels, profile.sql_time)
+        self.sql_statements.observe(labels, profile.sql_count)
+        self.sql_rows.observe(labels, profile.sql_rows)
+        self.responses.inc((labels[0], str(status)))
+        for listener in self.listeners:
+            listener(profile, labels)
+
+    def _render_started(self, sender, template, context, **extra):
+        profile = g.get('_profile')
+        if profile is not None:
+            profile._render_started.append((time.perf_counter(), profile.sql_time))
+
+    def _render_finished(self, sender, template, context, **extra):
+        profile = g.get('_profile')
+        if profile is None or not profile._render_started:
+            return
+        started, sql_before = profile._render_started.pop()
+        elapsed = (time.perf_counter() - started) - (profile.sql_time - sql_before)
+        profile.render_time += elapsed
+        self.render_duration.observe((template.name or 'string',), elapsed)
+
+    def metrics(self):
+        lines = []
+        for metric in (self.request_duration, self.sql_duration, self.sql_statements, self.sql_rows,
+                       self.render_duration, self.responses):
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
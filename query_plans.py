@@ -0,0 +1,124 @@
+import ast
+import itertools
+import re
+import sqlite3
+
+import admin_panel
+import migrations
+import ranking
+
+# --- ПЕРЕВІРКА ПЛАНІВ ЗАПИТІВ (EXPLAIN QUERY PLAN) ---
+#
+# Збирає всі SQL-запити модуля (рядкові літерали + запити модулів ranking і admin_panel,
+# включно з усіма варіантами, які будують fetch_page / fetch_invitations_page) і проганяє їх через EXPLAIN QUERY PLAN на порожній БД
+# з актуальною схемою. Повний прохід по "гарячій" таблиці вважається помилкою.
+
+HOT_TABLES = {'students', 'invitations'}
+
+SQL_START_RE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT|WITH)\s')
+TABLE_ALIAS_RE = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+
+SQL_KEYWORDS = {'where', 'join', 'left', 'inner', 'on', 'order', 'group', 'limit', 'set', 'values', 'select'}
+
+
+def module_statements(path):
+    """Повертає [(рядок, sql)] для всіх SQL-літералів у файлі."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    # Шматки f-рядків не є самостійними запитами
+    fragments = {id(part) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr) for part in node.values}
+    statements = []
+    for node in ast.walk(tree):
+        if id(node) in fragments:
+            continue
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and SQL_START_RE.match(node.value):
+            statements.append((node.lineno, ' '.join(node.value.split())))
+    return sorted(statements)
+
+
+class RecordingConnection:
+    """Обгортка, яка запам'ятовує виконані запити разом з параметрами."""
+
+    def __init__(self, db):
+        self.db = db
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((' '.join(sql.split()), list(params)))
+        return self.db.execute(sql, params)
+
+
+def ranking_statements(db):
+    recorder = RecordingConnection(db)
+    for search, course, specialty, sort, paged in itertools.product(
+            ['', 'python'], ['', '3'], ['', 'ІПЗ'], ['desc', 'asc', 'relevance'], [False, True]):
+        filters = ranking.normalize_filters({'search': search, 'course': course,
+                                             'specialty': specialty, 'sort': sort})
+        cursor = None
+        if paged:
+            keys = ranking.SORT_KEYS[filters['sort']]
+            if search:
+                keys = ranking.SEARCH_SORT_KEYS.get(filters['sort']) or keys
+            cursor = ranking.encode_cursor([0] * len(keys))
+        ranking.fetch_page(recorder, filters, cursor)
+    ranking.facets(recorder)
+    return recorder.statements
+
+
+def admin_statements(db):
+    recorder = RecordingConnection(db)
+    for status, flagged, company, dates, paged in itertools.product(
+            ['', 'pending'], ['', '1'], ['', '1'], [False, True], [False, True]):
+        filters = admin_panel.invitation_filters({
+            'status': status, 'flagged': flagged, 'company': company,
+            'date_from': '2025-01-01' if dates else '', 'date_to': '2025-12-31' if dates else ''})
+        cursor = ranking.encode_cursor(['', 0]) if paged else None
+        admin_panel.fetch_invitations_page(recorder, filters, cursor)
+    return recorder.statements
+
+
+def table_aliases(sql):
+    aliases = {}
+    for table, alias in TABLE_ALIAS_RE.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(db, sql, params=None):
+    """Повертає (план, таблиці з повним проходом) для запиту."""
+    if params is None:
+        params = [None] * sql.count('?')
+    plan = [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+    aliases = table_aliases(sql)
+    scanned = set()
+    for detail in plan:
+        match = FULL_SCAN_RE.match(detail)
+        if match:
+            scanned.add(aliases.get(match.group(1), match.group(1)))
+    return plan, scanned
+
+
+def check(paths):
+    """Повертає [(звідки, sql, план, гарячі таблиці з повним проходом)] для всіх запитів."""
+    db = sqlite3.connect(':memory:')
+    migrations.migrate(db)
+
+    statements = []
+    for path in paths:
+        statements.extend((f"{path}:{lineno}", sql, None) for lineno, sql in module_statements(path))
+    statements.extend(('ranking', sql, params) for sql, params in ranking_statements(db))
+    statements.extend(('admin_panel', sql, params) for sql, params in admin_statements(db))
+
+    results = []
+    seen = set()
+    for origin, sql, params in statements:
+        if sql in seen:
+            continue
+        seen.add(sql)
+        plan, scanned = full_scans(db, sql, params)
+        results.append((origin, sql, plan, sorted(scanned & HOT_TABLES)))
+    db.close()
+    return results
@@ -0,0 +1,205 @@
+import base64
+import json
+import math
+
+import search
+import skills
+
+# --- РЕЙТИНГ СТУДЕНТІВ (keyset-пагінація) ---
+#
+# Замість OFFSET сторінки "продовжуються" від останнього показаного рядка:
+# курсор зберігає значення ключів сортування цього рядка, тому вартість
+# сторінки не залежить від того, наскільки глибоко прокрутив рекрутер.
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# Порядок сортування: список (вираз, напрямок). Останній ключ завжди s.id,
+# щоб порядок був однозначним навіть за однакового рейтингу.
+SORT_KEYS = {
+    'desc': [('s.rating', 'DESC'), ('s.id', 'DESC')],
+    'asc': [('s.rating', 'ASC'), ('s.id', 'ASC')],
+    'relevance': [('relevance', 'ASC'), ('s.rating', 'DESC'), ('s.id', 'DESC')],
+}
+
+# Для пошуку з сортуванням за рейтингом релевантність лишається другим ключем
+SEARCH_SORT_KEYS = {
+    'desc': [('s.rating', 'DESC'), ('relevance', 'ASC'), ('s.id', 'DESC')],
+    'asc': [('s.rating', 'ASC'), ('relevance', 'ASC'), ('s.id', 'ASC')],
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, expected_len, text=True):
+    """Значення ключів із курсора; text=False — ключі лише числові (рейтинг, id, релевантність)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != expected_len:
+        raise InvalidCursor(cursor)
+    # Курсор приходить від клієнта: у SQL і порівняння ключів потрапляють лише скаляри
+    if not all(_cursor_value(value, text) for value in values):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _cursor_value(value, text):
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return text
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return False
+
+
+def keyset_condition(keys, values):
+    """Умова "рядок іде після курсора" для заданого порядку сортування."""
+    directions = {direction for _, direction in keys}
+    if len(directions) == 1:
+        # Однаковий напрямок — row value, який SQLite вміє вести по індексу
+        op = '<' if directions == {'DESC'} else '>'
+        columns = ', '.join(expr for expr, _ in keys)
+        placeholders = ', '.join('?' for _ in keys)
+        return f"({columns}) {op} ({placeholders})", list(values)
+
+    # Змішані напрямки — розгорнута форма (a < ?) OR (a = ? AND b > ?) ...
+    clauses, params = [], []
+    for i, (expr, direction) in enumerate(keys):
+        parts = [f"{prev} = ?" for prev, _ in keys[:i]]
+        parts.append(f"{expr} {'<' if direction == 'DESC' else '>'} ?")
+        clauses.append('(' + ' AND '.join(parts) + ')')
+        params.extend(values[:i])
+        params.append(values[i])
+    return '(' + ' OR '.join(clauses) + ')', params
+
+
+def normalize_filters(args):
+    search_query = (args.get('search') or '').strip()
+    match_expr = search.fts_match_expression(search_query)
+    # за замовчуванням рейтинг по спаданню (топ найкращих), а при пошуку — за релевантністю
+    sort_order = args.get('sort') or ('relevance' if match_expr else 'desc')
+    if sort_order not in SORT_KEYS or (sort_order == 'relevance' and not match_expr):
+        sort_order = 'desc'
+    return {
+        'search': search_query,
+        'course': (args.get('course') or '').strip(),
+        'specialty': (args.get('specialty') or '').strip(),
+        'sort': sort_order,
+    }
+
+
+def page_size(value):
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+
+
+def _ranking_query(filters):
+    """(sql без ORDER BY, параметри, ключі сортування) для заданого набору фільтрів."""
+    match_expr = search.fts_match_expression(filters['search'])
+    params = []
+
+    if match_expr:
+        # Пошук через FTS5-індекс замість LIKE '%...%' по всій таблиці
+        base_query = f"""
+            SELECT s.*, u.email, {search.bm25_expression()} AS relevance
+            FROM students_fts
+            JOIN students s ON s.id = students_fts.rowid
+            JOIN users u ON s.user_id = u.id
+            WHERE students_fts MATCH ? AND u.status != 'blocked'"""
+        params.append(match_expr)
+        keys = SEARCH_SORT_KEYS.get(filters['sort']) or SORT_KEYS[filters['sort']]
+    else:
+        base_query = "SELECT s.*, u.email FROM students s JOIN users u ON s.user_id = u.id WHERE u.status != 'blocked'"
+        keys = SORT_KEYS[filters['sort']]
+
+    if filters['course']:
+        base_query += " AND s.course = ?"
+        params.append(filters['course'])
+
+    if filters['specialty']:
+        base_query += " AND s.specialty = ?"
+        params.append(filters['specialty'])
+    return base_query, params, keys
+
+
+def _order_by(keys):
+    return " ORDER BY " + ', '.join(f"{expr} {direction}" for expr, direction in keys)
+
+
+def fetch_page(db, filters, cursor=None, limit=PAGE_SIZE):
+    """Повертає (students, next_cursor) для однієї сторінки рейтингу."""
+    base_query, params, keys = _ranking_query(filters)
+    if cursor:
+        condition, cursor_params = keyset_condition(keys, decode_cursor(cursor, len(keys), text=False))
+        base_query += " AND " + condition
+        params.extend(cursor_params)
+
+    base_query += _order_by(keys)
+    # Беремо на один рядок більше, щоб знати, чи є наступна сторінка
+    base_query += " LIMIT ?"
+    params.append(limit + 1)
+
+    students = [dict(row) for row in db.execute(base_query, params).fetchall()]
+    next_cursor = None
+    if len(students) > limit:
+        students = students[:limit]
+        last = students[-1]
+        next_cursor = encode_cursor([last[expr.split('.')[-1]] for expr, _ in keys])
+
+    # Навички з тексту самого студента (рядок уже має s.skills), розкладені так само,
+    # як для student_skills, — шаблону не треба робити split(',')
+    for student in students:
+        student['skill_list'] = skills.parse_skills(student['skills'])
+    return students, next_cursor
+
+
+def iter_rows(db, filters, batch_size=500):
+    """Усі студенти за фільтрами в порядку рейтингу — генератор поверх курсора, без fetchall()."""
+    base_query, params, keys = _ranking_query(filters)
+    cur = db.execute(base_query + _order_by(keys), params)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+
+def facets(db):
+    """Унікальні курси й спеціальності з кількістю студентів — за один згрупований прохід.
+
+    Повертає {'courses': [(курс, к-сть), ...], 'specialties': [(спеціальність, к-сть), ...]}.
+    Рахуються лише студенти, видимі в рейтингу (не заблоковані).
+    """
+    courses, specialties = {}, {}
+    rows = db.execute("""
+        SELECT s.course, s.specialty, COUNT(*) AS c
+        FROM students s JOIN users u ON s.user_id = u.id
+        WHERE u.status != 'blocked'
+        GROUP BY s.course, s.specialty
+    """).fetchall()
+    for course, specialty, count in rows:
+        if course not in (None, ''):
+            courses[course] = courses.get(course, 0) + count
+        if specialty not in (None, ''):
+            specialties[specialty] = specialties.get(specialty, 0) + count
+    return {
+        'courses': sorted(courses.items(), key=lambda item: str(item[0])),
+        'specialties': sorted(specialties.items()),
+    }
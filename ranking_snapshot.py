@@ -0,0 +1,263 @@
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+import ranking
+import skills
+
+logger = logging.getLogger(__name__)
+
+# Секунд між перевірками data_version: записи інших процесів з'являються у знімку з такою затримкою
+DATA_VERSION_INTERVAL = 60.0
+
+# --- ЗНІМОК РЕЙТИНГУ В ПАМ'ЯТІ ---
+#
+# Рейтинг читають набагато частіше, ніж змінюють, тож процес може тримати
+# готовий знімок: кортежі студентів, відсортовані за (rating DESC, id DESC),
+# і заздалегідь побудовані індекси позицій за курсом і спеціальністю.
+# Сторінка рейтингу й фасети тоді рахуються бінарним пошуком у пам'яті, без SQL.
+#
+# Знімок незмінний: перебудова створює новий і атомарно підміняє посилання.
+# Головний сигнал застарілості — версія рейтингу додатка (cache.DataVersion):
+# її піднімають лише записи цього процесу, що змінюють рейтинг. PRAGMA
+# data_version окремого з'єднання змінюється після БУДЬ-ЯКОГО чужого коміту
+# (зокрема mark_read, позначок і outbox з потоку-письменника), тож це лише
+# запасний сигнал для записів інших процесів і перевіряється не частіше ніж
+# раз на min_interval.
+# Повнотекстовий пошук знімок не обслуговує — такі запити йдуть у SQLite як раніше.
+#
+# Застарілий знімок перебудовується у фоновому потоці на власному з'єднанні,
+# не більше одного будівника на раз; запити тим часом отримують старий знімок.
+# Синхронно будується лише найперший (або після invalidate()).
+
+# Лише колонки картки рейтингу й експорту. Аватари (base64, основна вага рядка)
+# у знімок не потрапляють: їх дочитує add_avatars для показаної сторінки.
+SNAPSHOT_COLUMNS = ['id', 'user_id', 'first_name', 'last_name', 'patronymic', 'course', 'specialty',
+                    'skills', 'links', 'contact_info', 'rating']
+
+# Без ORDER BY: послідовний прохід таблиці й сортування в Python швидші за обхід індексу рейтингу
+SNAPSHOT_QUERY = f"""
+    SELECT {', '.join('s.' + column for column in SNAPSHOT_COLUMNS)}, u.email
+    FROM students s JOIN users u ON s.user_id = u.id
+    WHERE u.status != 'blocked'
+"""
+
+def _sort_key(rating, student_id):
+    # Ключ у порядку зростання для bisect; NULL-рейтинг, як і в SQLite, іде в самий кінець DESC
+    return (float('inf') if rating is None else -rating, -student_id)
+
+
+class _Snapshot:
+    """Незмінні дані одного знімка."""
+
+    def __init__(self, columns, rows, skill_lists):
+        self.columns = columns
+        self.rows = rows
+        self.skill_lists = skill_lists
+        rating_at, id_at = columns.index('rating'), columns.index('id')
+        rows.sort(key=lambda row: _sort_key(row[rating_at], row[id_at]))
+        self.keys = [_sort_key(row[rating_at], row[id_at]) for row in rows]
+
+        course_at, specialty_at = columns.index('course'), columns.index('specialty')
+        by_course, by_specialty, by_both = {}, {}, {}
+        for position, row in enumerate(rows):
+            course, specialty = row[course_at], row[specialty_at]
+            if course is not None:
+                by_course.setdefault(course, array('I')).append(position)
+            if specialty is not None:
+                by_specialty.setdefault(specialty, array('I')).append(position)
+            if course is not None and specialty is not None:
+                by_both.setdefault((course, specialty), array('I')).append(position)
+        self.by_course, self.by_specialty, self.by_both = by_course, by_specialty, by_both
+        self.facets = {
+            'courses': sorted(((c, len(p)) for c, p in by_course.items() if c != ''), key=lambda item: str(item[0])),
+            'specialties': sorted((s, len(p)) for s, p in by_specialty.items() if s != ''),
+        }
+
+    def positions(self, filters):
+        """Позиції рядків, що проходять фільтри (у порядку rating DESC), або None — усі рядки."""
+        course, specialty = filters['course'], filters['specialty']
+        if course and specialty:
+            return self.by_both.get((course, specialty), ())
+        if course:
+            return self.by_course.get(course, ())
+        if specialty:
+            return self.by_specialty.get(specialty, ())
+        return None
+
+    def as_dict(self, position):
+        student = dict(zip(self.columns, self.rows[position]))
+        student['skill_list'] = list(self.skill_lists.get(student['id'], ()))
+        return student
+
+
+class RankingSnapshot:
+    def __init__(self, database, version=None, min_interval=DATA_VERSION_INTERVAL):
+        self.database = database
+        self.version = version
+        # Як часто найбільше перевіряти data_version (записи інших процесів);
+        # зміна версії додатка перебудовує знімок одразу
+        self.min_interval = min_interval
+        self._conn = None
+        self._lock = threading.Lock()
+        # Тримається, поки йде перебудова (у будь-якому потоці)
+        self._build_lock = threading.Lock()
+        self._snapshot = None
+        self._stamp = None
+        # Коли востаннє звіряли data_version (побудова теж рахується)
+        self._checked_at = 0.0
+        self.stats = {'builds': 0, 'hits': 0, 'stale_hits': 0, 'last_build_ms': 0.0}
+
+    def _connection(self):
+        if self._conn is None:
+            # Окреме з'єднання: data_version змінюється лише від комітів інших з'єднань,
+            # тож воно не повинне нічого писати і не повинне йти в пул
+            self._conn = sqlite3.connect(self.database, check_same_thread=False)
+        return self._conn
+
+    def _current_stamp(self):
+        data_version = self._connection().execute("PRAGMA data_version").fetchone()[0]
+        return data_version, self.version.value if self.version is not None else 0
+
+    def _build(self):
+        started = time.perf_counter()
+        # Версію беремо до читання: якщо дані зміняться під час нього, знімок одразу застаріє
+        with self._lock:
+            stamp = self._current_stamp()
+        # Читає власне з'єднання будівника: _conn тим часом перевіряє data_version для запитів
+        conn = sqlite3.connect(self.database)
+        try:
+            cur = conn.execute(SNAPSHOT_QUERY)
+            columns = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        finally:
+            conn.close()
+        # Навички для карток — з тексту самого студента, як і в ranking.fetch_page
+        id_at, skills_at = columns.index('id'), columns.index('skills')
+        skill_lists = {row[id_at]: tuple(skills.parse_skills(row[skills_at])) for row in rows if row[skills_at]}
+        snapshot = _Snapshot(columns, rows, skill_lists)
+        with self._lock:
+            self._snapshot, self._stamp, self._checked_at = snapshot, stamp, time.monotonic()
+        self.stats['builds'] += 1
+        self.stats['last_build_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return snapshot
+
+    def _rebuild_in_background(self):
+        if not self._build_lock.acquire(blocking=False):
+            return  # уже будується
+        try:
+            threading.Thread(target=self._background_build, name='ukd-ranking-snapshot', daemon=True).start()
+        except BaseException:
+            self._build_lock.release()
+            raise
+
+    def _background_build(self):
+        try:
+            self._build()
+        except Exception:
+            logger.exception("ranking snapshot rebuild failed")
+        finally:
+            self._build_lock.release()
+
+    def current(self):
+        """Останній знімок; якщо дані змінилися — запускає фонову перебудову і віддає старий."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Віддати ще нічого: перший запит будує сам, одночасні з ним чекають на той самий знімок
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._build()
+                return self._snapshot
+        with self._lock:
+            version = self.version.value if self.version is not None else 0
+            if version != self._stamp[1]:
+                stale = True
+            elif time.monotonic() - self._checked_at >= self.min_interval:
+                self._checked_at = time.monotonic()
+                stale = self._current_stamp()[0] != self._stamp[0]
+            else:
+                stale = False
+        if stale:
+            self._rebuild_in_background()
+            self.stats['stale_hits'] += 1
+        else:
+            self.stats['hits'] += 1
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    @staticmethod
+    def covers(filters):
+        """Чи можна відповісти на запит зі знімка (повнотекстовий пошук — ні)."""
+        return not filters['search']
+
+    def facets(self):
+        return self.current().facets
+
+    def fetch_page(self, filters, cursor=None, limit=ranking.PAGE_SIZE):
+        """Те саме, що ranking.fetch_page (без пошуку), але з пам'яті. Курсори сумісні."""
+        snapshot = self.current()
+        positions = snapshot.positions(filters)
+        descending = filters['sort'] != 'asc'
+
+        # Межа в загальному порядку: перша позиція після курсора (DESC) або перед ним (ASC)
+        if cursor:
+            rating, student_id = ranking.decode_cursor(cursor, 2, text=False)
+            try:
+                key = _sort_key(rating, student_id)
+                bound = (bisect_right if descending else bisect_left)(snapshot.keys, key)
+            except TypeError:
+                raise ranking.InvalidCursor(cursor)
+        else:
+            bound = 0 if descending else len(snapshot.rows)
+
+        # Беремо на один рядок більше, щоб знати, чи є наступна сторінка
+        if positions is None:
+            page = (range(bound, min(bound + limit + 1, len(snapshot.rows))) if descending
+                    else range(bound - 1, max(bound - limit - 2, -1), -1))
+        elif descending:
+            start = bisect_left(positions, bound)
+            page = positions[start:start + limit + 1]
+        else:
+            end = bisect_left(positions, bound)
+            page = positions[max(end - limit - 1, 0):end][::-1]
+
+        students = [snapshot.as_dict(position) for position in page]
+        next_cursor = None
+        if len(students) > limit:
+            students = students[:limit]
+            next_cursor = ranking.encode_cursor([students[-1]['rating'], students[-1]['id']])
+        return students, next_cursor
+
+    def iter_rows(self, filters):
+        """Усі студенти за фільтрами (без пошуку) у порядку рейтингу — для експорту."""
+        snapshot = self.current()
+        positions = snapshot.positions(filters)
+        if positions is None:
+            positions = range(len(snapshot.rows))
+        if filters['sort'] == 'asc':
+            positions = reversed(positions)
+        for position in positions:
+            yield dict(zip(snapshot.columns, snapshot.rows[position]))
+
+    def add_avatars(self, db, students):
+        """Дочитує аватари для сторінки зі знімка одним запитом (у самому знімку їх немає)."""
+        if not students:
+            return students
+        placeholders = ', '.join('?' for _ in students)
+        avatars = dict(db.execute(f"SELECT id, avatar FROM students WHERE id IN ({placeholders})",
+                                  [student['id'] for student in students]).fetchall())
+        for student in students:
+            student['avatar'] = avatars.get(student['id'])
+        return students
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,115 @@
+import logging
+import threading
+
+# --- АВТОМАТИЧНИЙ РЕЙТИНГ СТУДЕНТІВ ---
+#
+# students.rating = обчислені бали + students.rating_bonus (ручна поправка адміна).
+# Бали рахуються одним UPDATE із сигналів, що вже є в БД:
+#   заповненість профілю, кількість навичок, отримані й прийняті запрошення,
+#   свіжість (останнє оновлення профілю або запрошення).
+# Маршрути перераховують лише зачеплених студентів у своїй транзакції, а
+# повний перерахунок (свіжість з часом спадає) запускається періодично.
+# Читання рейтингу лишається звичайним ORDER BY rating по індексу.
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ['first_name', 'last_name', 'patronymic', 'course', 'specialty', 'skills', 'links', 'contact_info']
+
+POINTS_PER_FIELD = 5         # до 40 за заповнений профіль
+POINTS_PER_SKILL = 2         # до 20 (перші 10 навичок)
+MAX_SKILLS = 10
+POINTS_PER_INVITE = 2        # до 20 (перші 10 запрошень)
+MAX_INVITES = 10
+POINTS_PER_ACCEPTED = 5      # до 20 (перші 4 прийняті)
+MAX_ACCEPTED = 4
+RECENCY_POINTS = 10          # спадає до 0 за RECENCY_DAYS днів
+RECENCY_DAYS = 180
+
+# Оцінка як SQL-вираз над рядком students — однаковий для одиночного й повного перерахунку
+SCORE_SQL = f"""
+    ({' + '.join(f"(IFNULL({field}, '') != '')" for field in PROFILE_FIELDS)}) * {POINTS_PER_FIELD}
+    + MIN((SELECT COUNT(*) FROM student_skills ss WHERE ss.student_id = students.id), {MAX_SKILLS}) * {POINTS_PER_SKILL}
+    + MIN((SELECT COUNT(*) FROM invitations i WHERE i.student_id = students.id), {MAX_INVITES}) * {POINTS_PER_INVITE}
+    + MIN((SELECT COUNT(*) FROM invitations i WHERE i.student_id = students.id AND i.status = 'accepted'),
+          {MAX_ACCEPTED}) * {POINTS_PER_ACCEPTED}
+    + IFNULL(MAX(0, {RECENCY_POINTS} - {RECENCY_POINTS} * (julianday('now') - julianday(COALESCE(
+          MAX(profile_updated_at, (SELECT MAX(i.created_at) FROM invitations i WHERE i.student_id = students.id)),
+          profile_updated_at,
+          (SELECT MAX(i.created_at) FROM invitations i WHERE i.student_id = students.id))))
+          / {RECENCY_DAYS}), 0)
+"""
+
+RATING_SQL = f"CAST(ROUND({SCORE_SQL}) AS INTEGER) + rating_bonus"
+
+
+def _update(db, where='', params=()):
+    # Оцінка рахується раз на рядок, а переписуються лише рядки, де рейтинг справді змінився
+    cur = db.execute(f"""
+        UPDATE students SET rating = fresh.rating
+        FROM (SELECT id, {RATING_SQL} AS rating FROM students {where}) AS fresh
+        WHERE students.id = fresh.id AND students.rating IS NOT fresh.rating
+    """, params)
+    return cur.rowcount
+
+
+def recompute(db, student_ids):
+    """Перераховує рейтинг заданих студентів (без коміту). Повертає кількість змінених рядків."""
+    student_ids = [sid for sid in dict.fromkeys(student_ids) if sid is not None]
+    if not student_ids:
+        return 0
+    placeholders = ', '.join('?' for _ in student_ids)
+    return _update(db, f"WHERE id IN ({placeholders})", student_ids)
+
+
+def recompute_all(db):
+    """Повний перерахунок усіх студентів (без коміту)."""
+    return _update(db)
+
+
+def students_for_invites(db, invite_ids):
+    """id студентів, яких стосуються задані запрошення (для перерахунку після зміни/видалення)."""
+    if not invite_ids:
+        return []
+    placeholders = ', '.join('?' for _ in invite_ids)
+    return [row[0] for row in db.execute(
+        f"SELECT DISTINCT student_id FROM invitations WHERE id IN ({placeholders})", list(invite_ids))]
+
+
+class PeriodicRecompute:
+    """Фоновий потік, що раз на interval секунд робить повний перерахунок."""
+
+    def __init__(self, pool, interval, on_change=None):
+        self.pool = pool
+        self.interval = interval
+        self.on_change = on_change
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+
+    def run_once(self):
+        db = self.pool.acquire()
+        try:
+            changed = recompute_all(db)
+            db.commit()
+        finally:
+            self.pool.release(db)
+        self.runs += 1
+        if changed and self.on_change is not None:
+            self.on_change()
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:  # потік не повинен тихо вмерти через одну невдалу спробу
+                logger.exception("periodic rating recompute failed")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rating-recompute', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
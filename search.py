@@ -0,0 +1,26 @@
+import re
+
+# --- ПОВНОТЕКСТОВИЙ ПОШУК (FTS5) ---
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Ваги колонок для bm25: first_name, last_name, skills, specialty
+BM25_WEIGHTS = (3.0, 3.0, 2.0, 1.0)
+
+
+def fts_match_expression(text):
+    """Перетворює введений користувачем текст на безпечний вираз MATCH.
+
+    Кожне слово береться в лапки (щоб спецсимволи FTS5 не ламали запит)
+    і шукається як префікс: "pyt" знайде "Python". Слова об'єднуються через AND.
+    Повертає None, якщо в тексті немає жодного слова.
+    """
+    tokens = TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def bm25_expression(table='students_fts'):
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    return f"bm25({table}, {weights})"
@@ -0,0 +1,188 @@
+import argparse
+import csv
+import io
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bulk_import
+import db_pool
+import migrations
+import rating_engine
+
+# --- ГЕНЕРАТОР СИНТЕТИЧНИХ ДАНИХ ---
+#
+# Наповнює БД реалістичною кількістю студентів, компаній і запрошень, щоб
+# перевіряти швидкодію (benchmark.py) не на десятку рядків. Генерація
+# детермінована: той самий --seed дає ті самі дані. Студенти й компанії йдуть
+# через bulk_import (валідація, навички, FTS, рейтинг — як при звичайному
+# імпорті), запрошення — executemany порціями; лічильники підтримують тригери.
+#
+#   python seed_data.py --db bench.db --students 100000 --companies 500 --invitations 200000
+
+PASSWORD = '123'
+PREFIX = 'seed_'
+CHUNK_SIZE = 5000
+
+FIRST_NAMES = ['Олександр', 'Андрій', 'Дмитро', 'Максим', 'Іван', 'Назар', 'Богдан', 'Сергій', 'Тарас', 'Юрій',
+               'Олена', 'Анна', 'Марія', 'Ірина', 'Софія', 'Наталія', 'Христина', 'Юлія', 'Дарина', 'Оксана']
+LAST_NAMES = ['Шевченко', 'Коваленко', 'Бондаренко', 'Ткаченко', 'Кравченко', 'Олійник', 'Шевчук', 'Поліщук',
+              'Бойко', 'Мельник', 'Коваль', 'Гнатюк', 'Савчук', 'Романюк', 'Король', 'Марченко', 'Лисенко']
+PATRONYMICS = ['Олександрович', 'Андрійович', 'Іванович', 'Сергіївна', 'Петрівна', 'Юріївна', None]
+SPECIALTIES = ['ІПЗ', "Комп'ютерні науки", 'Кібербезпека', 'Економіка', 'Менеджмент', 'Маркетинг',
+               'Фінанси', 'Право', 'Дизайн', 'Журналістика']
+COURSES = ['1', '2', '3', '4', '5', '6']
+COURSE_WEIGHTS = [22, 22, 20, 18, 10, 8]
+SKILLS = ['Python', 'SQL', 'JavaScript', 'TypeScript', 'React', 'Vue', 'Node.js', 'Java', 'Kotlin', 'C#',
+          'C++', 'Go', 'PHP', 'Django', 'Flask', 'Docker', 'Kubernetes', 'Git', 'Linux', 'AWS', 'Figma',
+          'Photoshop', 'Excel', 'Power BI', 'Tableau', 'SEO', 'Копірайтинг', 'English', 'Deutsch',
+          'Аналітика', 'Бухоблік', 'Тестування', 'Agile', 'Комунікація']
+POSITIONS = ['Junior Python Developer', 'Frontend Developer (React)', 'QA Engineer', 'Data Analyst',
+             'Маркетолог', 'UI/UX дизайнер', 'Бухгалтер-стажер', 'Юрист-стажер', 'DevOps Intern', 'Java Developer']
+COMPANY_WORDS = ['Soft', 'Data', 'Lab', 'Group', 'Tech', 'Systems', 'Media', 'Finance', 'Cloud', 'Studio']
+MESSAGES = ['Запрошуємо на співбесіду!', 'Ваш профіль нам підходить, напишіть нам.',
+            'Маємо вакансію стажера — цікаво?', 'Пропонуємо оплачуване стажування.']
+
+# (статус, вага) для згенерованих запрошень
+INVITE_STATUSES = [('pending', 60), ('accepted', 20), ('rejected', 20)]
+FLAGGED_SHARE = 0.02
+INVITE_DAYS = 365
+
+
+def _csv_lines(header, rows):
+    """Рядки CSV по одному — bulk_import.import_csv читає будь-який ітерований текст."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in itertools.chain([header], rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def student_rows(rng, count, prefix):
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        filled = rng.random()
+        yield [
+            f"{prefix}student_{i}", PASSWORD, f"{prefix}student_{i}@students.ukd.edu.ua",
+            first, last,
+            rng.choice(PATRONYMICS) if filled > 0.2 else '',
+            rng.choices(COURSES, COURSE_WEIGHTS)[0] if filled > 0.05 else '',
+            rng.choice(SPECIALTIES) if filled > 0.05 else '',
+            ', '.join(rng.sample(SKILLS, rng.randint(0, 8))) if filled > 0.1 else '',
+            f"https://github.com/{prefix}student{i}" if filled > 0.5 else '',
+            f"+380{rng.randrange(10 ** 8, 10 ** 9)}" if filled > 0.3 else '',
+            rng.choice([0, 0, 0, 0, 5, 10, -5]),
+        ]
+
+
+def company_rows(rng, count, prefix):
+    for i in range(count):
+        name = f"{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_WORDS)} {i}"
+        yield [
+            f"{prefix}company_{i}", PASSWORD, f"hr{i}@{prefix}company.example.com",
+            name, rng.choice(POSITIONS),
+            f"{name}: шукаємо студентів зі знанням {', '.join(rng.sample(SKILLS, 3))}.",
+            f"hr{i}@{prefix}company.example.com",
+        ]
+
+
+def _import(db, kind, header, rows, chunk_size):
+    report = bulk_import.import_csv(db, _csv_lines(header, rows), kind, chunk_size)
+    if report['rejected']:
+        line, reason = report['rejected'][0]
+        raise SystemExit(f"{kind}: {len(report['rejected'])} rows rejected (line {line}: {reason}); "
+                         f"use another --prefix for an already seeded database")
+    return report['imported']
+
+
+def seed_invitations(db, rng, count, chunk_size=CHUNK_SIZE):
+    """Запрошення між усіма наявними студентами й компаніями; пари (компанія, студент) без повторів."""
+    student_ids = [row[0] for row in db.execute("SELECT id FROM students ORDER BY id")]
+    companies = db.execute("SELECT id, user_id FROM companies ORDER BY id").fetchall()
+    if not student_ids or not companies:
+        return 0
+    count = min(count, len(student_ids) * len(companies))
+    statuses, weights = zip(*INVITE_STATUSES)
+    now = datetime.utcnow().replace(microsecond=0)
+    pairs = set()
+    batch, inserted = [], 0
+    while inserted + len(batch) < count:
+        company_id, user_id = rng.choice(companies)
+        student_id = rng.choice(student_ids)
+        if (company_id, student_id) in pairs:
+            continue
+        pairs.add((company_id, student_id))
+        status = rng.choices(statuses, weights)[0]
+        created_at = now - timedelta(seconds=rng.randrange(INVITE_DAYS * 86400))
+        batch.append((student_id, company_id, user_id, rng.choice(MESSAGES), status,
+                      1 if rng.random() < FLAGGED_SHARE else 0,
+                      1 if status != 'pending' or rng.random() < 0.5 else 0,
+                      created_at.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) >= chunk_size:
+            inserted += _write_invitations(db, batch)
+            batch = []
+    if batch:
+        inserted += _write_invitations(db, batch)
+    return inserted
+
+
+def _write_invitations(db, batch):
+    db.executemany("""
+        INSERT INTO invitations (student_id, company_id, user_id, message, status, flagged, is_read, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, batch)
+    db.commit()
+    return len(batch)
+
+
+def seed(db, students=1000, companies=50, invitations=5000, seed=42, prefix=PREFIX, chunk_size=CHUNK_SIZE):
+    """Наповнює БД і повертає {'students', 'companies', 'invitations', 'seconds'}."""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    migrations.migrate(db)
+    result = {
+        'students': _import(db, 'students', ['username', 'password', 'email', 'first_name', 'last_name',
+                                             'patronymic', 'course', 'specialty', 'skills', 'links',
+                                             'contact_info', 'rating'],
+                            student_rows(rng, students, prefix), chunk_size),
+        'companies': _import(db, 'companies', ['username', 'password', 'email', 'company_name', 'position',
+                                               'description', 'contact_info'],
+                             company_rows(rng, companies, prefix), chunk_size),
+    }
+    result['invitations'] = seed_invitations(db, rng, invitations, chunk_size)
+    # Запрошення впливають на рейтинг — один повний перерахунок наприкінці
+    rating_engine.recompute_all(db)
+    db.commit()
+    db.execute("ANALYZE")
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Наповнити БД синтетичними студентами, компаніями й запрошеннями.")
+    parser.add_argument('--db', default='ukd_database.db', help="Файл БД (створюється, якщо немає).")
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--invitations', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42, help="Зерно генератора: однакове зерно — однакові дані.")
+    parser.add_argument('--prefix', default=PREFIX, help="Префікс логінів (для повторного наповнення тієї ж БД).")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    pool = db_pool.ConnectionPool(args.db, size=1)
+    db = pool.acquire()
+    try:
+        result = seed(db, args.students, args.companies, args.invitations, args.seed, args.prefix, args.chunk_size)
+    finally:
+        pool.release(db)
+        pool.close_all()
+    print(f"{result['students']} students, {result['companies']} companies, {result['invitations']} invitations "
+          f"seeded into {args.db} in {result['seconds']} s (password '{PASSWORD}')")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
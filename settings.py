@@ -0,0 +1,45 @@
+import os
+
+import ranking_snapshot
+import slow_queries
+import write_queue
+
+# --- НАЛАШТУВАННЯ З ОТОЧЕННЯ ---
+#
+# Усе, що відрізняється між розробкою й розгортанням (шлях до БД, секрет сесій,
+# розміри пулу й кешів, фонові воркери), читається з UKD_* змінних оточення
+# в app.config. create_app(config) приймає словник, що перекриває ці значення.
+
+# Лише для розробки: у розгортанні секрет задається через UKD_SECRET_KEY (див. wsgi.py)
+DEV_SECRET_KEY = 'ukd_recruitment_secret_key_v5'
+
+
+def from_env(environ=os.environ):
+    return {
+        'SECRET_KEY': environ.get('UKD_SECRET_KEY') or DEV_SECRET_KEY,
+        'DATABASE': environ.get('UKD_DATABASE', 'ukd_database.db'),
+        # З'єднань у пулі одного процесу (не менше, ніж потоків у воркері)
+        'POOL_SIZE': int(environ.get('UKD_POOL_SIZE', 8)),
+        # Кеш сторінок і mmap кожного з'єднання SQLite
+        'SQLITE_CACHE_KB': int(environ.get('UKD_SQLITE_CACHE_KB', 16000)),
+        'SQLITE_MMAP_MB': int(environ.get('UKD_SQLITE_MMAP_MB', 128)),
+        # Вік кешу фасетів рейтингу: за стільки секунд процес побачить зміни інших воркерів
+        'FACET_CACHE_TTL': float(environ.get('UKD_FACET_CACHE_TTL', 60)),
+        # Скільки стиснених тіл відповідей з ETag тримати в пам'яті
+        'COMPRESSION_CACHE_SIZE': int(environ.get('UKD_COMPRESSION_CACHE_SIZE', 32)),
+        'TEMPLATE_CACHE_DIR': environ.get('UKD_TEMPLATE_CACHE_DIR') or None,
+        'PROFILING': environ.get('UKD_PROFILING', '1') == '1',
+        'METRICS_TOKEN': environ.get('UKD_METRICS_TOKEN') or None,
+        'SLOW_QUERY_MS': float(environ.get('UKD_SLOW_QUERY_MS', slow_queries.DEFAULT_THRESHOLD_MS)),
+        'SLOW_QUERY_LOG': environ.get('UKD_SLOW_QUERY_LOG', 'slow_queries.log'),
+        'RANKING_SNAPSHOT': environ.get('UKD_RANKING_SNAPSHOT') == '1',
+        # Як часто знімок рейтингу перевіряє записи інших процесів (PRAGMA data_version), с
+        'RANKING_SNAPSHOT_INTERVAL': float(environ.get('UKD_RANKING_SNAPSHOT_INTERVAL',
+                                                       ranking_snapshot.DATA_VERSION_INTERVAL)),
+        'MAIL_WORKER': environ.get('UKD_MAIL_WORKER', 'thread'),
+        'RATING_INTERVAL': float(environ.get('UKD_RATING_INTERVAL', 3600)),
+        # Записи маршрутів через один потік-письменник з груповою фіксацією (write_queue.py); 0 — на місці
+        'WRITE_QUEUE': environ.get('UKD_WRITE_QUEUE', '1') == '1',
+        'WRITE_BATCH': int(environ.get('UKD_WRITE_BATCH', write_queue.MAX_BATCH)),
+        'APP_VERSION': environ.get('UKD_APP_VERSION') or None,
+    }
@@ -0,0 +1,72 @@
+import re
+
+# --- НАВИЧКИ СТУДЕНТІВ (нормалізований довідник) ---
+#
+# students.skills лишається текстом "як ввів студент", а для пошуку він
+# розкладається на skills (довідник) + student_skills (зв'язки). Довідник
+# зберігає написання, у якому навичку вперше ввели, тож картки показують
+# навички з тексту самого студента, а slug служить лише для зіставлення.
+# Пошук за навичками — це перетин/об'єднання індексованих множин student_id,
+# тому "Java" більше не знаходить "JavaScript".
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def slugify(name):
+    return WHITESPACE_RE.sub(' ', name).strip().lower()
+
+
+def parse_skills(text):
+    """'Python, SQL ,python' -> ['Python', 'SQL'] (порядок збережено, дублікати відкинуто)."""
+    result, seen = [], set()
+    for part in (text or '').split(','):
+        name = WHITESPACE_RE.sub(' ', part).strip()
+        slug = name.lower()
+        if name and slug not in seen:
+            seen.add(slug)
+            result.append(name)
+    return result
+
+
+def skill_ids(db, names, create=False):
+    """Повертає {slug: id} для заданих назв; create=True додає відсутні в довідник."""
+    slugs = {slugify(name): name for name in names if slugify(name)}
+    if not slugs:
+        return {}
+    if create:
+        db.executemany("INSERT OR IGNORE INTO skills (name, slug) VALUES (?, ?)",
+                       [(name, slug) for slug, name in slugs.items()])
+    placeholders = ', '.join('?' for _ in slugs)
+    rows = db.execute(f"SELECT slug, id FROM skills WHERE slug IN ({placeholders})", list(slugs)).fetchall()
+    return {slug: skill_id for slug, skill_id in rows}
+
+
+def sync_student_skills(db, student_id, text):
+    """Перебудовує зв'язки student_skills для одного студента з тексту профілю."""
+    names = parse_skills(text)
+    ids = skill_ids(db, names, create=True)
+    db.execute("DELETE FROM student_skills WHERE student_id = ?", (student_id,))
+    db.executemany("INSERT INTO student_skills (skill_id, student_id, position) VALUES (?, ?, ?)",
+                   [(ids[slugify(name)], student_id, pos) for pos, name in enumerate(names)])
+
+
+def students_with_skills(db, names, mode='all', limit=50):
+    """Студенти, що мають ВСІ (mode='all') або БУДЬ-ЯКУ (mode='any') з навичок.
+
+    Кожна навичка — це діапазон первинного ключа (skill_id, student_id), тож
+    INTERSECT / UNION працюють над уже відсортованими множинами з індексу.
+    """
+    wanted = {slugify(name) for name in names if slugify(name)}
+    ids = skill_ids(db, wanted)
+    if not wanted or (mode == 'all' and len(ids) < len(wanted)) or not ids:
+        return []
+    operator = ' INTERSECT ' if mode == 'all' else ' UNION '
+    subquery = operator.join("SELECT student_id FROM student_skills WHERE skill_id = ?" for _ in ids)
+    rows = db.execute(f"""
+        SELECT s.*, u.email
+        FROM students s JOIN users u ON s.user_id = u.id
+        WHERE s.id IN ({subquery}) AND u.status != 'blocked'
+        ORDER BY s.rating DESC, s.id DESC
+        LIMIT ?
+    """, list(ids.values()) + [limit]).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import logging.handlers
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# --- ЖУРНАЛ ПОВІЛЬНИХ ЗАПИТІВ ---
+#
+# Слухач профайлера (profiling.Profiler.listeners): після кожного HTTP-запиту
+# переглядає його SQL-вирази, і ті, що йшли довше за поріг (разом із вибіркою
+# рядків), записує з нормалізованим текстом, "формою" параметрів і планом
+# EXPLAIN QUERY PLAN. Записи йдуть у файл з ротацією (JSON-рядки) і в пам'ять,
+# згруповані за відбитком нормалізованого SQL — на адмін-вкладку.
+# Запити рейтингу складаються з фільтрів, тож різні комбінації фільтрів мають
+# різні відбитки: видно, яка саме комбінація сканує таблицю.
+
+DEFAULT_THRESHOLD_MS = 100.0
+MAX_GROUPS = 200
+MAX_SAMPLES = 5
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+EXPLAINABLE_RE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+FULL_SCAN_RE = re.compile(r'\bSCAN (\w+)(?: AS \w+)?$')
+
+
+def normalize(sql):
+    """SQL без літералів і з однаковими пробілами: "IN (?, ?, ?)" -> "IN (...)"."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = ' '.join(sql.split())
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return sql
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+
+def _value_shape(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return f'str({len(value)})'
+    return type(value).__name__
+
+
+def parameter_shape(parameters, many=False, batch=0):
+    """Типи параметрів без значень: ['int', 'str(5)'] або '500 x [int, str(12)]' для executemany.
+
+    Для executemany parameters — перший рядок, batch — кількість рядків.
+    """
+    if many:
+        return f"{batch} x {parameter_shape(parameters) if batch else '[]'}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: {_value_shape(value)}" for key, value in parameters.items()) + '}'
+    # Довгі списки для IN (...) — стисло: "int x48"
+    runs = []
+    for shape in map(_value_shape, parameters):
+        if runs and runs[-1][0] == shape:
+            runs[-1][1] += 1
+        else:
+            runs.append([shape, 1])
+    return '[' + ', '.join(shape if count == 1 else f"{shape} x{count}" for shape, count in runs) + ']'
+
+
+def plan_has_full_scan(plan):
+    """Чи є в плані повний прохід таблиці (SCAN без індексу; тимчасові B-дерева не рахуються)."""
+    return any(FULL_SCAN_RE.search(detail) for detail in plan)
+
+
+class SlowQueryLog:
+    def __init__(self, database, threshold_ms=DEFAULT_THRESHOLD_MS, path=None, max_groups=MAX_GROUPS):
+        self.database = database
+        self.threshold = threshold_ms / 1000
+        self.max_groups = max_groups
+        self._groups = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._explain_lock = threading.Lock()
+        self.logger = None
+        if path:
+            self.logger = logging.getLogger(f'ukd.slow_queries.{path}')
+            self.logger.propagate = False
+            self.logger.setLevel(logging.INFO)
+            if not self.logger.handlers:
+                handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                                               encoding='utf-8', delay=True)
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self.logger.addHandler(handler)
+
+    @property
+    def threshold_ms(self):
+        return self.threshold * 1000
+
+    def _connection(self):
+        if self._conn is None:
+            # Окреме з'єднання: з'єднання запиту вже повернуте в пул, коли відповідь закрито
+            self._conn = sqlite3.connect(self.database, check_same_thread=False)
+        return self._conn
+
+    def explain(self, sql, parameters):
+        """Рядки EXPLAIN QUERY PLAN (поле detail) для виразу з тими самими параметрами."""
+        if not EXPLAINABLE_RE.match(sql):
+            return []
+        try:
+            with self._explain_lock:
+                rows = self._connection().execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            return [f"EXPLAIN failed: {e}"]
+        return [row[3] for row in rows]
+
+    def on_request(self, profile, labels):
+        """Слухач profiling.Profiler: перевіряє найповільніше виконання кожного виразу запиту."""
+        for statement in profile.statements.values():
+            if statement.max_elapsed >= self.threshold:
+                self.record(statement.sql, statement.parameters, statement.max_elapsed, statement.rows,
+                            many=statement.many, batch=statement.batch, endpoint=labels[0], tab=labels[1])
+
+    def record(self, sql, parameters, elapsed, rows, many=False, batch=0, endpoint='', tab=''):
+        """parameters — одного виконання (для executemany — перший рядок із batch)."""
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        shape = parameter_shape(parameters, many, batch)
+        plan = self.explain(sql, parameters)
+        elapsed_ms = round(elapsed * 1000, 2)
+        seen_at = datetime.now().isoformat(timespec='seconds')
+
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = {
+                    'fingerprint': key, 'sql': normalized, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'routes': [], 'parameter_shapes': [], 'plan': plan,
+                    'full_scan': plan_has_full_scan(plan), 'first_seen': seen_at,
+                }
+                while len(self._groups) > self.max_groups:
+                    self._groups.popitem(last=False)
+            else:
+                self._groups.move_to_end(key)
+            group['count'] += 1
+            group['total_ms'] = round(group['total_ms'] + elapsed_ms, 2)
+            group['max_ms'] = max(group['max_ms'], elapsed_ms)
+            group['last_ms'] = elapsed_ms
+            group['rows'] = rows
+            group['last_seen'] = seen_at
+            group['plan'] = plan
+            group['full_scan'] = plan_has_full_scan(plan)
+            route = f"{endpoint}:{tab}" if tab else endpoint
+            for name, value in (('routes', route), ('parameter_shapes', shape)):
+                if value not in group[name] and len(group[name]) < MAX_SAMPLES:
+                    group[name].append(value)
+
+        if self.logger is not None:
+            self.logger.info(json.dumps({
+                'time': seen_at, 'fingerprint': key, 'elapsed_ms': elapsed_ms, 'rows': rows,
+                'endpoint': endpoint, 'tab': tab, 'sql': normalized, 'parameters': shape, 'plan': plan,
+            }, ensure_ascii=False))
+
+    def groups(self, sort='total'):
+        """Групи за відбитком, найдорожчі першими (sort = total | max | count)."""
+        key = {'max': 'max_ms', 'count': 'count'}.get(sort, 'total_ms')
+        with self._lock:
+            groups = [dict(group, routes=list(group['routes']), parameter_shapes=list(group['parameter_shapes']))
+                      for group in self._groups.values()]
+        for group in groups:
+            group['avg_ms'] = round(group['total_ms'] / group['count'], 2)
+        return sorted(groups, key=lambda group: group[key], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
@@ -0,0 +1,165 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import db_pool
+import profiling
+
+# --- ЧЕРГА ЗАПИСІВ (ОДИН ПИСЬМЕННИК) ---
+#
+# SQLite допускає лише одну транзакцію запису на раз. Якщо кожен потік комітить
+# на своєму з'єднанні, одночасні записи чекають один на одного в busy_timeout,
+# а під навантаженням отримують "database is locked". Тут усі записи процесу
+# виконує один потік-письменник на власному з'єднанні: маршрут передає функцію
+# fn(db) і чекає на Future з її результатом.
+#
+# Групова фіксація: усе, що накопичилося в черзі, поки йшла попередня
+# транзакція, виконується в одній BEGIN IMMEDIATE ... COMMIT. Кожна функція —
+# у своєму SAVEPOINT, тож помилка однієї відкочує лише її зміни, а не сусідів.
+# Результат (або виняток) віддається викликачу лише після COMMIT.
+# Функції не повинні самі викликати commit/rollback.
+#
+# Якщо викликач не дочекався (timeout), його Future скасовується: функція, яку
+# письменник ще не почав, не виконається зовсім. Уже почату скасувати не можна —
+# вона довиконається й закомітиться, хоча викликач отримав помилку.
+# SQL функції письменник рахує в окремий профіль, а run() додає його в профіль
+# запиту, що її поставив (profiling.RequestProfile), — лише якщо дочекався результату,
+# тож покинутий викликачем запис не пише в чужий, уже закритий профіль.
+
+MAX_BATCH = 64
+TIMEOUT = 30.0
+
+_STOP = object()
+
+
+class WriteQueue:
+    def __init__(self, database, pragmas=None, max_batch=MAX_BATCH, timeout=TIMEOUT):
+        self.database = database
+        self.pragmas = pragmas
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.stats = {'jobs': 0, 'failed': 0, 'cancelled': 0, 'batches': 0, 'largest_batch': 0,
+                      'commit_time': 0.0, 'queue_wait': 0.0}
+
+    def _ensure_started(self):
+        # Потік не переживає fork: у кожному воркері свій письменник і своє з'єднання
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='ukd-writer', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, fn, profiled=False):
+        """Ставить fn(db) у чергу; повертає Future з її результатом.
+
+        profiled=True — вирази fn рахуються в future.profile (новий RequestProfile).
+        """
+        future = Future()
+        future.profile = profiling.RequestProfile() if profiled else None
+        if threading.current_thread() is self._thread:
+            # Запис зсередини іншого запису: потік-письменник не може чекати сам на себе
+            raise RuntimeError("write functions must not submit further writes")
+        self._ensure_started()
+        self._queue.put((fn, future, time.perf_counter()))
+        return future
+
+    def run(self, fn, profile=None):
+        """Виконує fn(db) у потоці-письменнику й повертає результат (або піднімає її виняток).
+
+        profile — RequestProfile викликача: у нього додаються вирази fn.
+        """
+        future = self.submit(fn, profiled=profile is not None)
+        try:
+            future.exception(self.timeout)
+        except FutureTimeoutError:
+            # Ще не почата функція вже не виконається; почату cancel() не зупинить
+            future.cancel()
+            raise sqlite3.OperationalError("write queue timeout")
+        if profile is not None:
+            profile.merge(future.profile)
+        return future.result()
+
+    def stop(self):
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+            self._pid = None
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        pool = db_pool.ConnectionPool(self.database, size=1, pragmas=self.pragmas)
+        db = pool.acquire()
+        try:
+            while True:
+                batch = self._take_batch()
+                stop = _STOP in batch
+                jobs = [job for job in batch if job is not _STOP]
+                if jobs:
+                    self._execute(db, jobs)
+                if stop:
+                    return
+        finally:
+            pool.release(db)
+            pool.close_all()
+
+    def _execute(self, db, jobs):
+        started = time.perf_counter()
+        results = []
+        try:
+            # IMMEDIATE: блокування запису береться одразу (з busy_timeout щодо інших процесів)
+            db.execute("BEGIN IMMEDIATE")
+            for fn, future, queued in jobs:
+                self.stats['queue_wait'] += started - queued
+                # False — викликач уже скасував (timeout): функцію пропускаємо
+                if not future.set_running_or_notify_cancel():
+                    self.stats['cancelled'] += 1
+                    continue
+                db.execute("SAVEPOINT job")
+                try:
+                    job_db = profiling.InstrumentedConnection(db, future.profile) if future.profile is not None else db
+                    results.append((future, True, fn(job_db)))
+                    db.execute("RELEASE job")
+                except Exception as e:
+                    db.execute("ROLLBACK TO job")
+                    db.execute("RELEASE job")
+                    results.append((future, False, e))
+            db.commit()
+        except Exception as e:
+            # Не вдалася сама транзакція — жоден запис пакета не збережено
+            if db.in_transaction:
+                db.rollback()
+            for fn, future, queued in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            self.stats['failed'] += len(jobs)
+            return
+
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+                self.stats['failed'] += 1
+        self.stats['jobs'] += len(results)
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(jobs))
+        self.stats['commit_time'] += time.perf_counter() - started
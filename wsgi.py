@@ -0,0 +1,27 @@
+import logging
+import os
+import secrets
+
+import app_timer
+
+# --- ТОЧКА ВХОДУ ДЛЯ WSGI-СЕРВЕРІВ ---
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application     (кілька процесів-воркерів)
+#   waitress-serve --threads 8 wsgi:application       (один процес, потоки)
+#
+# Модуль імпортується один раз на сервер: gunicorn з preload_app робить це в
+# майстрі ще до fork, тож міграції й компіляція шаблонів виконуються один раз,
+# а воркери отримують уже скомпільовані шаблони (copy-on-write) і спільний
+# секрет сесій. Пул з'єднань і фонові потоки (пошта, рейтинг) кожен воркер
+# створює сам на першому запиті (див. ensure_schema).
+
+if not os.environ.get('UKD_SECRET_KEY'):
+    # Cookie сесії, підписана одним воркером, має проходити перевірку в іншому — секрет спільний.
+    # Кілька серверів за балансувальником мають отримати однаковий UKD_SECRET_KEY явно
+    os.environ['UKD_SECRET_KEY'] = secrets.token_hex(32)
+    logging.getLogger(__name__).warning("UKD_SECRET_KEY is not set: using a random key, sessions end on restart")
+
+application = app_timer.create_app()
+app_timer.prepare(application)
+# З'єднання SQLite не можна переносити через fork — воркери відкриють власні
+application.extensions['ukd'].pool().close_all()